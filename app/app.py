@@ -1,21 +1,51 @@
 import json
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
 import altair as alt
 import pandas as pd
 import streamlit as st
 
+from data_layer import SeasonData, data_version, load_tiles
+from eplxg import datasets
+from eplxg.config import METRICS_PATH, SEASONS_PATH, TEAM_METRICS
+from eplxg.transform.similar_shots import ShotIndex, index_version
+
 st.set_page_config(page_title="EPL xG-lite", layout="wide")
 
-TEAM_PATH = Path("data/gold/team_metrics_2015_16.parquet")
-PLAYER_PATH = Path("data/gold/player_metrics_2015_16.parquet")
-PLAYER_TEAM_PATH = Path("data/gold/player_team_metrics_2015_16.parquet")
-METRICS_PATH = Path("reports/metrics.json")
+
+@st.cache_resource(max_entries=8)
+def season_data(season: tuple, version: tuple, model_version) -> SeasonData:
+    # Built once per season, gold file version and model version, and shared
+    # by every rerun and session without copying (views never modify it)
+    return SeasonData(season, model_version)
+
+
+@st.cache_data(max_entries=64)
+def heatmap(scope: str, season: tuple, version: tuple, cell: int, key) -> pd.DataFrame:
+    # A few hundred cells at most, however many shots the season has
+    return load_tiles(scope, season, cell, key)
+
+
+@st.cache_resource(max_entries=1)
+def shot_index(version: tuple) -> ShotIndex:
+    # Every season's shots; the KD-trees are rebuilt from shots.parquet once per saved index
+    return ShotIndex.load()
 
 
 @st.cache_data
-def load_parquet(path: Path) -> pd.DataFrame:
-    return pd.read_parquet(path)
+def season_labels() -> dict:
+    labels = {}
+    for season in datasets.list_partitions(TEAM_METRICS):
+        labels[season] = f"competition {season[0]}, season {season[1]}"
+    if SEASONS_PATH.exists():
+        for r in pd.read_parquet(SEASONS_PATH).itertuples():
+            key = (r.competition_id, r.season_id)
+            if key in labels and r.competition_name and r.season_name:
+                labels[key] = f"{r.competition_name} {r.season_name}"
+    return labels
 
 
 @st.cache_data
@@ -24,41 +54,52 @@ def load_json(path: Path) -> dict:
         return json.load(f)
 
 
-def fmt_tables(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    for c in ["shots", "goals"]:
-        if c in out.columns:
-            out[c] = out[c].astype(int)
-    for c in ["xg", "goal_minus_xg"]:
-        if c in out.columns:
-            out[c] = out[c].round(2)
-    return out
+# ---- Season ----
+labels = season_labels()
+if not labels:
+    st.error("Missing aggregated parquet files. Run the pipeline (or at least aggregate_metrics.py) first.")
+    st.stop()
 
+season = st.sidebar.selectbox(
+    "Season",
+    list(labels),
+    index=len(labels) - 1,
+    format_func=labels.get,
+)
+st.sidebar.divider()
 
-st.markdown("# ⚽ EPL 2015/16 xG-lite Dashboard")
+st.markdown(f"# ⚽ {labels[season]} xG-lite Dashboard")
 st.markdown("Interactive expected goals analysis built with StatsBomb data.")
 st.markdown("---")
 
 # ---- Load data (with friendly errors) ----
+# Rewriting a season's gold tables changes its version, which rebuilds the indexes
+version = data_version(season)
 try:
-    team_df = load_parquet(TEAM_PATH)
-    player_df = load_parquet(PLAYER_PATH)
+    data = season_data(season, version, None)
 except FileNotFoundError:
     st.error("Missing aggregated parquet files. Run the pipeline (or at least aggregate_metrics.py) first.")
     st.stop()
 
-player_team_df = None
-try:
-    player_team_df = load_parquet(PLAYER_TEAM_PATH)
-except FileNotFoundError:
-    # We'll show a note in the UI; the dashboard still works without it.
-    pass
-
 try:
     metrics = load_json(METRICS_PATH)
 except FileNotFoundError:
     metrics = None
 
+# ---- Model version ----
+# Versions scored side by side (score_shots.py --compare) switch without rescoring
+if data.versions:
+    model_version = st.sidebar.selectbox(
+        "Model version",
+        [None] + data.versions,
+        format_func=lambda v: "Scored model" if v is None else v,
+        help="Registered models scored in the same pass. Chance ranges and p-values are only "
+             "available for the scored model.",
+    )
+    st.sidebar.divider()
+    if model_version is not None:
+        data = season_data(season, version, model_version)
+
 # ---- Sidebar controls ----
 st.sidebar.markdown("### 🏟 Team Settings")
 team_sort_metric = st.sidebar.selectbox(
@@ -86,10 +127,19 @@ player_sort_metric = st.sidebar.selectbox(
 
 player_search = st.sidebar.text_input("Search player (optional)", "")
 
-if player_team_df is not None:
+# Monte Carlo p-values from aggregate_metrics; older tables may not have them
+has_sims = data.has_sims
+significant_only = has_sims and st.sidebar.checkbox(
+    "Only Goals − xG unlikely to be chance (p < 0.05)",
+    value=False,
+    help="Each shot is replayed as a coin flip with its xG. Players whose goals fall inside "
+         "the range those replays produce are hidden.",
+)
+
+if data.player_team is not None:
     team_pick = st.sidebar.selectbox(
         "Filter players by team",
-        ["All teams"] + sorted(player_team_df["team"].unique().tolist()),
+        ["All teams"] + data.player_team.group_keys,
         index=0,
     )
 else:
@@ -98,15 +148,16 @@ else:
 ascending_gmxg = (view_mode.startswith("Underperformers"))
 
 # ---- Tabs ----
-tab_overview, tab_teams, tab_players = st.tabs(["Overview", "Teams", "Players"])
+tab_overview, tab_teams, tab_players, tab_shots, tab_similar = st.tabs(
+    ["Overview", "Teams", "Players", "Shot Map", "Similar Shots"])
 
 with tab_overview:
 
     st.markdown("## 📦 Season Summary")
     
-    total_shots = int(team_df["shots"].sum())
-    total_goals = int(team_df["goals"].sum())
-    total_xg = float(team_df["xg"].sum())
+    total_shots = data.totals["shots"]
+    total_goals = data.totals["goals"]
+    total_xg = data.totals["xg"]
     avg_xg = total_xg / total_shots
     
     c1, c2, c3, c4 = st.columns(4)
@@ -123,11 +174,11 @@ with tab_overview:
     # -----------------------
     st.markdown("## 🎯 Season Highlights")
 
-    top_team = team_df.sort_values("goal_minus_xg", ascending=False).iloc[0]
-    bottom_team = team_df.sort_values("goal_minus_xg", ascending=True).iloc[0]
+    top_team = data.team.first("goal_minus_xg")
+    bottom_team = data.team.first("goal_minus_xg", ascending=True)
 
-    top_player = player_df.sort_values("goal_minus_xg", ascending=False).iloc[0]
-    top_xg_player = player_df.sort_values("xg", ascending=False).iloc[0]
+    top_player = data.player.first("goal_minus_xg")
+    top_xg_player = data.player.first("xg")
 
     col1, col2 = st.columns(2)
 
@@ -169,7 +220,8 @@ with tab_overview:
         c1, c2, c3 = st.columns(3)
         c1.metric("Log Loss", round(metrics["log_loss"], 3))
         c2.metric("Brier Score", round(metrics["brier_score"], 3))
-        c3.metric("ROC-AUC", round(metrics["roc_auc"], 3))
+        # None when no held-out fold had both goals and misses
+        c3.metric("ROC-AUC", "n/a" if metrics["roc_auc"] is None else round(metrics["roc_auc"], 3))
 
     # -----------------------
     # 3️⃣ About the Model (Very Bottom)
@@ -197,15 +249,11 @@ with tab_overview:
 
 with tab_teams:
     st.markdown("## 📊 Team Performance")
-    team_sorted = team_df.sort_values(team_sort_metric, ascending=False).reset_index(drop=True)
-    st.dataframe(fmt_tables(team_sorted), use_container_width=True, hide_index=True)
+    st.dataframe(data.team.view(team_sort_metric), use_container_width=True, hide_index=True)
 
     st.markdown("### ⚖️ Goals vs Expected Goals")
     
-    chart_df = team_df.copy()
-    chart_df["goal_minus_xg"] = chart_df["goal_minus_xg"].round(2)
-    chart_df["xg"] = chart_df["xg"].round(2)
-    chart_df["goals"] = chart_df["goals"].astype(int)
+    chart_df = data.team.shown
     
     min_v = float(min(chart_df["xg"].min(), chart_df["goals"].min()))
     max_v = float(max(chart_df["xg"].max(), chart_df["goals"].max()))
@@ -234,38 +282,39 @@ with tab_teams:
     
     st.altair_chart(scatter + ref, use_container_width=True)
 
+    st.markdown("### 🧮 xG Table")
+    if data.xg_table is None:
+        st.info("Expected points need the xg_table dataset. Run match_outcomes.py (or the pipeline) first.")
+    else:
+        st.caption("Expected points from each match's exact win/draw/loss probabilities, given every shot's xG.")
+        cols = ["xpts_rank", "team", "matches", "xg_for", "xg_against", "exp_wins", "exp_draws", "exp_losses",
+                "xpts", "points", "points_minus_xpts", "points_rank"]
+        st.dataframe(data.xg_table[cols].round(2), use_container_width=True, hide_index=True)
+
 with tab_players:
     st.markdown("## 🧍 Player Performance")
 
-    # Choose player dataset
-    if player_team_df is not None and team_pick != "All teams":
-        base_players = player_team_df[player_team_df["team"] == team_pick].copy()
+    # Choose player table: sort orders, per-team orders and the name index are precomputed
+    if data.player_team is not None and team_pick != "All teams":
+        players, group = data.player_team, team_pick
     else:
-        base_players = player_df.copy()
+        players, group = data.player, None
 
     # Apply filters
-    base_players = base_players[base_players["shots"] >= min_shots].copy()
-
-    if player_search.strip():
-        base_players = base_players[
-            base_players["player"].str.contains(player_search.strip(), case=False, na=False)
-        ].copy()
-
-    players_sorted = base_players.sort_values(player_sort_metric, ascending=False).reset_index(drop=True)
+    mask = players.filter_mask(min_shots, significant_only, player_search)
+    players_sorted = players.view(player_sort_metric, group=group, mask=mask)
 
     # Show over/under view ordering by goal_minus_xg too
-    ranked = base_players.sort_values("goal_minus_xg", ascending=ascending_gmxg).reset_index(drop=True)
+    ranked = players.view("goal_minus_xg", ascending=ascending_gmxg, group=group, mask=mask, limit=10)
 
     c1, c2 = st.columns([2, 1])
     with c1:
-        st.dataframe(fmt_tables(players_sorted), use_container_width=True, hide_index=True)
+        st.dataframe(players_sorted, use_container_width=True, hide_index=True)
 
     with c2:
         st.write("### Top 10 (Goals − xG)")
         
-        chart_df = ranked.head(10).copy()
-        chart_df["goal_minus_xg"] = chart_df["goal_minus_xg"].round(2)
-        chart_df["xg"] = chart_df["xg"].round(2)
+        chart_df = ranked
         
         bar = (
             alt.Chart(chart_df)
@@ -279,11 +328,141 @@ with tab_players:
                     alt.Tooltip("goals:Q", title="Goals"),
                     alt.Tooltip("xg:Q", title="xG"),
                     alt.Tooltip("goal_minus_xg:Q", title="Goals − xG"),
-                ],
+                ] + ([
+                    alt.Tooltip("goal_minus_xg_p05:Q", title="Chance range from", format=".2f"),
+                    alt.Tooltip("goal_minus_xg_p95:Q", title="Chance range to", format=".2f"),
+                    alt.Tooltip("p_value:Q", title="p-value", format=".3f"),
+                ] if has_sims else []),
             )
         )
         
         st.altair_chart(bar, use_container_width=True)
 
-    if player_team_df is None:
-        st.info("Team filter requires player_team_metrics_2015_16.parquet. Run aggregate_metrics.py after updating it.")
+    if data.player_team is None:
+        st.info("Team filter requires the player_team_metrics dataset. Run aggregate_metrics.py after updating it.")
+
+with tab_shots:
+    st.markdown("## 🗺 Shot Map")
+    st.caption("Shots binned onto a grid over the pitch, attacking left to right. "
+               "Tiles are precomputed by shot_heatmaps.py, so the map loads the same amount of data for any number "
+               "of shots.")
+
+    c1, c2, c3, c4 = st.columns(4)
+    scope = c1.radio("Shots of", ["season", "team", "player"], format_func=str.capitalize, horizontal=True)
+    if scope == "team":
+        key = c2.selectbox("Team", sorted(data.team.df["team"].astype(str)))
+    elif scope == "player":
+        key = c2.selectbox("Player", sorted(data.player.df["player"].astype(str)))
+    else:
+        key = None
+    cell = c3.select_slider("Cell size (yards)", [10, 5, 2], value=5)
+    heat_metric = c4.selectbox("Colour by", ["shots", "xg", "goals", "goal_minus_xg"])
+
+    try:
+        tiles = heatmap(scope, season, version, cell, key)
+    except FileNotFoundError:
+        tiles = None
+    if tiles is None:
+        st.info("Shot heatmaps need the heatmap datasets. Run shot_heatmaps.py (or the pipeline) first.")
+    elif tiles.empty:
+        st.info("No shots with a location for this selection.")
+    else:
+        x = alt.X("x0:Q", title="", scale=alt.Scale(domain=[0, 120]), axis=None)
+        y = alt.Y("y0:Q", title="", scale=alt.Scale(domain=[0, 80], reverse=True), axis=None)
+        color = (alt.Color(f"{heat_metric}:Q", title=heat_metric, scale=alt.Scale(scheme="redblue", domainMid=0,
+                                                                                    reverse=True))
+                 if heat_metric == "goal_minus_xg" else alt.Color(f"{heat_metric}:Q", title=heat_metric,
+                                                                  scale=alt.Scale(scheme="orangered")))
+        cells = (
+            alt.Chart(tiles)
+            .mark_rect()
+            .encode(
+                x=x, x2="x1:Q", y=y, y2="y1:Q", color=color,
+                tooltip=[
+                    alt.Tooltip("shots:Q", title="Shots"),
+                    alt.Tooltip("goals:Q", title="Goals"),
+                    alt.Tooltip("xg:Q", title="xG", format=".2f"),
+                    alt.Tooltip("goal_minus_xg:Q", title="Goals − xG", format=".2f"),
+                ],
+            )
+        )
+        # Pitch outline, halfway line and both penalty areas (StatsBomb coordinates)
+        lines = pd.DataFrame({"x0": [0, 60, 0, 102], "x1": [120, 60, 18, 120],
+                              "y0": [0, 0, 18, 18], "y1": [80, 80, 62, 62]})
+        pitch = alt.Chart(lines).mark_rect(fill=None, stroke="grey").encode(x=x, x2="x1:Q", y=y, y2="y1:Q")
+        st.altair_chart((cells + pitch).properties(height=480), use_container_width=True)
+        st.caption(f"{int(tiles['shots'].sum()):,} shots in {len(tiles)} cells")
+
+with tab_similar:
+    st.markdown("## 🔎 Similar Shots")
+    st.caption("Each of a player's shots next to the most similar shots of every scored season: same body part "
+               "(header or not) and penalty or not, nearest in location and angle. How often those went in is what "
+               "such chances actually yielded, next to what the model says.")
+
+    try:
+        index = shot_index(index_version())
+    except FileNotFoundError:
+        index = None
+    if index is None:
+        st.info("Similar shots need the shot index. Run similar_shots.py (or the pipeline) first.")
+    else:
+        c1, c2 = st.columns([2, 1])
+        similar_player = c1.selectbox("Player", sorted(data.player.df["player"].astype(str)), key="similar_player")
+        k = c2.slider("Similar shots per shot", 10, 200, 50, step=10)
+        rows = index.rows(season=season, player=similar_player)
+        if len(rows) == 0:
+            st.info("No shots with a location for this player.")
+        else:
+            # One batched query for all the player's shots, each leaving itself out
+            stats = index.similar(**index.features(rows), k=k, exclude=rows)
+            cols = ["match_id", "minute", "second", "x", "y", "is_header", "is_penalty", "xg", "is_goal"]
+            shots = pd.concat([index.shots.take(rows).select(cols).to_pandas(), stats], axis=1)
+
+            m1, m2, m3, m4 = st.columns(4)
+            m1.metric("Shots", f"{len(shots):,}")
+            m2.metric("Goals", int(shots["is_goal"].sum()))
+            m3.metric("xG", f"{shots['xg'].sum():.2f}")
+            m4.metric("Goals from similar shots", f"{shots['conversion'].sum():.2f}",
+                      help="Sum over the player's shots of how often their similar shots were scored")
+
+            shown = shots[["minute", "match_id", "is_header", "is_penalty", "xg", "is_goal", "conversion", "mean_xg",
+                           "reach"]].rename(columns={"conversion": "similar_conversion", "mean_xg": "similar_xg"})
+            st.dataframe(shown.round(3), use_container_width=True, hide_index=True)
+
+            pick = st.selectbox(
+                "Show the similar shots of",
+                range(len(shots)),
+                format_func=lambda i: f"{shots['minute'][i]}' in match {shots['match_id'][i]} "
+                                      f"(xG {shots['xg'][i]:.2f}{', goal' if shots['is_goal'][i] else ''})",
+            )
+            _, nearest = index.knn(**index.features(rows[[pick]]), k=k, exclude=rows[[pick]])
+            nearest = nearest[0][nearest[0] >= 0]
+            neighbours = index.shots.take(nearest).select(["player", "x", "y", "xg", "is_goal"]).to_pandas()
+            neighbours["player"] = neighbours["player"].astype(str)
+
+            x = alt.X("x:Q", title="", scale=alt.Scale(domain=[60, 120]), axis=None)
+            y = alt.Y("y:Q", title="", scale=alt.Scale(domain=[0, 80], reverse=True), axis=None)
+            points = (
+                alt.Chart(neighbours)
+                .mark_circle(size=60, opacity=0.7)
+                .encode(
+                    x=x, y=y,
+                    color=alt.Color("is_goal:N", title="Goal", scale=alt.Scale(domain=[False, True],
+                                                                               range=["grey", "crimson"])),
+                    tooltip=[
+                        alt.Tooltip("player:N", title="Player"),
+                        alt.Tooltip("xg:Q", title="xG", format=".2f"),
+                        alt.Tooltip("is_goal:N", title="Goal"),
+                    ],
+                )
+            )
+            shot = alt.Chart(shots.iloc[[pick]]).mark_point(shape="diamond", size=250, filled=True,
+                                                            color="black").encode(x=x, y=y)
+            # Attacking half: penalty area and six-yard box (StatsBomb coordinates)
+            lines = pd.DataFrame({"x0": [60, 102, 114], "x1": [120, 120, 120], "y0": [0, 18, 30], "y1": [80, 62, 50]})
+            pitch = (alt.Chart(lines).mark_rect(fill=None, stroke="grey")
+                     .encode(x=alt.X("x0:Q", scale=alt.Scale(domain=[60, 120]), axis=None), x2="x1:Q",
+                             y=alt.Y("y0:Q", scale=alt.Scale(domain=[0, 80], reverse=True), axis=None), y2="y1:Q"))
+            st.altair_chart((pitch + points + shot).properties(height=420), use_container_width=True)
+            st.caption(f"{int(neighbours['is_goal'].sum())} of {len(neighbours)} similar shots were scored "
+                       f"({neighbours['is_goal'].mean():.0%}); this shot's xG is {shots['xg'][pick]:.2f}.")
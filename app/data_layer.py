@@ -0,0 +1,220 @@
+"""Pre-indexed season tables for the dashboard.
+
+Streamlit reruns app.py from the top on every widget change. Instead of
+copying, sorting and string-searching the player tables on each rerun, a
+SeasonData is built once per season, gold file version and model version
+(app.py caches it) and holds:
+
+- every table with the selected model version's xg already swapped in
+- a descending row order per sort metric, and per team for player_team
+- a character n-gram index over the player names
+
+An interaction is then a lookup of the precomputed order, boolean masks for
+the filters and one `take` of the rows shown.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from eplxg import datasets
+from eplxg.config import PLAYER_METRICS, PLAYER_TEAM_METRICS, TEAM_METRICS, XG_TABLE
+from eplxg.model import registry
+from eplxg.transform import shot_heatmaps
+
+SORT_METRICS = ["goal_minus_xg", "xg", "goals", "shots"]
+NGRAM = 3  # longest indexed substring; longer queries intersect their n-grams
+SIM_COLS = ["goal_minus_xg_p05", "goal_minus_xg_p95", "p_value"]
+# Gold tables the dashboard reads, optional ones may be missing
+TABLES = {"team": TEAM_METRICS, "player": PLAYER_METRICS, "player_team": PLAYER_TEAM_METRICS, "xg_table": XG_TABLE}
+
+
+def data_version(season):
+    """Cache key for a season's dashboard data: the versions of its gold partitions."""
+    roots = list(TABLES.values()) + list(shot_heatmaps.OUT_PATHS.values())
+    return tuple(datasets.partition_version(root, season) for root in roots)
+
+
+def load_tiles(scope, season, cell, key=None):
+    """One heatmap grid (shot_heatmaps): the non-empty cells of a season, team or player.
+
+    Only that grid's rows are read, so the size does not depend on how many
+    shots the season has. Adds the cell bounds in pitch coordinates
+    (x0, x1, y0, y1). Raises FileNotFoundError when the tiles were not built.
+    """
+    expr = datasets.make_filter(seasons=[season]) & (ds.field("cell") == cell)
+    group = shot_heatmaps.SCOPES[scope]
+    if group is not None:
+        expr &= ds.field(group) == key
+    tiles = datasets.dataset(shot_heatmaps.OUT_PATHS[scope]).to_table(filter=expr).to_pandas()
+    tiles["x0"], tiles["y0"] = tiles["col"] * cell, tiles["row"] * cell
+    tiles["x1"], tiles["y1"] = tiles["x0"] + cell, tiles["y0"] + cell
+    return tiles
+
+
+def use_version(df: pd.DataFrame, version) -> pd.DataFrame:
+    """The table with xg / goal_minus_xg from a compared model version (None: the scored model).
+
+    The Monte Carlo and standard deviation columns belong to the scored
+    model, so they are dropped for any other version.
+    """
+    compared = registry.column_versions(df.columns)
+    out = df.drop(columns=[c for v in compared for c in (registry.column(v), f"goal_minus_{registry.column(v)}")])
+    if version is None:
+        return out
+    col = registry.column(version)
+    out["xg"], out["goal_minus_xg"] = df[col], df[f"goal_minus_{col}"]
+    return out.drop(columns=SIM_COLS + ["goal_minus_xg_sd"], errors="ignore")
+
+
+def fmt_tables(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.copy()
+    for c in ["shots", "goals"]:
+        if c in out.columns:
+            out[c] = out[c].astype(int)
+    for c in ["xg", "goal_minus_xg", "goal_minus_xg_sd", "goal_minus_xg_p05", "goal_minus_xg_p95"]:
+        if c in out.columns:
+            out[c] = out[c].round(2)
+    if "p_value" in out.columns:
+        out["p_value"] = out["p_value"].round(3)
+    return out
+
+
+def _descending(values):
+    # Stable, largest first, NaN last (like sort_values(ascending=False))
+    values = np.asarray(values, dtype=np.float64)
+    return np.lexsort((np.arange(len(values)), -np.nan_to_num(values, nan=-np.inf), np.isnan(values)))
+
+
+class NameIndex:
+    """Case-insensitive substring search over a set of names.
+
+    Every distinct name is indexed under each of its substrings of up to
+    NGRAM characters, so a short query is one dict lookup and a longer one
+    intersects the posting lists of its n-grams before checking the few
+    candidates left. Tables share one index and map their rows to name ids
+    with codes().
+    """
+
+    def __init__(self, names):
+        self.ids = pd.Index(pd.Series(list(names), dtype="string").dropna().str.lower().unique())
+        self.names = self.ids.tolist()
+        grams = {}
+        for i, name in enumerate(self.names):
+            for gram in {name[j:j + n] for n in range(1, NGRAM + 1) for j in range(len(name) - n + 1)}:
+                grams.setdefault(gram, []).append(i)
+        self.grams = {g: np.array(ids, dtype=np.int64) for g, ids in grams.items()}
+
+    def codes(self, names: pd.Series):
+        """Name id of every row (-1 for a missing name)."""
+        return self.ids.get_indexer(names.astype("string").str.lower())
+
+    def lookup(self, query):
+        """Ids of the distinct names containing query."""
+        query = query.lower()
+        if len(query) <= NGRAM:
+            return self.grams.get(query, np.empty(0, dtype=np.int64))
+        postings = [self.grams.get(query[j:j + NGRAM]) for j in range(len(query) - NGRAM + 1)]
+        if any(p is None for p in postings):
+            return np.empty(0, dtype=np.int64)
+        postings.sort(key=len)
+        ids = postings[0]
+        for p in postings[1:]:
+            ids = np.intersect1d(ids, p, assume_unique=True)
+        return np.array([i for i in ids if query in self.names[i]], dtype=np.int64)
+
+    def mask(self, query, codes):
+        """Boolean mask over rows (given as codes()) whose name contains query."""
+        hit = np.zeros(len(self.names) + 1, dtype=bool)  # last slot: missing names (code -1)
+        hit[self.lookup(query)] = True
+        return hit[codes]
+
+
+class IndexedTable:
+    """A metrics table with precomputed sort orders; views are index lookups."""
+
+    def __init__(self, df: pd.DataFrame, group=None, names=None):
+        """group: column with per-group orders (e.g. team); names: NameIndex for the player column."""
+        self.df = df.reset_index(drop=True)
+        self.shown = fmt_tables(self.df)
+        self.order = {m: _descending(self.df[m]) for m in SORT_METRICS}
+        self.shots = self.df["shots"].to_numpy()
+        self.p_value = self.df["p_value"].to_numpy() if "p_value" in self.df.columns else None
+        self.groups = {}
+        if group is not None:
+            # Per-group orders: a stable sort of each metric order by group keeps it sorted inside the group
+            codes, keys = pd.factorize(self.df[group].astype("string"))
+            for m, order in self.order.items():
+                by_group = order[np.argsort(codes[order], kind="stable")]
+                by_group = by_group[codes[by_group] >= 0]  # rows without a group sort first; drop them
+                bounds = np.r_[0, np.cumsum(np.bincount(codes[codes >= 0], minlength=len(keys)))]
+                self.groups[m] = {str(k): by_group[bounds[i]:bounds[i + 1]] for i, k in enumerate(keys)}
+            self.group_keys = sorted(str(k) for k in keys)
+        self.names = names
+        self.name_codes = names.codes(self.df["player"]) if names is not None else None
+
+    def __len__(self):
+        return len(self.df)
+
+    def rows(self, metric, ascending=False, group=None, mask=None):
+        """Row positions sorted by metric, optionally within one group and filtered by a row mask."""
+        if group is None:
+            order = self.order[metric]
+        else:
+            order = self.groups[metric].get(group, np.empty(0, dtype=np.int64))
+        if ascending:
+            order = order[::-1]
+        return order if mask is None else order[mask[order]]
+
+    def view(self, metric, ascending=False, group=None, mask=None, limit=None):
+        """Display-formatted rows (fmt_tables), sorted by metric."""
+        rows = self.rows(metric, ascending, group, mask)
+        return self.shown.take(rows[:limit]).reset_index(drop=True)
+
+    def first(self, metric, ascending=False):
+        """The raw top (or bottom) row by metric."""
+        return self.df.iloc[self.rows(metric, ascending)[0]]
+
+    def filter_mask(self, min_shots=0, significant_only=False, search=""):
+        """Row mask for the player filters, or None when nothing is filtered."""
+        mask = None
+        if min_shots:
+            mask = self.shots >= min_shots
+        if significant_only:
+            sig = self.p_value < 0.05
+            mask = sig if mask is None else mask & sig
+        if search.strip():
+            hit = self.names.mask(search.strip(), self.name_codes)
+            mask = hit if mask is None else mask & hit
+        return mask
+
+
+class SeasonData:
+    """Everything the dashboard shows for one season and model version, indexed once."""
+
+    def __init__(self, season, model_version=None):
+        frames = {}
+        for name, root in TABLES.items():
+            try:
+                frames[name] = datasets.read_frame(root, seasons=[season])
+            except FileNotFoundError:
+                frames[name] = None
+        if frames["team"] is None or frames["player"] is None:
+            raise FileNotFoundError("Missing aggregated parquet files")
+        self.versions = registry.column_versions(frames["team"].columns)
+        if model_version not in self.versions:
+            model_version = None
+        self.model_version = model_version
+        team = use_version(frames["team"], model_version)
+        player = use_version(frames["player"], model_version)
+        player_team = frames["player_team"]
+        if player_team is not None:
+            player_team = use_version(player_team, model_version)
+        # One name index for both player tables
+        names = NameIndex(pd.concat([t["player"] for t in (player, player_team) if t is not None]))
+        self.team = IndexedTable(team)
+        self.player = IndexedTable(player, names=names)
+        self.player_team = None if player_team is None else IndexedTable(player_team, group="team", names=names)
+        self.xg_table = frames["xg_table"]
+        self.has_sims = "p_value" in player.columns
+        self.totals = {"shots": int(team["shots"].sum()), "goals": int(team["goals"].sum()),
+                       "xg": float(team["xg"].sum())}
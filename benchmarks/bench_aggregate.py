@@ -0,0 +1,110 @@
+"""Benchmark gold aggregation: pandas groupbys over a loaded frame vs one DuckDB GROUPING SETS scan.
+
+Builds a synthetic scored dataset (partitioned like data/gold/shots_scored),
+checks the DuckDB team/player tables against pandas, and times both.
+pandas has to load every column it groups on into memory first; DuckDB
+streams the parquet files and computes every grouping in the same pass.
+
+    python benchmarks/bench_aggregate.py --rows 5000000 --seasons 10
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pyarrow as pa  # noqa: E402
+
+from eplxg import datasets  # noqa: E402
+from eplxg.config import PARTITION_COLS  # noqa: E402
+from eplxg.transform import aggregate_metrics  # noqa: E402
+
+PLAY_PATTERNS = ["Regular Play", "From Corner", "From Free Kick", "From Throw In", "From Counter",
+                 "From Goal Kick", "From Keeper", "From Kick Off", "Other"]
+
+
+def scored_table(rng, n, seasons, competition_id=2):
+    season_id = rng.integers(0, seasons, n) + 1000
+    team = rng.integers(0, 20, n)
+    xg = rng.beta(1.2, 9.0, n)
+    return pa.table({
+        "competition_id": np.full(n, competition_id),
+        "season_id": season_id,
+        "match_id": season_id * 1000 + rng.integers(0, 380, n),
+        "team": pa.array([f"Team {t}" for t in team]),
+        "player": pa.array([f"Player {t}-{p}" for t, p in zip(team, rng.integers(0, 25, n))]),
+        "minute": rng.integers(0, 96, n),
+        "play_pattern": pa.array(rng.choice(PLAY_PATTERNS, n)),
+        "xg": xg,
+        "is_goal": (rng.random(n) < xg).astype(np.int64),
+    })
+
+
+def pandas_aggregate(root):
+    df = datasets.read_frame(root, columns=aggregate_metrics.SCORED_COLS)
+    df["minute_bucket"] = np.minimum(df["minute"] // aggregate_metrics.MINUTE_BUCKET,
+                                     90 // aggregate_metrics.MINUTE_BUCKET) * aggregate_metrics.MINUTE_BUCKET
+    df["xg_sq"] = df["xg"] ** 2
+    out = {}
+    for name, keys in aggregate_metrics.GROUPINGS.items():
+        t = df.groupby(PARTITION_COLS + keys, dropna=False).agg(
+            shots=("xg", "count"), goals=("is_goal", "sum"), xg=("xg", "sum"), xg_sq=("xg_sq", "sum")).reset_index()
+        t["goal_minus_xg"] = t["goals"] - t["xg"]
+        t["goal_minus_xg_sd"] = np.sqrt(t.pop("xg_sq").rsub(t["xg"]).clip(lower=0))
+        out[name] = t
+    return out
+
+
+def check(duck, pdf):
+    for name, keys in aggregate_metrics.GROUPINGS.items():
+        keys = PARTITION_COLS + keys
+        expected = pdf[name].sort_values(keys).reset_index(drop=True)
+        # The Monte Carlo columns have no pandas counterpart
+        got = duck[name].to_pandas()[expected.columns].sort_values(keys).reset_index(drop=True)
+        pd.testing.assert_frame_equal(got, expected, check_dtype=False, rtol=1e-9)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--seasons", type=int, default=5)
+    parser.add_argument("--memory_limit", help="DuckDB memory limit, e.g. 512MB")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "shots_scored"
+        table = scored_table(rng, args.rows, args.seasons)
+        datasets.write_dataset(table, root, table.schema)
+        del table
+
+        start = time.perf_counter()
+        pdf = pandas_aggregate(root)
+        t_pandas = time.perf_counter() - start
+
+        start = time.perf_counter()
+        duck = aggregate_metrics.aggregate_metrics(
+            scored_dir=root, con=aggregate_metrics.connect(args.memory_limit), sims=0, state=False)
+        t_duck = time.perf_counter() - start
+
+        check(duck, pdf)
+
+    print(json.dumps({
+        "rows": args.rows,
+        "seasons": args.seasons,
+        "tables": {name: t.num_rows for name, t in duck.items()},
+        "pandas_s": round(t_pandas, 3),
+        "duckdb_s": round(t_duck, 3),
+        "speedup": round(t_pandas / t_duck, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
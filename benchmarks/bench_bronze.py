@@ -0,0 +1,94 @@
+"""Benchmark the bronze layouts: loose JSON files vs one packed file per season.
+
+Generates synthetic bronze data, copies it and packs the copy season by
+season (bronze.pack_season), then compares:
+
+- disk: bytes and allocated blocks, and file counts
+- listing: bronze.event_sources over the whole tree
+- extraction: extract_shots.write_shots in-process and over a process pool
+- random reads: one match's events by id, averaged over --reads matches
+
+Timings only; tests/test_bronze.py checks both layouts give the same events and shots.
+
+    python benchmarks/bench_bronze.py --seasons 3 --matches 120
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from eplxg import bronze  # noqa: E402
+from eplxg.transform import extract_shots  # noqa: E402
+from synthetic import generate_bronze  # noqa: E402
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def disk_usage(root):
+    files = [p for p in Path(root).rglob("*") if p.is_file()]
+    stats = [p.stat() for p in files]
+    return {"files": len(files), "mb": round(sum(s.st_size for s in stats) / 1e6, 2),
+            "allocated_mb": round(sum(s.st_blocks * 512 for s in stats) / 1e6, 2)}
+
+
+def random_reads(sources, n, seed):
+    picks = random.Random(seed).sample(sources, min(n, len(sources)))
+    start = time.perf_counter()
+    for source in picks:
+        bronze.read_events(source)
+    return (time.perf_counter() - start) / len(picks)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seasons", type=int, default=3)
+    parser.add_argument("--matches", type=int, default=120, help="Matches per season")
+    parser.add_argument("--events", type=int, default=3500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--reads", type=int, default=200, help="Random single-match reads per layout")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        dirs = {"loose": tmp / "loose", "packed": tmp / "packed"}
+        pairs = generate_bronze(dirs["loose"], args.seasons, args.matches, args.events, seed=args.seed,
+                                workers=args.workers)
+        shutil.copytree(dirs["loose"], dirs["packed"])
+        _, pack_s = timed(lambda: [bronze.pack_season(dirs["packed"], c, s, remove_loose=True) for c, s in pairs])
+        match_seasons, _ = extract_shots.load_match_seasons(dirs["loose"])
+
+        results = {"matches": len(match_seasons), "pack_s": round(pack_s, 3)}
+        for name, bronze_dir in dirs.items():
+            sources, list_s = timed(bronze.event_sources, bronze_dir)
+            _, seq_s = timed(extract_shots.write_shots, sources, match_seasons, tmp / f"{name}_seq", workers=1)
+            _, par_s = timed(extract_shots.write_shots, sources, match_seasons, tmp / f"{name}_par",
+                             workers=args.workers)
+            results[name] = {
+                **disk_usage(bronze_dir),
+                "list_s": round(list_s, 4),
+                "extract_1_worker_s": round(seq_s, 3),
+                f"extract_{args.workers}_workers_s": round(par_s, 3),
+                "random_read_ms": round(1000 * random_reads(sources, args.reads, args.seed), 3),
+            }
+
+    loose, packed = results["loose"], results["packed"]
+    results["disk_ratio"] = round(loose["allocated_mb"] / packed["allocated_mb"], 1)
+    results["extract_1_worker_speedup"] = round(loose["extract_1_worker_s"] / packed["extract_1_worker_s"], 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
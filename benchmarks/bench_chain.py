@@ -0,0 +1,145 @@
+"""Benchmark the xG chain / buildup engine on millions of synthetic on-ball events.
+
+Draws --matches matches of ~1500 on-ball events each: possessions alternate
+between the sides, most touches belong to the side in possession, and some
+possessions end in a shot with the key pass right before it. It times
+xg_chain.chain_tables on the whole stream, then checks the first
+--check_matches matches against a straightforward per-possession pandas
+loop (timed too).
+
+    python benchmarks/bench_chain.py --matches 3800 --check_matches 100
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pyarrow as pa  # noqa: E402
+import pyarrow.compute as pc  # noqa: E402
+
+from eplxg.transform import xg_chain  # noqa: E402
+from eplxg.transform.extract_events import EVENTS_SCHEMA  # noqa: E402
+
+EVENTS_PER_MATCH = 1500
+KINDS = ["Pass", "Ball Receipt*", "Carry", "Duel", "Ball Recovery", "Shot"]
+
+
+def names(codes, prefix):
+    values = np.unique(codes)
+    return pa.DictionaryArray.from_arrays(pa.array(np.searchsorted(values, codes), pa.int32()),
+                                          pa.array([f"{prefix} {v}" for v in values]))
+
+
+def events_table(rng, matches):
+    n = matches * EVENTS_PER_MATCH
+    match = np.repeat(np.arange(matches), EVENTS_PER_MATCH)
+    event_index = np.tile(np.arange(1, EVENTS_PER_MATCH + 1), matches)
+    # ~170 possessions a match, numbered from 1 in each
+    new = (rng.random(n) < 1 / 9) | (event_index == 1)
+    possession = np.cumsum(new)
+    possession -= np.repeat(possession[::EVENTS_PER_MATCH], EVENTS_PER_MATCH) - 1
+    home = rng.integers(0, 20, matches)
+    sides = np.stack([home, (home + rng.integers(1, 20, matches)) % 20], axis=1)[match]
+    attacking_side = possession % 2
+    side = np.where(rng.random(n) < 0.85, attacking_side, 1 - attacking_side)
+    team_id = sides[np.arange(n), side]
+    player_id = team_id * 100 + rng.integers(0, 14, n)
+    kind = rng.choice(len(KINDS) - 1, n, p=[0.35, 0.3, 0.2, 0.1, 0.05])
+    # Some possessions end in a shot by the side in possession, after a key pass
+    last = np.r_[new[1:], True]
+    shot = last & (side == attacking_side) & (rng.random(n) < 0.15)
+    kind[shot] = KINDS.index("Shot")
+    key_pass = np.r_[shot[1:] & ~new[1:], False] & ~shot & (side == attacking_side)
+    kind[key_pass] = KINDS.index("Pass")
+
+    season = match // 380
+    return pa.table({
+        "competition_id": pa.array(np.full(n, 2), pa.int64()),
+        "season_id": pa.array(1000 + season, pa.int64()),
+        "match_id": pa.array(season * 1000 + 1_000_000 + match, pa.int64()),
+        "possession": pa.array(possession, pa.int16()),
+        "event_index": pa.array(event_index, pa.int32()),
+        "team_id": pa.array(team_id, pa.int32()),
+        "team": names(team_id, "Team"),
+        "player_id": pa.array(player_id, pa.int32()),
+        "player": names(player_id, "Player"),
+        "type": pa.DictionaryArray.from_arrays(pa.array(kind, pa.int8()), pa.array(KINDS)),
+        "possession_team_id": pa.array(sides[np.arange(n), attacking_side], pa.int32()),
+        "key_pass": key_pass,
+    }).cast(EVENTS_SCHEMA)
+
+
+def shots_table(rng, events):
+    shots = events.filter(pc.equal(events["type"].cast(pa.string()), "Shot"))
+    return pa.table({"match_id": shots["match_id"], "event_index": shots["event_index"],
+                     "xg": pa.array(rng.beta(1.2, 8.0, shots.num_rows), pa.float32())})
+
+
+def reference(events, shots):
+    """Per-player xG chain / buildup, one possession at a time."""
+    ev = events.to_pandas()
+    xg = dict(zip(zip(shots["match_id"].to_pylist(), shots["event_index"].to_pylist()), shots["xg"].to_pylist()))
+    rows = {}
+    for (season, _, _), g in ev.groupby(["season_id", "match_id", "possession"], observed=True):
+        own = g[g["team_id"] == g["possession_team_id"]]
+        total = sum(xg.get((m, i), 0.0) for m, i, t in zip(own["match_id"], own["event_index"], own["type"])
+                    if t == "Shot")
+        for player, touches in own.groupby("player", observed=True):
+            buildup = ((touches["type"] != "Shot") & ~touches["key_pass"]).any()
+            r = rows.setdefault((season, player), [0, 0, 0.0, 0.0])
+            r[0] += 1
+            r[1] += total > 0
+            r[2] += total
+            r[3] += total * buildup
+    return pd.DataFrame([(s, p, *r) for (s, p), r in rows.items()],
+                        columns=["season_id", "player", *(name for name, _ in xg_chain.CHAIN_FIELDS)])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--matches", type=int, default=3800, help="1500 on-ball events each, 380 a season")
+    parser.add_argument("--check_matches", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    events = events_table(rng, args.matches)
+    shots = shots_table(rng, events)
+    start = time.perf_counter()
+    tables = xg_chain.chain_tables(events, shots)
+    engine_s = time.perf_counter() - start
+
+    subset = events.slice(0, args.check_matches * EVENTS_PER_MATCH)
+    start = time.perf_counter()
+    expected = reference(subset, shots)
+    loop_s = time.perf_counter() - start
+    start = time.perf_counter()
+    got = xg_chain.chain_tables(subset, shots)["player_chain_metrics"].to_pandas()
+    subset_s = time.perf_counter() - start
+    merged = expected.merge(got, on=["season_id", "player"], how="outer", suffixes=("_expected", ""))
+    if len(merged) != len(expected) or len(merged) != len(got):
+        raise AssertionError("Player-seasons differ from the per-possession loop")
+    for name, _ in xg_chain.CHAIN_FIELDS:
+        np.testing.assert_allclose(merged[name], merged[f"{name}_expected"], rtol=1e-6, err_msg=name)
+
+    print(json.dumps({
+        "events": events.num_rows,
+        "shots": shots.num_rows,
+        "engine_s": round(engine_s, 2),
+        "events_per_s": round(events.num_rows / engine_s),
+        "rows_out": {name: t.num_rows for name, t in tables.items()},
+        "check_events": subset.num_rows,
+        "check_loop_s": round(loop_s, 2),
+        "check_engine_s": round(subset_s, 3),
+        "matches_loop": True,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark comparative scoring: N registered models in one pass vs one scoring pass per model.
+
+Writes a synthetic gold features dataset and registers --models versions in
+a temporary registry (logistic regressions fit on different samples). Then
+it scores them two ways: write_scored once per version, and one write_scored
+with the others as compare models. Also checks that every xg_<version>
+column matches that version's own pass.
+
+    python benchmarks/bench_compare.py --rows 5000000 --models 4
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import numpy as np  # noqa: E402
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+
+from bench_score import features_table  # noqa: E402
+from eplxg import datasets  # noqa: E402
+from eplxg.model import registry  # noqa: E402
+from eplxg.model.linear import export_model  # noqa: E402
+from eplxg.model.score_shots import write_scored  # noqa: E402
+from eplxg.model.train_xg import FEATURE_COLS  # noqa: E402
+from eplxg.transform.features_shots import FEATURES_SCHEMA  # noqa: E402
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--models", type=int, default=4)
+    parser.add_argument("--seasons", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        features, root = tmp / "features", tmp / "registry"
+        chunk = 1_000_000
+        tables = (features_table(rng, min(chunk, args.rows - i), args.seasons) for i in range(0, args.rows, chunk))
+        datasets.write_dataset(tables, features, FEATURES_SCHEMA)
+
+        frame = datasets.read_frame(features, columns=FEATURE_COLS + ["is_goal"])
+        models = {}
+        for i in range(args.models):
+            sample = frame.sample(n=min(args.rows, 100_000), random_state=args.seed + i)
+            fit = LogisticRegression(max_iter=2000).fit(sample[FEATURE_COLS].astype(float), sample["is_goal"])
+            linear = export_model(fit, FEATURE_COLS, tmp / f"export_{i}.json")
+            version = registry.register(linear, {}, registry.frame_fingerprint(sample), root=root,
+                                        export_path=tmp / "active.json")
+            models[version] = registry.load_version(version, root)
+        del frame
+
+        separate_s = 0.0
+        for version, model in models.items():
+            _, s = timed(write_scored, model, features, tmp / f"scored_{version}")
+            separate_s += s
+        active, *others = models
+        compare = {v: models[v] for v in others}
+        n, one_pass_s = timed(write_scored, models[active], features, tmp / "scored_all", compare=compare)
+
+        combined = datasets.read_table(tmp / "scored_all")
+        for version in models:
+            own = datasets.read_table(tmp / f"scored_{version}", columns=["xg"])["xg"]
+            col = "xg" if version == active else registry.column(version)
+            if not combined[col].equals(own):
+                raise AssertionError(f"{col} differs from {version}'s own scoring pass")
+
+    print(json.dumps({
+        "rows": n,
+        "models": len(models),
+        "separate_passes_s": round(separate_s, 2),
+        "one_pass_s": round(one_pass_s, 2),
+        "speedup": round(separate_s / one_pass_s, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Benchmark the dashboard's player views: per-rerun pandas copies/sorts vs the pre-indexed data layer.
+
+Builds synthetic player and player-team tables (like aggregate_metrics'
+output for many seasons) and replays random interactions, each a team
+pick, sort metric, min shots, significance filter and name search. Each
+interaction runs both ways: the old app code (copy, filter, sort_values,
+str.contains) and IndexedTable views. It checks that both show the same rows
+in the same metric order, and reports the per-interaction time and the
+one-off index build time.
+
+    python benchmarks/bench_dashboard.py --players 50000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "app"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from data_layer import SORT_METRICS, IndexedTable, NameIndex, fmt_tables  # noqa: E402
+
+FIRST = ["Harry", "Jamie", "Riyad", "Sergio", "Olivier", "Diego", "Romelu", "Alexis", "Marko", "Sadio", "Dele",
+         "Christian", "Kevin", "Mesut", "Raheem", "Anthony", "Gylfi", "Odion", "Andre", "Troy"]
+LAST = ["Kane", "Vardy", "Mahrez", "Agüero", "Giroud", "Costa", "Lukaku", "Sánchez", "Arnautović", "Mané",
+        "Alli", "Eriksen", "De Bruyne", "Özil", "Sterling", "Martial", "Sigurdsson", "Ighalo", "Ayew", "Deeney"]
+
+
+def player_tables(rng, n, teams=40):
+    names = np.char.add(np.char.add(rng.choice(FIRST, n), " "), rng.choice(LAST, n))
+    names = np.char.add(names, np.char.add(" ", rng.integers(0, n // 10 + 1, n).astype(str)))
+    team = np.char.add("Team ", rng.integers(0, teams, n).astype(str))
+    shots = rng.integers(1, 200, n)
+    xg = shots * rng.uniform(0.05, 0.2, n)
+    goals = rng.binomial(shots, np.clip(xg / shots, 0, 1))
+    player_team = pd.DataFrame({
+        "competition_id": 2, "season_id": 27, "team": team, "player": names, "shots": shots, "goals": goals,
+        "xg": xg, "goal_minus_xg": goals - xg, "p_value": rng.uniform(0, 1, n),
+    })
+    player = player_team.drop(columns="team").drop_duplicates("player").reset_index(drop=True)
+    return player, player_team
+
+
+def interactions(rng, player_team, n):
+    teams = sorted(player_team["team"].unique())
+    names = player_team["player"].tolist()
+    for _ in range(n):
+        name = names[rng.randrange(len(names))].lower()
+        start = rng.randrange(len(name))
+        yield {
+            "team": rng.choice(["All teams"] * 3 + teams),
+            "metric": rng.choice(SORT_METRICS),
+            "min_shots": rng.choice([10, 30, 60, 150]),
+            "significant_only": rng.random() < 0.3,
+            "search": rng.choice(["", "", name[start:start + rng.randint(1, 6)]]),
+            "ascending": rng.random() < 0.5,
+        }
+
+
+def old_view(player_df, player_team_df, q):
+    # What app.py did on every rerun
+    if q["team"] != "All teams":
+        base = player_team_df[player_team_df["team"] == q["team"]].copy()
+    else:
+        base = player_df.copy()
+    base = base[base["shots"] >= q["min_shots"]].copy()
+    if q["significant_only"]:
+        base = base[base["p_value"] < 0.05].copy()
+    if q["search"].strip():
+        base = base[base["player"].str.contains(q["search"].strip(), case=False, na=False, regex=False)].copy()
+    table = fmt_tables(base.sort_values(q["metric"], ascending=False).reset_index(drop=True))
+    ranked = base.sort_values("goal_minus_xg", ascending=q["ascending"]).reset_index(drop=True)
+    return table, fmt_tables(ranked.head(10))  # the chart showed rounded values too
+
+
+def new_view(player, player_team, q):
+    if q["team"] != "All teams":
+        table, group = player_team, q["team"]
+    else:
+        table, group = player, None
+    mask = table.filter_mask(q["min_shots"], q["significant_only"], q["search"])
+    return (table.view(q["metric"], group=group, mask=mask),
+            table.view("goal_minus_xg", ascending=q["ascending"], group=group, mask=mask, limit=10))
+
+
+def same_rows(old, new, metric):
+    # Ties may come out in either order: compare the metric sequence and the set of rows
+    key = ["player", "team"] if "team" in old.columns else ["player"]
+    if not np.allclose(old[metric].to_numpy(float), new[metric].to_numpy(float)):
+        return False
+    return sorted(map(tuple, old[key].to_numpy())) == sorted(map(tuple, new[key].to_numpy()))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=50_000, help="Player-team rows")
+    parser.add_argument("--interactions", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    player_df, player_team_df = player_tables(np.random.default_rng(args.seed), args.players)
+    queries = list(interactions(random.Random(args.seed), player_team_df, args.interactions))
+
+    start = time.perf_counter()
+    names = NameIndex(pd.concat([player_df["player"], player_team_df["player"]]))
+    player = IndexedTable(player_df, names=names)
+    player_team = IndexedTable(player_team_df, group="team", names=names)
+    build_s = time.perf_counter() - start
+
+    old_s = new_s = 0.0
+    for q in queries:
+        start = time.perf_counter()
+        old = old_view(player_df, player_team_df, q)
+        old_s += time.perf_counter() - start
+        start = time.perf_counter()
+        new = new_view(player, player_team, q)
+        new_s += time.perf_counter() - start
+        if not (same_rows(old[0], new[0], q["metric"]) and same_rows(old[1], new[1], "goal_minus_xg")):
+            raise AssertionError(f"Views differ for {q}")
+
+    print(json.dumps({
+        "player_rows": len(player_df),
+        "player_team_rows": len(player_team_df),
+        "interactions": len(queries),
+        "index_build_s": round(build_s, 3),
+        "pandas_ms_per_interaction": round(1000 * old_s / len(queries), 2),
+        "indexed_ms_per_interaction": round(1000 * new_s / len(queries), 2),
+        "speedup": round(old_s / new_s, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
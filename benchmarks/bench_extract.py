@@ -0,0 +1,70 @@
+"""Benchmark shot extraction: legacy json.load loop vs the streaming/process-pool engine.
+
+Timings only; tests/test_extract_shots.py checks both give the same shots.
+
+    python benchmarks/bench_extract.py --seasons 3 --matches 60
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import pandas as pd  # noqa: E402
+
+from eplxg.transform import extract_shots  # noqa: E402
+from synthetic import generate_bronze  # noqa: E402
+
+
+def legacy_extract(files, out_path):
+    rows = []
+    for file in files:
+        rows.extend(extract_shots.extract_file_full(file))
+    pd.DataFrame(rows).to_parquet(out_path, index=False)
+    return len(rows)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seasons", type=int, default=3)
+    parser.add_argument("--matches", type=int, default=60, help="Matches per season")
+    parser.add_argument("--events", type=int, default=3500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        generate_bronze(tmp / "bronze", args.seasons, args.matches, args.events)
+        files = sorted((tmp / "bronze" / "events").glob("*.json"))
+        match_seasons, _ = extract_shots.load_match_seasons(tmp / "bronze")
+        mb = sum(f.stat().st_size for f in files) / 1e6
+        print(f"{len(files)} match files, {mb:.0f} MB")
+
+        n_legacy, t_legacy = timed(legacy_extract, files, tmp / "legacy.parquet")
+        n_seq, t_seq = timed(extract_shots.write_shots, files, match_seasons, tmp / "seq", workers=1)
+        n_par, t_par = timed(extract_shots.write_shots, files, match_seasons, tmp / "par", workers=args.workers)
+
+        results = {
+            "files": len(files),
+            "shots": n_legacy,
+            "legacy_s": round(t_legacy, 3),
+            "prefilter_1_worker_s": round(t_seq, 3),
+            f"prefilter_{args.workers}_workers_s": round(t_par, 3),
+            "speedup": round(t_legacy / t_par, 2),
+        }
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark freeze-frame features: a per-shot loop over the scalar helpers vs the flat-array engine.
+
+Draws random freeze frames as an Arrow list column, shaped like silver's
+(6-22 players per shot, one opposing keeper). Also checks randomized
+equivalence between frame_features and freeze_frame_features to 1e-9,
+including missing and empty frames, players without a location, missing
+shot locations and frames with two or no keepers.
+
+    python benchmarks/bench_freeze_frame.py --shots 1000000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import numpy as np  # noqa: E402
+import pyarrow as pa  # noqa: E402
+
+from eplxg.transform import freeze_frame  # noqa: E402
+from eplxg.transform.extract_shots import FREEZE_FRAME  # noqa: E402
+
+
+def random_frames(rng, n, edge_cases=False):
+    """(frames, x, y) for n shots; frames is a FREEZE_FRAME array."""
+    x = rng.uniform(80.0, 120.0, n)
+    y = rng.uniform(15.0, 65.0, n)
+    counts = rng.integers(6, 23, n)
+    if edge_cases:
+        counts[rng.integers(0, n, n // 20)] = 0
+    offsets = np.r_[0, np.cumsum(counts)].astype(np.int32)
+    m = int(offsets[-1])
+    shot = np.repeat(np.arange(n), counts)
+    first = offsets[:-1][counts > 0]
+    px = np.clip(x[shot] + rng.normal(8.0, 8.0, m), 0.0, 120.0)
+    py = np.clip(y[shot] + rng.normal(0.0, 10.0, m), 0.0, 80.0)
+    teammate = rng.random(m) < 0.4
+    position = rng.integers(2, 26, m).astype(np.int8)
+    # The first player of each frame is the opposing keeper, near the goal
+    px[first], py[first] = rng.uniform(112.0, 120.0, len(first)), rng.uniform(34.0, 46.0, len(first))
+    teammate[first], position[first] = False, freeze_frame.GOALKEEPER
+    masks = {}
+    if edge_cases:
+        x[rng.integers(0, n, n // 50)] = np.nan
+        masks["x"] = rng.random(m) < 0.02
+        position[rng.integers(0, m, m // 50)] = freeze_frame.GOALKEEPER  # second keepers, own keepers
+    players = pa.StructArray.from_arrays(
+        [pa.array(px.astype(np.float32), mask=masks.get("x")), pa.array(py.astype(np.float32)),
+         pa.array(teammate), pa.array(position)], names=["x", "y", "teammate", "position_id"])
+    frames = pa.ListArray.from_arrays(pa.array(offsets), players)
+    if edge_cases:
+        missing = np.zeros(n, dtype=bool)
+        missing[rng.integers(0, n, n // 20)] = True
+        frames = pa.ListArray.from_arrays(pa.array(offsets), players, mask=pa.array(missing))
+    return frames.cast(FREEZE_FRAME), x, y
+
+
+def scalar_features(frames, x, y):
+    rows = [freeze_frame.frame_features(a, b, f) for a, b, f in zip(x.tolist(), y.tolist(), frames.to_pylist())]
+    return {k: np.array([r[k] for r in rows], dtype=np.float64) for k in freeze_frame.FRAME_FEATURES}
+
+
+def check_equivalence(seed, n=20_000):
+    rng = np.random.default_rng(seed)
+    frames, x, y = random_frames(rng, n, edge_cases=True)
+    expected = scalar_features(frames, x, y)
+    got = freeze_frame.freeze_frame_features(frames, x, y)
+    for name in freeze_frame.FRAME_FEATURES:
+        np.testing.assert_allclose(got[name], expected[name], rtol=0, atol=1e-9, equal_nan=True, err_msg=name)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shots", type=int, default=1_000_000)
+    parser.add_argument("--loop_shots", type=int, default=100_000, help="Shots timed through the scalar loop")
+    parser.add_argument("--seeds", type=int, default=5, help="Randomized equivalence rounds")
+    args = parser.parse_args()
+
+    for seed in range(args.seeds):
+        check_equivalence(seed)
+
+    rng = np.random.default_rng(42)
+    frames, x, y = random_frames(rng, args.shots)
+
+    start = time.perf_counter()
+    freeze_frame.freeze_frame_features(frames, x, y)
+    t_vec = time.perf_counter() - start
+
+    k = min(args.loop_shots, args.shots)
+    start = time.perf_counter()
+    scalar_features(frames.slice(0, k), x[:k], y[:k])
+    t_loop = (time.perf_counter() - start) * args.shots / k
+
+    print(json.dumps({
+        "shots": args.shots,
+        "players": len(frames.values),
+        "equivalence_rounds": args.seeds,
+        "loop_s_extrapolated": round(t_loop, 2),
+        "vectorized_s": round(t_vec, 3),
+        "players_per_s": round(len(frames.values) / t_vec),
+        "speedup": round(t_loop / t_vec, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark shot geometry: row-wise df.apply over the scalar helpers vs NumPy arrays.
+
+Timings only; tests/test_geometry.py checks the two agree.
+
+    python benchmarks/bench_geometry.py --rows 1000000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from eplxg.transform import geometry  # noqa: E402
+
+
+def random_locations(rng, n):
+    x = rng.uniform(0.0, 120.0, n)
+    y = rng.uniform(0.0, 80.0, n)
+    # Edge cases: missing coordinates, shots on the posts and on the goal line
+    k = max(n // 50, 1)
+    x[rng.integers(0, n, k)] = np.nan
+    y[rng.integers(0, n, k)] = np.nan
+    idx = rng.integers(0, n, k)
+    x[idx] = geometry.GOAL_X
+    y[idx] = rng.choice([geometry.LEFT_POST_Y, geometry.RIGHT_POST_Y, geometry.GOAL_Y, 0.0, 80.0], k)
+    return x, y
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    x, y = random_locations(rng, args.rows)
+    df = pd.DataFrame({"x": x, "y": y})
+
+    start = time.perf_counter()
+    df.apply(lambda r: geometry.shot_distance(r["x"], r["y"]), axis=1)
+    df.apply(lambda r: geometry.shot_angle(r["x"], r["y"]), axis=1)
+    t_apply = time.perf_counter() - start
+
+    start = time.perf_counter()
+    geometry.geometry_features(df["x"], df["y"])
+    t_vec = time.perf_counter() - start
+
+    print(json.dumps({
+        "rows": args.rows,
+        "apply_s": round(t_apply, 3),
+        "vectorized_s": round(t_vec, 4),
+        "speedup": round(t_apply / t_vec, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark shot heatmaps: raw shots in the chart vs precomputed tiles.
+
+Draws synthetic scored shots over --seasons seasons and builds every tile
+table (shot_heatmaps.build_heatmaps). It checks the tiles of each season and
+some teams and players against np.histogram2d, then compares what the
+dashboard would ship for one season: the Altair chart spec built from the
+raw shots vs from the tiles at each cell size (Altair refuses raw data past
+5000 rows unless told otherwise).
+
+    python benchmarks/bench_heatmaps.py --shots 2000000 --seasons 20
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import altair as alt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from eplxg.transform import shot_heatmaps  # noqa: E402
+
+
+def scored_shots(rng, n, seasons):
+    x = np.clip(rng.normal(104.0, 9.0, n), 0.0, 120.0)
+    y = np.clip(rng.normal(40.0, 11.0, n), 0.0, 80.0)
+    x[rng.integers(0, n, n // 500)] = np.nan  # shots without a location
+    xg = rng.beta(1.2, 8.0, n)
+    team = rng.integers(0, 20, n)
+    return pd.DataFrame({
+        "competition_id": 2, "season_id": 1000 + rng.integers(0, seasons, n),
+        "team": pd.Categorical(np.char.add("Team ", team.astype(str))),
+        "player": pd.Categorical(np.char.add(np.char.add("Player ", team.astype(str)),
+                                             np.char.add("-", rng.integers(0, 25, n).astype(str)))),
+        "x": x.astype(np.float32), "y": y.astype(np.float32), "xg": xg.astype(np.float32),
+        "is_goal": rng.random(n) < xg,
+    })
+
+
+def check_grid(shots, tiles, cell):
+    """The tiles of one group at one cell size match np.histogram2d of its shots."""
+    ncols, nrows = shot_heatmaps.grid_shape(cell)
+    # Clip like bin_shots: shots on the far touchline or goal line land in the edge cells
+    x = np.minimum(shots["x"].to_numpy(np.float64), 120.0 - 1e-9)
+    y = np.minimum(shots["y"].to_numpy(np.float64), 80.0 - 1e-9)
+    edges = (np.arange(ncols + 1) * cell, np.arange(nrows + 1) * cell)
+    for col, weights in (("shots", None), ("goals", shots["is_goal"].to_numpy(float)),
+                         ("xg", shots["xg"].to_numpy(float))):
+        expected, _, _ = np.histogram2d(x, y, bins=edges, weights=weights)
+        got = np.zeros((ncols, nrows))
+        got[tiles["col"].to_numpy(), tiles["row"].to_numpy()] = tiles[col].to_numpy(float)
+        np.testing.assert_allclose(got, expected, rtol=1e-5, atol=1e-4, err_msg=f"{col} at {cell} yards")
+
+
+def spec_bytes(df, x, y):
+    # Altair refuses more than 5000 inline rows by default; lift it to measure the raw payload
+    with alt.data_transformers.disable_max_rows():
+            return len(alt.Chart(df).mark_rect().encode(x=x, y=y).to_json())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shots", type=int, default=2_000_000)
+    parser.add_argument("--seasons", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    df = scored_shots(np.random.default_rng(args.seed), args.shots, args.seasons)
+    start = time.perf_counter()
+    tables = shot_heatmaps.build_heatmaps(df)
+    build_s = time.perf_counter() - start
+
+    tiles = {scope: t.to_pandas() for scope, t in tables.items()}
+    season = df[df["season_id"] == 1000]
+    for cell in shot_heatmaps.CELLS:
+        check_grid(season, tiles["season"].query("season_id == 1000 and cell == @cell"), cell)
+        for scope, key in (("team", "Team 3"), ("player", "Player 7-11")):
+            t = tiles[scope]
+            check_grid(season[season[scope] == key],
+                       t[(t["season_id"] == 1000) & (t["cell"] == cell) & (t[scope] == key)], cell)
+
+    raw = season[["x", "y", "xg", "is_goal"]]
+    payload = {"raw_shots": spec_bytes(raw, "x:Q", "y:Q")}
+    for cell in shot_heatmaps.CELLS:
+        t = tiles["season"].query("season_id == 1000 and cell == @cell")
+        payload[f"tiles_{cell}yd"] = spec_bytes(t[["col", "row", "shots", "goals", "xg", "goal_minus_xg"]],
+                                                "col:O", "row:O")
+
+    print(json.dumps({
+        "shots": args.shots,
+        "seasons": args.seasons,
+        "build_s": round(build_s, 2),
+        "shots_per_s": round(args.shots / build_s),
+        "tile_rows": {scope: t.num_rows for scope, t in tables.items()},
+        "season_shots": len(season),
+        "chart_spec_kb": {k: round(v / 1e3, 1) for k, v in payload.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
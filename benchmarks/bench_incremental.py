@@ -0,0 +1,76 @@
+"""Benchmark incremental aggregation: folding in one matchweek vs re-aggregating everything.
+
+Writes a synthetic scored dataset (like bench_aggregate's) without the last
+matchweek of the last season and aggregates it in full, which also saves
+the per-match partial state. Then the held-back matches are scored in and
+aggregate_metrics.update_metrics folds them into the tables. Finally a full
+re-aggregation of all the data is timed for comparison. Timings only;
+tests/test_aggregate_metrics.py checks the update against a full recompute.
+
+    python benchmarks/bench_incremental.py --rows 1000000 --seasons 100
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import numpy as np  # noqa: E402
+import pyarrow.compute as pc  # noqa: E402
+
+from bench_aggregate import scored_table  # noqa: E402
+from eplxg import datasets  # noqa: E402
+from eplxg.config import GOLD_SCORED  # noqa: E402
+from eplxg.transform import aggregate_metrics  # noqa: E402
+
+MATCHWEEK = 10  # matches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seasons", type=int, default=100, help="380 matches each")
+    parser.add_argument("--sims", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    table = scored_table(np.random.default_rng(args.seed), args.rows, args.seasons)
+    last_season = 1000 + args.seasons - 1
+    # The last matchweek of the last season arrives after the first full run
+    new = pc.and_(pc.equal(table["season_id"], last_season),
+                  pc.greater_equal(pc.subtract(table["match_id"], last_season * 1000), 380 - MATCHWEEK))
+    new_ids = set(table.filter(new)["match_id"].to_pylist())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # every gold path is relative to the working directory
+        datasets.write_dataset(table.filter(pc.invert(new)), GOLD_SCORED, table.schema)
+        aggregate_metrics.save_metrics(aggregate_metrics.aggregate_metrics(sims=args.sims, seed=args.seed))
+
+        datasets.replace_matches(GOLD_SCORED, table.filter(new), new_ids)
+        start = time.perf_counter()
+        _, summary = aggregate_metrics.update_metrics()
+        update_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        aggregate_metrics.save_metrics(aggregate_metrics.aggregate_metrics(sims=args.sims, seed=args.seed))
+        full_s = time.perf_counter() - start
+
+    print(json.dumps({
+        "rows": args.rows,
+        "seasons": args.seasons,
+        "sims": args.sims,
+        "new_matches": summary["added"],
+        "new_shots": summary["shots_read"],
+        "full_s": round(full_s, 2),
+        "update_s": round(update_s, 2),
+        "speedup": round(full_s / update_s, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
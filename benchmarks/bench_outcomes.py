@@ -0,0 +1,88 @@
+"""Benchmark match outcome probabilities: batched Poisson-binomial DP vs a per-match loop.
+
+Draws synthetic matches (shots per side and xG per shot shaped like real
+data) and times the batched pass against one np.convolve chain per side.
+Timings only; tests/test_match_outcomes.py checks the probabilities against
+brute-force enumeration.
+
+    python benchmarks/bench_outcomes.py --seasons 50
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import numpy as np  # noqa: E402
+
+from eplxg.transform.match_outcomes import goal_pmfs, outcome_probs  # noqa: E402
+
+MATCHES_PER_SEASON = 380
+
+
+def synthetic_shots(rng, n_matches, shots_per_side=12.5):
+    """(xg, side) for n_matches; side 2i is match i's home team, 2i + 1 its away team."""
+    counts = rng.poisson(shots_per_side, 2 * n_matches)
+    side = np.repeat(np.arange(2 * n_matches), counts)
+    rng.shuffle(side)
+    return rng.beta(1.2, 9.0, len(side)), side
+
+
+def per_match(xg, side, n_sides):
+    """The straightforward version: one convolution chain per side, then per match."""
+    order = np.argsort(side, kind="stable")
+    bounds = np.searchsorted(side[order], np.arange(n_sides + 1))
+    pmfs = []
+    for s in range(n_sides):
+        pmf = np.ones(1)
+        for p in xg[order[bounds[s]:bounds[s + 1]]]:
+            pmf = np.convolve(pmf, [1 - p, p])
+        pmfs.append(pmf)
+    out = []
+    for home, away in zip(pmfs[0::2], pmfs[1::2]):
+        joint = np.outer(home, away)
+        out.append((np.tril(joint, -1).sum(), np.trace(joint), np.triu(joint, 1).sum()))
+    return np.array(out).T
+
+
+def timed(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seasons", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    # Every match of every season in one pass vs one at a time
+    n_matches = args.seasons * MATCHES_PER_SEASON
+    xg, side = synthetic_shots(rng, n_matches)
+
+    def batched():
+        pmf = goal_pmfs(xg, side, 2 * n_matches)
+        return np.stack(outcome_probs(pmf[0::2], pmf[1::2]))
+
+    _, batched_s = timed(batched)
+    _, loop_s = timed(per_match, xg, side, 2 * n_matches, repeat=1)
+
+    print(json.dumps({
+        "matches": n_matches,
+        "shots": len(xg),
+        "batched_s": round(batched_s, 4),
+        "per_match_loop_s": round(loop_s, 3),
+        "speedup": round(loop_s / batched_s, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
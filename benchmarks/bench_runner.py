@@ -0,0 +1,107 @@
+"""Compare the in-process pipeline runner with the old subprocess-per-stage runner.
+
+Reports wall-clock time for each mode on synthetic bronze data, plus the
+`-X importtime` cost each stage pays when it starts its own interpreter.
+
+    python benchmarks/bench_runner.py --matches 120
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+from eplxg import pipeline  # noqa: E402
+from synthetic import generate_bronze  # noqa: E402
+
+STAGE_SCRIPTS = [
+    "transform/extract_shots.py",
+    "transform/features_shots.py",
+    "model/train_xg.py",
+    "model/score_shots.py",
+    "transform/aggregate_metrics.py",
+]
+STAGE_MODULES = [
+    "eplxg.transform.extract_shots",
+    "eplxg.transform.features_shots",
+    "eplxg.model.train_xg",
+    "eplxg.model.score_shots",
+    "eplxg.transform.aggregate_metrics",
+]
+
+
+def import_time_ms(modules):
+    """Top-level cumulative import time of `modules` in a fresh interpreter, from -X importtime."""
+    code = "; ".join(f"import {m}" for m in modules)
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, env=env, check=True)
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if len(name) - len(name.lstrip()) == 1:  # top-level import
+            total_us += int(cumulative)
+    return total_us / 1000
+
+
+def run_subprocess_pipeline():
+    for script in STAGE_SCRIPTS:
+        subprocess.run([sys.executable, str(SRC / "eplxg" / script)], check=True, stdout=subprocess.DEVNULL)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--matches", type=int, default=120, help="Matches per season")
+    parser.add_argument("--events", type=int, default=3500)
+    args = parser.parse_args()
+
+    per_stage = {m.rsplit(".", 1)[1]: round(import_time_ms([m]), 1) for m in STAGE_MODULES}
+    results = {
+        "import_ms_per_stage": per_stage,
+        "import_ms_subprocess_total": round(sum(per_stage.values()), 1),
+        "import_ms_in_process": round(import_time_ms(STAGE_MODULES), 1),
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            generate_bronze(Path("data/bronze/statsbomb"), args.seasons, args.matches, args.events)
+            with open(os.devnull, "w") as devnull:
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    t_sub = timed(run_subprocess_pipeline)
+                    t_mat = timed(pipeline.run, forced=["all"], skip=["ingest"])
+                    t_mem = timed(pipeline.run, skip=["ingest"], materialize=False)
+                finally:
+                    sys.stdout = stdout
+        finally:
+            os.chdir(cwd)
+
+    results.update({
+        "matches": args.seasons * args.matches,
+        "subprocess_runner_s": round(t_sub, 2),
+        "in_process_materialized_s": round(t_mat, 2),
+        "in_process_in_memory_s": round(t_mem, 2),
+    })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
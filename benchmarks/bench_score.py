@@ -0,0 +1,128 @@
+"""Benchmark scoring: pickled sklearn model on a loaded frame vs the exported NumPy scorer.
+
+Writes a synthetic gold features dataset, fits the logistic regression on a
+sample and exports it. Each scoring path runs in its own interpreter, so the
+report shows real startup cost (imports plus model load) and peak RSS.
+Timings only; tests/test_linear.py checks the exported scorer against
+sklearn's `predict_proba`.
+
+    python benchmarks/bench_score.py --rows 20000000
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+import joblib  # noqa: E402
+import numpy as np  # noqa: E402
+import pyarrow as pa  # noqa: E402
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+
+from eplxg import datasets  # noqa: E402
+from eplxg.model.linear import export_model  # noqa: E402
+from eplxg.model.train_xg import FEATURE_COLS  # noqa: E402
+from eplxg.transform.features_shots import FEATURES_SCHEMA  # noqa: E402
+
+STARTUP = {
+    "sklearn": "import joblib, sklearn.linear_model; joblib.load({pkl!r})",
+    "exported": "from eplxg.model.linear import load_model; load_model({export!r})",
+}
+SCORE = {
+    # The old score_shots: whole dataset in memory, pickled model
+    "sklearn": """
+import joblib, pyarrow as pa
+from eplxg import datasets
+from eplxg.model.score_shots import SCORED_SCHEMA
+from eplxg.model.train_xg import FEATURE_COLS
+df = datasets.read_frame({features!r})
+df["xg"] = joblib.load({pkl!r}).predict_proba(df[FEATURE_COLS].astype(float))[:, 1]
+datasets.write_dataset(pa.Table.from_pandas(df, schema=SCORED_SCHEMA, preserve_index=False), {out!r}, SCORED_SCHEMA)
+""",
+    "exported": """
+from eplxg.model.linear import load_model
+from eplxg.model.score_shots import write_scored
+write_scored(load_model({export!r}), {features!r}, {out!r})
+""",
+}
+# Peak RSS of the child itself; ru_maxrss would carry over the parent's high-water mark
+PEAK_RSS = "\nprint(next(l for l in open('/proc/self/status') if l.startswith('VmHWM')).split()[1])"
+
+
+def features_table(rng, n, seasons):
+    x = rng.uniform(60.0, 120.0, n)
+    y = rng.uniform(10.0, 70.0, n)
+    distance = np.hypot(120.0 - x, 40.0 - y)
+    angle = rng.uniform(0.0, 1.5, n)
+    is_header = rng.random(n) < 0.15
+    is_penalty = rng.random(n) < 0.01
+    p = 1.0 / (1.0 + np.exp(-(0.5 - 0.15 * distance + 0.8 * angle - 0.7 * is_header + 2.5 * is_penalty)))
+    season_id = 1000 + rng.integers(0, seasons, n)
+    team, player = rng.integers(0, 20, n), rng.integers(0, 500, n)
+    cols = {
+        "competition_id": np.full(n, 2), "season_id": season_id,
+        "match_id": season_id * 1000 + rng.integers(0, 380, n),
+        "team_id": team, "team": pa.array(np.char.add("Team ", team.astype(str))).dictionary_encode(),
+        "player_id": player, "player": pa.array(np.char.add("Player ", player.astype(str))).dictionary_encode(),
+        "minute": rng.integers(0, 96, n), "second": rng.integers(0, 60, n),
+        "event_index": rng.integers(1, 3500, n), "x": x, "y": y,
+        "outcome": pa.nulls(n, pa.string()), "body_part": pa.nulls(n, pa.string()),
+        "technique": pa.nulls(n, pa.string()), "play_pattern": pa.nulls(n, pa.string()),
+        "is_goal": rng.random(n) < p,
+        "distance": distance, "angle": angle, "is_header": is_header, "is_penalty": is_penalty,
+        "frame_players": rng.integers(6, 19, n), "defenders_in_cone": rng.integers(0, 4, n),
+        "nearest_defender": rng.uniform(0.5, 10.0, n), "gk_distance": 0.5 * distance,
+        "gk_angle_offset": rng.uniform(0.0, 0.5, n),
+    }
+    return pa.table(cols).cast(FEATURES_SCHEMA)
+
+
+def run_child(code):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code + PEAK_RSS], env={"PYTHONPATH": str(SRC)},
+                         check=True, capture_output=True, text=True).stdout
+    return time.perf_counter() - start, int(out.split()[-1]) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--seasons", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = {"features": str(tmp / "features"), "out": str(tmp / "scored"),
+                 "pkl": str(tmp / "model.joblib"), "export": str(tmp / "model.json")}
+
+        # Written a chunk at a time so the benchmark itself stays small
+        chunk = 1_000_000
+        tables = (features_table(rng, min(chunk, args.rows - i), args.seasons) for i in range(0, args.rows, chunk))
+        datasets.write_dataset(tables, paths["features"], FEATURES_SCHEMA)
+
+        sample = datasets.read_frame(paths["features"], columns=FEATURE_COLS + ["is_goal"]).sample(
+            n=min(args.rows, 200_000), random_state=args.seed)
+        model = LogisticRegression(max_iter=2000).fit(sample[FEATURE_COLS].astype(float), sample["is_goal"])
+        joblib.dump(model, paths["pkl"])
+        export_model(model, FEATURE_COLS, paths["export"])
+
+        results = {}
+        for name in ("sklearn", "exported"):
+            startup_s, _ = run_child(STARTUP[name].format(**paths))
+            score_s, peak_mb = run_child(SCORE[name].format(**paths))
+            results[name] = {"startup_s": round(startup_s, 3), "score_s": round(score_s, 2),
+                             "peak_rss_mb": round(peak_mb)}
+
+    print(json.dumps({"rows": args.rows, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Load-test the xG scoring service: latency percentiles and throughput.
+
+Starts `serve_xg.py` in its own process with a synthetic exported model,
+then drives it from client processes that each keep one HTTP connection
+open and send requests back to back. Every concurrency level runs with
+micro-batching on and off (--max_batch 1), so the report shows what
+coalescing concurrent requests buys.
+
+    python benchmarks/bench_serve.py --concurrency 1 8 32 --seconds 5
+"""
+import argparse
+import http.client
+import json
+import multiprocessing as mp
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+import numpy as np  # noqa: E402
+
+from eplxg.model.linear import LinearXG  # noqa: E402
+
+BODY_PARTS = ["Right Foot", "Left Foot", "Head", "Other"]
+TECHNIQUES = ["Normal", "Volley", "Half Volley", "Penalty"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def random_shots(rng, n):
+    return [{"x": float(rng.uniform(80, 120)), "y": float(rng.uniform(15, 65)),
+             "body_part": str(rng.choice(BODY_PARTS)), "technique": str(rng.choice(TECHNIQUES))}
+            for _ in range(n)]
+
+
+def client(port, seconds, shots_per_request, seed):
+    rng = np.random.default_rng(seed)
+    bodies = [json.dumps(random_shots(rng, shots_per_request) if shots_per_request > 1 else random_shots(rng, 1)[0])
+              for _ in range(64)]
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    latencies = []
+    end = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        conn.request("POST", "/score", body=bodies[i % len(bodies)], headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        latencies.append(time.perf_counter() - start)
+        i += 1
+    conn.close()
+    return latencies
+
+
+def wait_ready(port, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("service did not start")
+
+
+def run_level(model_path, concurrency, seconds, shots_per_request, max_batch):
+    port = free_port()
+    server = subprocess.Popen([sys.executable, str(SRC / "eplxg" / "model" / "serve_xg.py"), "--model", model_path,
+                               "--port", str(port), "--max_batch", str(max_batch)], stdout=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        with mp.Pool(concurrency) as pool:
+            results = pool.starmap(client, [(port, seconds, shots_per_request, seed) for seed in range(concurrency)])
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        conn.request("GET", "/health")
+        health = json.loads(conn.getresponse().read())
+    finally:
+        server.terminate()
+        server.wait()
+    latencies = np.concatenate([np.asarray(r) for r in results]) * 1000
+    return {
+        "requests_per_s": round(len(latencies) / seconds),
+        "shots_per_s": round(len(latencies) * shots_per_request / seconds),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "mean_batch_shots": round(health["shots"] / max(health["batches"], 1), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--shots_per_request", type=int, default=1)
+    args = parser.parse_args()
+
+    model = LinearXG(["distance", "angle", "is_header", "is_penalty"], [-0.11, 1.1, -0.9, 2.2], -0.6)
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = str(Path(tmp) / "model.json")
+        Path(model_path).write_text(json.dumps(model.to_dict()))
+
+        report = {"shots_per_request": args.shots_per_request, "seconds": args.seconds, "levels": {}}
+        for concurrency in args.concurrency:
+            report["levels"][concurrency] = {
+                mode: run_level(model_path, concurrency, args.seconds, args.shots_per_request, max_batch)
+                for mode, max_batch in (("micro_batched", 4096), ("unbatched", 1))
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
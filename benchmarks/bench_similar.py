@@ -0,0 +1,117 @@
+"""Benchmark similar-shot queries: the KD-tree index vs a full scan of the shots.
+
+Draws synthetic scored shots (headers, penalties and open-play shots), builds
+similar_shots.ShotIndex over them, then times saving it, loading it and
+rebuilding it from scratch. It then answers batched k-nearest and radius
+queries for --queries of the shots. The first --check queries are compared
+against a brute-force scan of their stratum, which is also timed per query.
+
+    python benchmarks/bench_similar.py --shots 2000000 --queries 1000
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+import numpy as np  # noqa: E402
+import pyarrow as pa  # noqa: E402
+
+from eplxg.transform import similar_shots  # noqa: E402
+
+RADIUS = 2.0
+
+
+def scored_shots(rng, n, seasons):
+    penalty = rng.random(n) < 0.01
+    header = ~penalty & (rng.random(n) < 0.15)
+    x = np.where(penalty, 108.0, np.round(np.clip(rng.normal(104.0, 9.0, n), 60.0, 120.0), 1))
+    y = np.where(penalty, 40.0, np.round(np.clip(rng.normal(40.0, 11.0, n), 0.0, 80.0), 1))
+    xg = np.where(penalty, 0.76, rng.beta(1.2, 8.0, n))
+    return pa.table({
+        "competition_id": np.full(n, 2), "season_id": 1000 + rng.integers(0, seasons, n),
+        "match_id": rng.integers(0, 380 * seasons, n),
+        "team": pa.array(np.char.add("Team ", rng.integers(0, 20, n).astype(str))).dictionary_encode(),
+        "player": pa.array(np.char.add("Player ", rng.integers(0, 500, n).astype(str))).dictionary_encode(),
+        "minute": rng.integers(0, 95, n).astype(np.int16), "second": rng.integers(0, 60, n).astype(np.int8),
+        "x": x.astype(np.float32), "y": y.astype(np.float32),
+        "is_header": header, "is_penalty": penalty, "is_goal": rng.random(n) < xg, "xg": xg.astype(np.float32),
+    })
+
+
+def scan(index, row, k, radius):
+    """k nearest distances and the rows within radius of one indexed shot, scanning its whole stratum."""
+    q = index.features([row])
+    same = np.flatnonzero((similar_shots._flag(index.shots["is_header"]) == q["is_header"][0])
+                          & (similar_shots._flag(index.shots["is_penalty"]) == q["is_penalty"][0]))
+    same = same[same != row]
+    xyz = similar_shots.points(index.shots["x"].to_numpy()[same], index.shots["y"].to_numpy()[same])
+    d = np.sqrt(((xyz - similar_shots.points(q["x"], q["y"])) ** 2).sum(axis=1))
+    return np.sort(np.partition(d, min(k, len(d) - 1))[:k]), same[d <= radius]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shots", type=int, default=2_000_000)
+    parser.add_argument("--seasons", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--check", type=int, default=50, help="Queries checked against a full scan")
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    shots = scored_shots(rng, args.shots, args.seasons)
+    start = time.perf_counter()
+    index = similar_shots.ShotIndex.build(shots)
+    build_s = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        index.save(Path(tmp) / "shot_index")
+        save_s = time.perf_counter() - start
+        start = time.perf_counter()
+        index = similar_shots.ShotIndex.load(Path(tmp) / "shot_index")
+        load_s = time.perf_counter() - start
+
+    rows = rng.choice(len(index), args.queries, replace=False)
+    query = index.features(rows)
+    start = time.perf_counter()
+    knn = index.similar(**query, k=args.k, exclude=rows)
+    knn_ms = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    ball = index.similar(**query, radius=RADIUS, exclude=rows)
+    radius_ms = (time.perf_counter() - start) * 1e3
+    dist, _ = index.knn(**query, k=args.k, exclude=rows)
+    checked = rows[:args.check]
+    offsets, found = index.within(**index.features(checked), radius=RADIUS, exclude=checked)
+
+    start = time.perf_counter()
+    for j, row in enumerate(rows[:args.check]):
+        expected_d, expected_rows = scan(index, row, args.k, RADIUS)
+        np.testing.assert_allclose(dist[j, :len(expected_d)], expected_d, rtol=1e-9, atol=1e-9)
+        if not np.array_equal(np.sort(found[offsets[j]:offsets[j + 1]]), expected_rows):
+            raise AssertionError(f"query {j}: shots within {RADIUS} differ from the scan")
+        if (ball["neighbours"][j], ball["goals"][j]) != (len(expected_rows), index.is_goal[expected_rows].sum()):
+            raise AssertionError(f"query {j}: radius counts differ from the scan")
+    scan_ms = (time.perf_counter() - start) * 1e3 / max(min(args.check, len(rows)), 1)
+
+    print(json.dumps({
+        "shots": args.shots,
+        "build_s": round(build_s, 2),
+        "save_s": round(save_s, 2),
+        "load_s": round(load_s, 2),
+        "queries": len(rows),
+        "knn_ms": round(knn_ms, 1),
+        "radius_ms": round(radius_ms, 1),
+        "scan_ms_per_query": round(scan_ms, 1),
+        "median_neighbours_within_radius": int(ball["neighbours"].median()),
+        "matches_full_scan": True,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
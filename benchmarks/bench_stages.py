@@ -0,0 +1,164 @@
+"""Per-stage pipeline benchmark on synthetic data, with JSON results for diffing.
+
+Generates synthetic bronze data and serves it from a local stand-in for the
+open-data repo. It then runs every stage script the way a user would, each
+in a fresh interpreter inside a scratch workspace:
+
+    download_season -> extract_shots -> features_shots -> train_xg -> score_shots -> aggregate_metrics
+        -> match_outcomes -> shot_heatmaps -> similar_shots -> extract_events -> xg_chain
+
+Each stage records wall time (interpreter start included), peak RSS and the
+size of what it wrote. Results go to benchmarks/results/<commit>-<scale>.json.
+--compare prints per-stage ratios against an earlier result file.
+
+    python benchmarks/bench_stages.py --scale season
+    python benchmarks/bench_stages.py --seasons 2 --matches 40 --compare benchmarks/results/abc1234-custom.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src" / "eplxg"
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+from synthetic import SCALES, generate_bronze, serve_bronze  # noqa: E402
+
+# (stage, script, outputs measured for size) -- run in order in one workspace
+STAGES = [
+    ("download_season", "ingest/download_season.py", ["data/bronze"]),
+    ("extract_shots", "transform/extract_shots.py", ["data/silver"]),
+    ("features_shots", "transform/features_shots.py", ["data/gold/shots_features"]),
+    ("train_xg", "model/train_xg.py", ["models"]),
+    ("score_shots", "model/score_shots.py", ["data/gold/shots_scored"]),
+    ("aggregate_metrics", "transform/aggregate_metrics.py",
+     [f"data/gold/{name}" for name in ("team_metrics", "player_metrics", "player_team_metrics", "match_team_metrics",
+                                       "minute_metrics", "play_pattern_metrics", "minute_play_pattern_metrics")]),
+    ("match_outcomes", "transform/match_outcomes.py", ["data/gold/match_outcomes", "data/gold/xg_table"]),
+    ("shot_heatmaps", "transform/shot_heatmaps.py",
+     ["data/gold/heatmap_season", "data/gold/heatmap_team", "data/gold/heatmap_player"]),
+    ("similar_shots", "transform/similar_shots.py", ["data/gold/shot_index"]),
+    ("extract_events", "transform/extract_events.py", ["data/silver/events"]),
+    ("xg_chain", "transform/xg_chain.py", ["data/gold/player_chain_metrics", "data/gold/player_team_chain_metrics"]),
+]
+
+# Runs a stage script as __main__, then reports the interpreter's own peak RSS
+# (VmHWM; ru_maxrss would carry over this process's high-water mark)
+RUNNER = """
+import runpy, sys
+script, report = sys.argv[1], sys.argv[2]
+sys.argv = [script] + sys.argv[3:]
+try:
+    runpy.run_path(script, run_name="__main__")
+finally:
+    with open("/proc/self/status") as f:
+        peak_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+    with open(report, "w") as f:
+        f.write(str(peak_kb))
+"""
+
+
+def size_mb(paths):
+    total = 0
+    for path in map(Path, paths):
+        files = [path] if path.is_file() else path.rglob("*")
+        total += sum(f.stat().st_size for f in files if f.is_file())
+    return total / 1e6
+
+
+def run_stage(script, args, workspace):
+    report = Path(workspace) / ".peak_rss"
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", RUNNER, str(SRC / script), str(report), *args],
+                          cwd=workspace, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{script} failed:\n{proc.stdout[-2000:]}\n{proc.stderr[-2000:]}")
+    return wall, int(report.read_text()) / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current, baseline):
+    print(f"\nvs {baseline['commit']} ({baseline['timestamp']}):")
+    for stage, now in current["stages"].items():
+        before = baseline["stages"].get(stage)
+        if before is None:
+            print(f"  {stage:<18} (new)")
+            continue
+        print(f"  {stage:<18} wall {now['wall_s']:>8.2f}s x{now['wall_s'] / before['wall_s']:.2f}"
+              f"   peak {now['peak_rss_mb']:>7.0f}MB x{now['peak_rss_mb'] / before['peak_rss_mb']:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", choices=SCALES, default="season")
+    parser.add_argument("--seasons", type=int)
+    parser.add_argument("--competitions", type=int)
+    parser.add_argument("--matches", type=int, help="Matches per season")
+    parser.add_argument("--events", type=int, help="Events per match")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Data generation workers")
+    parser.add_argument("--out", type=Path, help="Result file (default: benchmarks/results/<commit>-<scale>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier result file to compare against")
+    args = parser.parse_args()
+    scale = {k: v if getattr(args, k) is None else getattr(args, k) for k, v in SCALES[args.scale].items()}
+    custom = scale != SCALES[args.scale]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        origin = Path(tmp) / "origin"
+        workspace = Path(tmp) / "workspace"
+        workspace.mkdir()
+
+        start = time.perf_counter()
+        pairs = generate_bronze(origin, scale["seasons"], scale["matches"], scale["events"], seed=args.seed,
+                                competitions=scale["competitions"], workers=args.workers)
+        generate_s = time.perf_counter() - start
+        server, base_url = serve_bronze(origin)
+
+        stage_args = {"download_season": ["--base_url", base_url]
+                      + [a for c, s in pairs for a in ("--season", f"{c}:{s}")]}
+        stages = {}
+        try:
+            for stage, script, outputs in STAGES:
+                wall, peak = run_stage(script, stage_args.get(stage, []), workspace)
+                stages[stage] = {"wall_s": round(wall, 3), "peak_rss_mb": round(peak, 1),
+                                 "output_mb": round(size_mb([workspace / p for p in outputs]), 2)}
+                print(f"{stage:<18} {wall:8.2f}s {peak:8.0f}MB", flush=True)
+        finally:
+            server.shutdown()
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "scale": {"preset": "custom" if custom else args.scale, **scale, "seed": args.seed},
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "generate_s": round(generate_s, 2),
+        "stages": stages,
+        "total_s": round(sum(s["wall_s"] for s in stages.values()), 3),
+    }
+    out = args.out or RESULTS_DIR / f"{result['commit']}-{result['scale']['preset']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2) + "\n")
+    print(f"✅ Results saved to {out}")
+
+    if args.compare:
+        compare(result, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Benchmark `eplxg` cold start: import time and wall time of the cheap commands.
+
+Runs each command in a fresh interpreter with `-X importtime` from a
+populated workspace (synthetic bronze run through the pipeline, or
+--workspace), so `status` hashes real files against a real manifest, then:
+
+- sums the import time of everything the program imported (after the
+  interpreter's own `site` setup)
+- lists any heavy module it pulled in (pandas, NumPy, pyarrow, scikit-learn,
+  SciPy, DuckDB, requests)
+- times the command against a bare `python -c pass`, keeping the best of --runs
+
+The cheap commands are help, status, competitions from a local file and
+the stages' --help. Timings only; tests/test_cli.py fails when one of them
+imports a heavy module.
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --workspace . --season 2:27
+"""
+import argparse
+import contextlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from synthetic import generate_bronze  # noqa: E402
+
+HEAVY = ["pandas", "numpy", "pyarrow", "sklearn", "scipy", "duckdb", "requests"]
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+COMPETITIONS = [{"competition_id": 2, "season_id": 27, "competition_name": "Premier League",
+                 "season_name": "2015/2016", "country_name": "England"}]
+
+
+def command(workspace, seasons):
+    # (name, eplxg arguments)
+    url = (Path(workspace) / "competitions.json").as_uri()
+    status = ["status", "--skip", "ingest"] + [a for s in seasons for a in ("--season", s)]
+    return [
+        ("help", ["--help"]),
+        ("status", status),
+        ("competitions", ["competitions", "--url", url, "--filter", "premier"]),
+    ] + [(f"{stage} --help", [stage, "--help"]) for stage in ("ingest", "extract", "train", "aggregate", "serve")]
+
+
+@contextlib.contextmanager
+def populated_workspace(matches, events):
+    """A scratch workspace with synthetic bronze data already run through the pipeline."""
+    with tempfile.TemporaryDirectory() as workspace:
+        pairs = generate_bronze(Path(workspace) / "data" / "bronze" / "statsbomb", seasons=2,
+                                matches_per_season=matches, events_per_match=events)
+        seasons = [f"{c}:{s}" for c, s in pairs]
+        subprocess.run([sys.executable, str(ROOT / "run_pipeline.py"), "--skip", "ingest", "--profile_depth", "0",
+                        *[a for s in seasons for a in ("--season", s)]],
+                       cwd=workspace, check=True, stdout=subprocess.DEVNULL)
+        yield workspace, seasons
+
+
+def run(args, workspace, importtime=False):
+    flags = ["-X", "importtime"] if importtime else []
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, *flags, *args], cwd=workspace, capture_output=True, text=True,
+                          env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{args} failed:\n{proc.stderr[-2000:]}")
+    return wall, proc.stderr
+
+
+def program_imports(stderr):
+    """(ms, module names) imported after the interpreter's site setup."""
+    lines = [IMPORT_LINE.match(line) for line in stderr.splitlines()]
+    lines = [m for m in lines if m]
+    site = max((i for i, m in enumerate(lines) if m.group(4) == "site" and not m.group(3)), default=-1)
+    after = lines[site + 1:]
+    top = sum(int(m.group(2)) for m in after if not m.group(3))  # cumulative time of top-level imports
+    return top / 1e3, [m.group(4) for m in after]
+
+
+def best_wall(args, workspace, runs):
+    return min(run(args, workspace)[0] for _ in range(runs)) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per command (the fastest counts)")
+    parser.add_argument("--workspace", type=Path, help="Measure in this workspace instead of a synthetic one")
+    parser.add_argument("--season", action="append", default=[], metavar="COMP:SEASON",
+                        help="With --workspace: the seasons `status` checks (repeatable)")
+    parser.add_argument("--matches", type=int, default=20, help="Synthetic matches per season")
+    parser.add_argument("--events", type=int, default=1000, help="Synthetic events per match")
+    args = parser.parse_args()
+
+    results = {}
+    if args.workspace:
+        workspace = contextlib.nullcontext((args.workspace.resolve(), args.season or ["2:27"]))
+    else:
+        workspace = populated_workspace(args.matches, args.events)
+    with workspace as (workspace, seasons), tempfile.TemporaryDirectory() as scratch:
+        (Path(scratch) / "competitions.json").write_text(json.dumps(COMPETITIONS))
+        bare_ms = best_wall(["-c", "pass"], workspace, args.runs)
+        for name, cli_args in command(scratch, seasons):
+            argv = [str(ROOT / "eplxg"), *cli_args]
+            _, stderr = run(argv, workspace, importtime=True)
+            import_ms, modules = program_imports(stderr)
+            heavy = sorted({m.split(".")[0] for m in modules} & set(HEAVY))
+            over_ms = best_wall(argv, workspace, args.runs) - bare_ms
+            results[name] = {"import_ms": round(import_ms, 1), "over_bare_ms": round(over_ms, 1), "heavy": heavy}
+
+    print(json.dumps({"bare_python_ms": round(bare_ms, 1), "commands": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark training: in-memory sklearn fit vs the streaming out-of-core trainer.
+
+Writes a synthetic gold features dataset (the generator from bench_score.py)
+and trains on it in fresh interpreters:
+
+- memory: train_xg.train_model on the whole frame (80/20 split)
+- stream: stream_xg.fit from scratch, then again warm-started from its state
+- update: a fit on every season but the last, then an update with only the last
+
+Reports wall time, peak RSS and Newton passes, and checks the streaming
+coefficients against sklearn fitted on the same training matches.
+
+    python benchmarks/bench_train.py --rows 20000000
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+import numpy as np  # noqa: E402
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+
+from bench_score import PEAK_RSS, features_table  # noqa: E402
+from eplxg import datasets  # noqa: E402
+from eplxg.model import stream_xg  # noqa: E402
+from eplxg.model.train_xg import FEATURE_COLS  # noqa: E402
+from eplxg.transform.features_shots import FEATURES_SCHEMA  # noqa: E402
+
+TRAIN = {
+    "memory": """
+from eplxg import datasets
+from eplxg.model.train_xg import FEATURE_COLS, train_model
+model, metrics = train_model(datasets.read_frame({features!r}, columns=FEATURE_COLS + ["is_goal"]))
+print(1)
+""",
+    "stream": """
+from eplxg.model import stream_xg
+from eplxg.model.train_xg import FEATURE_COLS
+state = stream_xg.load_state({state!r}) if {warm} else None
+model, metrics, state = stream_xg.fit({features!r}, FEATURE_COLS, warm_start=state)
+stream_xg.save_state(state, {state!r})
+print(metrics["training"]["passes"])
+""",
+    "update": """
+from eplxg.model import stream_xg
+from eplxg.model.train_xg import FEATURE_COLS
+model, metrics, state = stream_xg.update({features!r}, FEATURE_COLS, stream_xg.load_state({state!r}))
+stream_xg.save_state(state, {state!r})
+print(metrics["training"]["passes"])
+""",
+}
+
+
+def run_child(code):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code + PEAK_RSS], env={"PYTHONPATH": str(SRC)},
+                         check=True, capture_output=True, text=True).stdout.split()
+    return {"wall_s": round(time.perf_counter() - start, 2), "peak_rss_mb": round(int(out[-1]) / 1024),
+            "passes": int(out[-2])}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--seasons", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = {"features": str(tmp / "features"), "state": str(tmp / "state.json")}
+        chunk = 1_000_000
+        tables = (features_table(rng, min(chunk, args.rows - i), args.seasons) for i in range(0, args.rows, chunk))
+        datasets.write_dataset(tables, paths["features"], FEATURES_SCHEMA)
+
+        results = {"memory": run_child(TRAIN["memory"].format(**paths))}
+        results["stream"] = run_child(TRAIN["stream"].format(warm=False, **paths))
+        results["stream_warm"] = run_child(TRAIN["stream"].format(warm=True, **paths))
+
+        # sklearn on the same training matches as the streaming fit
+        df = datasets.read_frame(paths["features"], columns=FEATURE_COLS + ["is_goal", "match_id"])
+        train = df["match_id"] % stream_xg.VAL_EVERY != 0
+        reference = LogisticRegression(max_iter=5000, tol=1e-10).fit(df.loc[train, FEATURE_COLS].to_numpy(float),
+                                                                     df.loc[train, "is_goal"])
+        del df
+        state = stream_xg.load_state(paths["state"])
+        coef = np.r_[reference.intercept_, reference.coef_[0]]
+        max_coef_diff = float(np.abs(np.asarray(state["coef"]) - coef).max())
+
+        # Every season but the last, then the last one as an update
+        seasons = [(2, 1000 + s) for s in range(args.seasons - 1)]
+        _, _, partial = stream_xg.fit(paths["features"], FEATURE_COLS, seasons=seasons)
+        stream_xg.save_state(partial, paths["state"])
+        results["update_last_season"] = run_child(TRAIN["update"].format(**paths))
+        updated = stream_xg.load_state(paths["state"])
+        update_coef_diff = float(np.abs(np.asarray(updated["coef"]) - np.asarray(state["coef"])).max())
+
+    del results["memory"]["passes"]
+    print(json.dumps({"rows": args.rows, "max_coef_diff_vs_sklearn": max_coef_diff,
+                      "update_coef_diff_vs_full_fit": update_coef_diff, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Synthetic StatsBomb-style bronze events for benchmarks.
+
+Writes `matches_<comp>_<season>.json` plus one pretty-printed events file per
+match, laid out like `data/bronze/statsbomb`. Only the fields the pipeline
+reads are modelled faithfully; the rest is filler of realistic size.
+
+Each season is generated from its own seed, so seasons can be written in
+parallel and the output does not depend on the worker count. A real season
+is ~380 matches of ~3500 events (~1.8 GB of JSON); at the larger scales,
+lower --events to keep the data on disk.
+
+    python benchmarks/synthetic.py --out /tmp/bronze/statsbomb --scale 50-seasons --workers 8
+
+serve_bronze() exposes a generated tree under the open-data URL layout, as
+a local stand-in for download_season.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+EVENT_TYPES = [
+    # (id, name, weight)
+    (30, "Pass", 0.30),
+    (42, "Ball Receipt*", 0.28),
+    (43, "Carry", 0.22),
+    (17, "Pressure", 0.09),
+    (2, "Ball Recovery", 0.03),
+    (4, "Duel", 0.02),
+    (6, "Block", 0.02),
+    (10, "Interception", 0.01),
+    (9, "Clearance", 0.02),
+    (38, "Miscontrol", 0.01),
+    (14, "Dribble", 0.01),
+    (22, "Foul Committed", 0.01),
+]
+SHOT_TYPE = (16, "Shot")
+
+PLAY_PATTERNS = [(1, "Regular Play"), (2, "From Corner"), (3, "From Free Kick"),
+                 (4, "From Throw In"), (6, "From Counter"), (7, "From Goal Kick")]
+BODY_PARTS = [(40, "Right Foot", 0.55), (38, "Left Foot", 0.30), (37, "Head", 0.14), (70, "Other", 0.01)]
+TECHNIQUES = [(93, "Normal", 0.80), (95, "Volley", 0.08), (94, "Half Volley", 0.10), (91, "Lob", 0.02)]
+OUTCOMES = [(96, "Blocked"), (98, "Off T"), (100, "Saved"), (101, "Wayward"), (99, "Post")]
+GOAL = (97, "Goal")
+PENALTY = (88, "Penalty")
+
+SHOTS_PER_MATCH = 26  # mean; each match draws its own count
+
+# --scale presets: seasons, competitions, matches per season, events per match
+SCALES = {
+    "season": {"seasons": 1, "competitions": 1, "matches": 380, "events": 3500},
+    "50-seasons": {"seasons": 50, "competitions": 5, "matches": 380, "events": 3500},
+    "1000-seasons": {"seasons": 1000, "competitions": 20, "matches": 380, "events": 3500},
+}
+
+
+def _pick(rng, options):
+    return rng.choices(options, weights=[o[-1] for o in options])[0][:2]
+
+
+def _ref(pair):
+    return {"id": pair[0], "name": pair[1]}
+
+
+def make_teams(rng, n_teams, season_id):
+    teams = []
+    for t in range(n_teams):
+        team_id = 1000 + t
+        players = [{"id": team_id * 100 + p, "name": f"Player {team_id}-{p}"} for p in range(25)]
+        teams.append({"id": team_id, "name": f"Team {t:02d}", "players": players})
+    return teams
+
+
+def shot_event(rng, base):
+    penalty = rng.random() < 0.02
+    if penalty:
+        x, y = 108.0, 40.0
+    else:
+        x = round(min(119.9, 120 - abs(rng.gauss(0, 12)) - 2), 1)
+        y = round(min(79.9, max(0.1, rng.gauss(40, 10))), 1)
+    dist = ((120 - x) ** 2 + (40 - y) ** 2) ** 0.5
+    p_goal = 0.76 if penalty else max(0.02, 0.45 - dist * 0.018)
+    outcome = GOAL if rng.random() < p_goal else rng.choice(OUTCOMES)
+
+    base["location"] = [x, y]
+    base["duration"] = round(rng.uniform(0.1, 1.5), 6)
+    base["shot"] = {
+        "statsbomb_xg": round(p_goal, 8),
+        "end_location": [120.0, round(rng.uniform(35, 45), 1), round(rng.uniform(0, 3), 1)],
+        "key_pass_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "type": _ref(PENALTY if penalty else (87, "Open Play")),
+        "outcome": _ref(outcome),
+        "technique": _ref(_pick(rng, TECHNIQUES)),
+        "body_part": _ref((40, "Right Foot") if penalty else _pick(rng, BODY_PARTS)),
+        "freeze_frame": [
+            {
+                "location": [round(rng.uniform(x - 10, 120), 1), round(rng.uniform(25, 55), 1)],
+                "player": {"id": rng.randint(1, 99999), "name": "Frame Player"},
+                "position": {"id": 1 if k == 0 else rng.randint(2, 25), "name": "Position"},
+                "teammate": k > 8,
+            }
+            for k in range(rng.randint(6, 18))
+        ],
+    }
+    return base
+
+
+def filler_event(rng, base, type_pair):
+    base["location"] = [round(rng.uniform(0.1, 119.9), 1), round(rng.uniform(0.1, 79.9), 1)]
+    base["duration"] = round(rng.uniform(0.0, 3.0), 6)
+    if type_pair[1] == "Pass":
+        base["pass"] = {
+            "recipient": {"id": rng.randint(1, 99999), "name": "Recipient"},
+            "length": round(rng.uniform(2, 60), 6),
+            "angle": round(rng.uniform(-3.14, 3.14), 6),
+            "height": {"id": 1, "name": "Ground Pass"},
+            "end_location": [round(rng.uniform(0.1, 119.9), 1), round(rng.uniform(0.1, 79.9), 1)],
+            "body_part": _ref(_pick(rng, BODY_PARTS)),
+        }
+    elif type_pair[1] == "Carry":
+        base["carry"] = {"end_location": [round(rng.uniform(0.1, 119.9), 1), round(rng.uniform(0.1, 79.9), 1)]}
+    return base
+
+
+def match_events(rng, match_id, home, away, n_events):
+    n_shots = max(4, round(rng.gauss(SHOTS_PER_MATCH, 6)))
+    shot_at = set(rng.sample(range(n_events), min(n_shots, n_events)))
+    events = []
+    possession = 1
+    for idx in range(n_events):
+        team = home if rng.random() < 0.5 else away
+        player = rng.choice(team["players"])
+        if rng.random() < 0.02:
+            possession += 1
+        period = 1 if idx < n_events // 2 else 2
+        elapsed = idx * 5400 / n_events
+        minute, second = int(elapsed // 60), int(elapsed % 60)
+        type_pair = SHOT_TYPE if idx in shot_at else _pick(rng, EVENT_TYPES)
+        base = {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "index": idx + 1,
+            "period": period,
+            "timestamp": f"00:{minute % 45:02d}:{second:02d}.000",
+            "minute": minute,
+            "second": second,
+            "type": _ref(type_pair),
+            "possession": possession,
+            "possession_team": {"id": team["id"], "name": team["name"]},
+            "play_pattern": _ref(rng.choice(PLAY_PATTERNS)),
+            "team": {"id": team["id"], "name": team["name"]},
+            "player": player,
+            "position": {"id": rng.randint(1, 25), "name": "Position"},
+            "related_events": [str(uuid.UUID(int=rng.getrandbits(128)))],
+            "match_id": match_id,
+        }
+        if type_pair == SHOT_TYPE:
+            events.append(shot_event(rng, base))
+        else:
+            events.append(filler_event(rng, base, type_pair))
+    return events
+
+
+def generate_season(out_dir, competition_id, season_id, first_match_id, matches_per_season,
+                    events_per_match, seed):
+    """Write one season's matches file and event files. Returns (comp, season)."""
+    out_dir = Path(out_dir)
+    events_dir = out_dir / "events"
+    events_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(f"{seed}:{competition_id}:{season_id}")
+    teams = make_teams(rng, 20, season_id)
+    matches = []
+    for m in range(matches_per_season):
+        match_id = first_match_id + m
+        home, away = rng.sample(teams, 2)
+        matches.append({
+            "match_id": match_id,
+            "competition": {"competition_id": competition_id,
+                            "competition_name": f"Synthetic League {competition_id}"},
+            "season": {"season_id": season_id, "season_name": f"{season_id}/{season_id + 1}"},
+            "home_team": {"home_team_id": home["id"], "home_team_name": home["name"]},
+            "away_team": {"away_team_id": away["id"], "away_team_name": away["name"]},
+        })
+        events = match_events(rng, match_id, home, away, events_per_match)
+        # Date and score follow from what was generated, so they draw nothing from rng
+        goals = Counter(e["team"]["id"] for e in events
+                        if e.get("shot", {}).get("outcome", {}).get("id") == GOAL[0])
+        matches[-1].update(match_date=str(date(season_id, 8, 1) + timedelta(days=m * 280 // matches_per_season)),
+                           home_score=goals[home["id"]], away_score=goals[away["id"]])
+        with open(events_dir / f"{match_id}.json", "w") as f:
+            json.dump(events, f, indent=2, separators=(",", " : "))
+    with open(out_dir / f"matches_{competition_id}_{season_id}.json", "w") as f:
+        json.dump(matches, f, indent=2, separators=(",", " : "))
+    return competition_id, season_id
+
+
+def season_plan(seasons, matches_per_season, competitions=1, competition_id=2, first_season_id=1000):
+    """(competition_id, season_id, first_match_id) per season; seasons split evenly across competitions."""
+    per_competition = -(-seasons // competitions)
+    return [(competition_id + s // per_competition, first_season_id + s, 1_000_001 + s * matches_per_season)
+            for s in range(seasons)]
+
+
+def _generate_planned(out_dir, matches_per_season, events_per_match, seed, planned):
+    competition_id, season_id, first_match_id = planned
+    return generate_season(out_dir, competition_id, season_id, first_match_id, matches_per_season,
+                           events_per_match, seed)
+
+
+def generate_bronze(out_dir, seasons=1, matches_per_season=380, events_per_match=3500,
+                    competition_id=2, first_season_id=1000, seed=0, competitions=1, workers=1):
+    """Write synthetic bronze data under out_dir. Returns the list of (comp, season) pairs."""
+    plan = season_plan(seasons, matches_per_season, competitions, competition_id, first_season_id)
+    job = partial(_generate_planned, out_dir, matches_per_season, events_per_match, seed)
+    if workers <= 1:
+        return [job(p) for p in plan]
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(job, plan))
+
+
+class BronzeHandler(SimpleHTTPRequestHandler):
+    """Serves a bronze tree under the open-data paths download_season requests."""
+
+    def translate_path(self, path):
+        parts = path.split("?", 1)[0].strip("/").split("/")
+        if len(parts) == 3 and parts[0] == "matches":
+            name = f"matches_{parts[1]}_{parts[2]}"
+        elif len(parts) == 2 and parts[0] == "events":
+            name = f"events/{parts[1]}"
+        else:
+            return os.path.join(self.directory, "__missing__")
+        return os.path.join(self.directory, name)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_bronze(bronze_dir, port=0):
+    """Serve bronze_dir from a background thread. Returns (server, base_url); call server.shutdown() when done."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), partial(BronzeHandler, directory=str(bronze_dir)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", type=Path, required=True, help="Bronze root, e.g. /tmp/bronze/statsbomb")
+    parser.add_argument("--scale", choices=SCALES, default="season",
+                        help="Preset for the options below; any of them can still be set explicitly")
+    parser.add_argument("--seasons", type=int)
+    parser.add_argument("--competitions", type=int)
+    parser.add_argument("--matches", type=int, help="Matches per season")
+    parser.add_argument("--events", type=int, help="Events per match")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    scale = {k: v if getattr(args, k) is None else getattr(args, k) for k, v in SCALES[args.scale].items()}
+
+    pairs = generate_bronze(args.out, scale["seasons"], scale["matches"], scale["events"], seed=args.seed,
+                            competitions=scale["competitions"], workers=args.workers)
+    mb = sum(f.stat().st_size for f in (args.out / "events").glob("*.json")) / 1e6
+    print(f"✅ Wrote {len(pairs) * scale['matches']} synthetic matches ({mb:,.0f} MB) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,9 @@
-import subprocess
+import sys
+from pathlib import Path
 
-steps = [
-    ["python", "src/eplxg/ingest/download_season.py", "--competition_id", "2", "--season_id", "27"],
-    ["python", "src/eplxg/transform/extract_shots.py"],
-    ["python", "src/eplxg/transform/features_shots.py"],
-    ["python", "src/eplxg/model/train_xg.py"],
-    ["python", "src/eplxg/model/score_shots.py"],
-    ["python", "src/eplxg/transform/aggregate_metrics.py"],
-]
+sys.path.insert(0, str(Path(__file__).resolve().parent / "src"))
 
-for step in steps:
-    print(f"\nRunning: {' '.join(step)}\n")
-    subprocess.run(step, check=True)
+from eplxg.pipeline import main  # noqa: E402
 
-print("\nPipeline complete.")
-print("Now run: streamlit run app/app.py")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""`python -m eplxg`: the eplxg command line (see cli.py)."""
+from eplxg.cli import main
+
+main()
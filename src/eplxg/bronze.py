@@ -0,0 +1,210 @@
+"""Bronze event store: loose JSON files and packed seasons.
+
+Bronze events live either as one JSON file per match under `events/` or
+packed, one file per season under `packed/`:
+
+    events_<comp>_<season>.pack
+        MAGIC
+        one frame per match      its raw events JSON, zstd-compressed on its own
+        index                    JSON: match id, frame offset/length, raw size, sha256
+        footer                   index offset and length (little-endian uint64), MAGIC
+
+Frames are independent, so a reader memory-maps the pack, reads the index
+behind the footer and decompresses only the match it asks for. A frame
+holds the loose file's exact bytes, and the index keeps their size and
+sha256, so the download manifest and the pipeline's change detection treat
+both layouts alike. Compression uses pyarrow's zstd codec.
+
+Readers see both layouts at once. A loose file takes precedence over the
+same match in a pack, so one match can be overridden by dropping its JSON
+into `events/`.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import uuid
+from pathlib import Path
+
+from eplxg.config import BRONZE_DIR, BRONZE_EVENTS_DIR, BRONZE_PACKED_DIR
+
+MAGIC = b"EPLXGPK1"
+FOOTER = struct.Struct("<QQ8s")
+FORMAT = "eplxg-bronze-pack"
+LEVEL = 9  # ~10x smaller than the JSON; packs once at ~45 MB/s, and decompresses faster than lower levels
+EVENTS_DIRNAME = BRONZE_EVENTS_DIR.name
+PACKED_DIRNAME = BRONZE_PACKED_DIR.name
+
+
+def _codec():
+    # pyarrow is imported here so that planning (which only reads indexes) stays light
+    import pyarrow as pa
+    return pa.Codec("zstd", compression_level=LEVEL)
+
+
+def pack_path(bronze_dir, comp_id, season_id):
+    return Path(bronze_dir) / PACKED_DIRNAME / f"events_{comp_id}_{season_id}.pack"
+
+
+def compress(raw):
+    """One match's raw events JSON as a frame: (compressed bytes, raw size, raw sha256)."""
+    return _codec().compress(raw, asbytes=True), len(raw), hashlib.sha256(raw).hexdigest()
+
+
+def write_pack(path, frames):
+    """Write (match_id, frame) pairs, frames as from compress(), to a new pack at path. Returns its index.
+
+    Written to a temp file and renamed over path, so readers never see a partial pack.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    # Mode 0666 lets the umask apply, as for any new file (mkstemp would make it 0600)
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    index = []
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            for match_id, (data, size, sha256) in frames:
+                index.append({"match_id": int(match_id), "offset": f.tell(), "length": len(data),
+                              "size": size, "sha256": sha256})
+                f.write(data)
+            index_offset = f.tell()
+            blob = json.dumps({"format": FORMAT, "matches": index}).encode()
+            f.write(blob)
+            f.write(FOOTER.pack(index_offset, len(blob), MAGIC))
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return index
+
+
+class PackReader:
+    """Random access to the matches of one pack through a read-only memory map."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < len(MAGIC) + FOOTER.size or self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a bronze pack")
+        offset, length, magic = FOOTER.unpack_from(self._map, len(self._map) - FOOTER.size)
+        index = json.loads(self._map[offset:offset + length])
+        if magic != MAGIC or index.get("format") != FORMAT:
+            raise ValueError(f"{self.path} is not a bronze pack")
+        self.entries = {e["match_id"]: e for e in index["matches"]}
+
+    def match_ids(self):
+        return list(self.entries)
+
+    def __contains__(self, match_id):
+        return match_id in self.entries
+
+    def frame(self, match_id):
+        """The match's frame as stored, for copying into another pack without recompressing."""
+        e = self.entries[match_id]
+        # Slicing the map copies only this frame's (compressed) bytes
+        return self._map[e["offset"]:e["offset"] + e["length"]], e["size"], e["sha256"]
+
+    def read(self, match_id):
+        """The match's raw events JSON bytes."""
+        data, size, _ = self.frame(match_id)
+        return _codec().decompress(data, decompressed_size=size, asbytes=True)
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Open readers, per path, for as long as the file is unchanged (each process builds its own)
+_readers = {}
+
+
+def open_pack(path):
+    """A cached PackReader for path, reopened when the file has been replaced."""
+    path = str(path)
+    st = os.stat(path)
+    stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+    hit = _readers.get(path)
+    if hit is None or hit[0] != stamp:
+        hit = _readers[path] = (stamp, PackReader(path))
+    return hit[1]
+
+
+def pack_files(bronze_dir=BRONZE_DIR):
+    return sorted((Path(bronze_dir) / PACKED_DIRNAME).glob("events_*_*.pack"))
+
+
+def event_sources(bronze_dir=BRONZE_DIR, match_ids=None):
+    """Where each match's events are: a loose JSON path, or a (pack path, match_id) pair.
+
+    Covers every match in bronze_dir, or only match_ids (those without
+    events in either layout are left out), in match id order.
+    """
+    events_dir = Path(bronze_dir) / EVENTS_DIRNAME
+    if match_ids is None:
+        loose = {int(p.stem): p for p in events_dir.glob("*.json")}
+    else:
+        loose = {m: events_dir / f"{m}.json" for m in match_ids}
+        loose = {m: p for m, p in loose.items() if p.exists()}
+        wanted = set(match_ids)
+    sources = dict(loose)
+    for path in pack_files(bronze_dir):
+        for m in open_pack(path).match_ids():
+            if m not in sources and (match_ids is None or m in wanted):
+                sources[m] = (path, m)
+    return [sources[m] for m in sorted(sources)]
+
+
+def source_name(source):
+    return f"{source[0].name}:{source[1]}" if isinstance(source, tuple) else Path(source).name
+
+
+def source_size(source):
+    """Raw (uncompressed) size of a match's events in bytes."""
+    if isinstance(source, tuple):
+        return open_pack(source[0]).entries[source[1]]["size"]
+    return os.path.getsize(source)
+
+
+def read_events(source):
+    """Raw events JSON bytes of the match at source (see event_sources)."""
+    if isinstance(source, tuple):
+        return open_pack(source[0]).read(source[1])
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def pack_season(bronze_dir, comp_id, season_id, remove_loose=False):
+    """Pack the season's loose event files, merged with any existing pack. Returns the pack's index.
+
+    Loose files win over packed frames of the same match. With remove_loose
+    the packed JSON files are deleted afterwards.
+    """
+    bronze_dir = Path(bronze_dir)
+    with open(bronze_dir / f"matches_{comp_id}_{season_id}.json") as f:
+        match_ids = [m["match_id"] for m in json.load(f)]
+    path = pack_path(bronze_dir, comp_id, season_id)
+    old = open_pack(path) if path.exists() else None
+    loose = {m: bronze_dir / EVENTS_DIRNAME / f"{m}.json" for m in match_ids}
+    loose = {m: p for m, p in loose.items() if p.exists()}
+
+    def frames():
+        for m in match_ids:
+            if m in loose:
+                yield m, compress(loose[m].read_bytes())
+            elif old is not None and m in old:
+                yield m, old.frame(m)
+
+    index = write_pack(path, frames())
+    if remove_loose:
+        for p in loose.values():
+            p.unlink()
+    return index
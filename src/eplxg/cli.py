@@ -0,0 +1,68 @@
+"""`eplxg`: one command line for the pipeline and every stage.
+
+    eplxg run --season 2:27 --skip ingest     # the pipeline (same options as run_pipeline.py)
+    eplxg status                              # what the pipeline would run, and why
+    eplxg competitions --filter premier       # StatsBomb open-data competitions
+    eplxg extract --workers 8                 # any stage, with that stage script's options
+
+Each subcommand is a module's main(), imported only when the command runs.
+Stage options are defined in options.py and parsed before the stage module
+is imported, so startup costs this module and nothing else: listing
+competitions, checking status or a stage's --help never imports pandas,
+NumPy, pyarrow, scikit-learn or requests. tests/test_cli.py checks that
+with `-X importtime`; `benchmarks/bench_startup.py` times it.
+"""
+import importlib
+import sys
+
+from eplxg import options
+
+# name -> (module whose main() runs it, help); stage names match the pipeline's
+COMMANDS = {
+    "run": ("eplxg.pipeline", "Run the pipeline, skipping up-to-date stages"),
+    "status": ("eplxg.pipeline", "Show which pipeline stages would run, and why (run --dry-run)"),
+    "competitions": ("eplxg.ingest.list_competitions", "List StatsBomb open-data competitions and seasons"),
+    "ingest": ("eplxg.ingest.download_season", "Download seasons into bronze"),
+    "extract": ("eplxg.transform.extract_shots", "Extract silver shots from bronze events"),
+    "features": ("eplxg.transform.features_shots", "Build gold shot features"),
+    "train": ("eplxg.model.train_xg", "Train and register the xG model"),
+    "registry": ("eplxg.model.registry", "List, compare or activate registered model versions"),
+    "score": ("eplxg.model.score_shots", "Score gold shots with the active model"),
+    "serve": ("eplxg.model.serve_xg", "Serve the xG model over HTTP"),
+    "aggregate": ("eplxg.transform.aggregate_metrics", "Aggregate team, player and match metrics"),
+    "simulate": ("eplxg.transform.simulate_xg", "Monte Carlo Goals - xG ranges"),
+    "outcomes": ("eplxg.transform.match_outcomes", "Match outcome probabilities and the xG table"),
+    "heatmaps": ("eplxg.transform.shot_heatmaps", "Binned shot heatmap tiles"),
+    "shot_index": ("eplxg.transform.similar_shots", "Build the similar-shot index"),
+    "events": ("eplxg.transform.extract_events", "Extract silver on-ball events"),
+    "chain": ("eplxg.transform.xg_chain", "xG Chain and xG Buildup per player"),
+}
+
+
+def usage():
+    width = max(map(len, COMMANDS))
+    lines = ["usage: eplxg <command> [options]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {help}" for name, (_, help) in COMMANDS.items()]
+    lines += ["", "`eplxg <command> --help` shows a command's options."]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return
+    name, args = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(usage(), file=sys.stderr)
+        raise SystemExit(f"\neplxg: unknown command {name!r}")
+
+    # Show the subcommand in usage lines; stage scripts parse sys.argv themselves
+    sys.argv = [f"eplxg {name}"] + args
+    if name in options.OPTIONS:
+        # Stage options parse before the stage is imported, so --help and usage errors stay cheap
+        options.parser(name).parse_args(args)
+    module = importlib.import_module(COMMANDS[name][0])
+    if name in ("run", "status"):
+        return module.main(args + ["--dry-run"] if name == "status" else args)
+    return module.main()
@@ -0,0 +1,68 @@
+"""Shared paths for every stage.
+
+Silver and gold shot tables are Hive-partitioned parquet datasets
+(`<root>/competition_id=2/season_id=27/part-0.parquet`) so several
+competitions/seasons live side by side. All paths are relative to the
+working directory, like the rest of the pipeline.
+"""
+from pathlib import Path
+
+DATA_DIR = Path("data")
+
+BRONZE_DIR = DATA_DIR / "bronze" / "statsbomb"
+BRONZE_EVENTS_DIR = BRONZE_DIR / "events"
+BRONZE_PACKED_DIR = BRONZE_DIR / "packed"  # one events pack per season (see bronze.py)
+
+SILVER_DIR = DATA_DIR / "silver"
+SILVER_SHOTS = SILVER_DIR / "shots"
+SILVER_EVENTS = SILVER_DIR / "events"  # on-ball events of every possession (see transform/extract_events.py)
+SEASONS_PATH = SILVER_DIR / "seasons.parquet"
+MATCHES_PATH = SILVER_DIR / "matches.parquet"
+TEAMS_PATH = SILVER_DIR / "teams.parquet"  # StatsBomb team id -> name
+PLAYERS_PATH = SILVER_DIR / "players.parquet"  # StatsBomb player id -> name
+
+GOLD_DIR = DATA_DIR / "gold"
+GOLD_FEATURES = GOLD_DIR / "shots_features"
+GOLD_SCORED = GOLD_DIR / "shots_scored"
+TEAM_METRICS = GOLD_DIR / "team_metrics"
+PLAYER_METRICS = GOLD_DIR / "player_metrics"
+PLAYER_TEAM_METRICS = GOLD_DIR / "player_team_metrics"
+MATCH_TEAM_METRICS = GOLD_DIR / "match_team_metrics"
+MINUTE_METRICS = GOLD_DIR / "minute_metrics"
+PLAY_PATTERN_METRICS = GOLD_DIR / "play_pattern_metrics"
+MINUTE_PLAY_PATTERN_METRICS = GOLD_DIR / "minute_play_pattern_metrics"
+AGGREGATE_STATE = GOLD_DIR / "aggregate_state"  # per-match partial sums the metrics tables are built from
+MATCH_OUTCOMES = GOLD_DIR / "match_outcomes"
+XG_TABLE = GOLD_DIR / "xg_table"
+SEASON_HEATMAP = GOLD_DIR / "heatmap_season"  # binned shot tiles (see transform/shot_heatmaps.py)
+TEAM_HEATMAP = GOLD_DIR / "heatmap_team"
+PLAYER_HEATMAP = GOLD_DIR / "heatmap_player"
+PLAYER_CHAIN = GOLD_DIR / "player_chain_metrics"  # xG chain / buildup (see transform/xg_chain.py)
+PLAYER_TEAM_CHAIN = GOLD_DIR / "player_team_chain_metrics"
+SHOT_INDEX = GOLD_DIR / "shot_index"  # KD-trees for similar-shot queries (see transform/similar_shots.py)
+
+MODELS_DIR = Path("models")
+MODEL_PATH = MODELS_DIR / "xg_lite_logreg.joblib"
+MODEL_EXPORT_PATH = MODELS_DIR / "xg_lite_logreg.json"  # sklearn-free copy used for scoring
+MODEL_STATE_PATH = MODELS_DIR / "xg_lite_state.json"  # streaming trainer's warm-start state
+MODEL_REGISTRY_DIR = MODELS_DIR / "registry"  # every trained version (see model/registry.py)
+REPORTS_DIR = Path("reports")
+METRICS_PATH = REPORTS_DIR / "metrics.json"
+
+# Stage defaults, kept here so the command-line options (options.py) need no stage imports
+BASE_URL = "https://raw.githubusercontent.com/statsbomb/open-data/master/data"  # StatsBomb open data
+BATCH_ROWS = 131_072  # rows per scored row group; memory stays flat regardless of dataset size
+MAX_BATCH = 4096  # shots per serving micro-batch
+MAX_WAIT_MS = 0.0  # extra time a serving batch waits for more requests once one is queued
+SIMS = 10_000  # Monte Carlo replays per season
+SEED = 0
+
+# Partition keys of every silver/gold dataset; silver can add match_id
+PARTITION_COLS = ["competition_id", "season_id"]
+MATCH_PARTITION_COLS = PARTITION_COLS + ["match_id"]
+
+
+def parse_season(value):
+    """'2:27' -> (2, 27)"""
+    comp_id, season_id = (int(v) for v in value.split(":"))
+    return comp_id, season_id
@@ -0,0 +1,276 @@
+"""Read/write helpers for the Hive-partitioned silver and gold datasets.
+
+Readers push season/match filters and column projections down to pyarrow,
+so a single-season query only opens that season's files.
+"""
+import shutil
+import uuid
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from eplxg import instrument
+from eplxg.config import MATCH_PARTITION_COLS, PARTITION_COLS
+
+
+def _partitioning(cols):
+    return ds.partitioning(pa.schema([(c, pa.int64()) for c in cols]), flavor="hive")
+
+
+# Every partition key is an int64; datasets not partitioned by match simply
+# keep match_id as a regular column.
+PARTITIONING = _partitioning(PARTITION_COLS)
+MATCH_PARTITIONING = _partitioning(MATCH_PARTITION_COLS)
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+STAGING_DIR = "_staging"  # ignored by dataset discovery (leading underscore)
+COMPRESSION = "zstd"  # ~10-25% smaller than snappy on shot tables, reads as fast
+
+
+def dataset(root):
+    by_match = next(Path(root).glob("*/*/match_id=*"), None) is not None
+    return ds.dataset(root, format="parquet", partitioning=MATCH_PARTITIONING if by_match else PARTITIONING)
+
+
+def make_filter(seasons=None, match_ids=None):
+    """Filter expression for (competition_id, season_id) pairs and/or match ids."""
+    expr = None
+    if seasons is not None:
+        for season in seasons:
+            e = _key_filter(PARTITION_COLS, season)
+            expr = e if expr is None else expr | e
+        if expr is None:
+            expr = ds.scalar(False)
+    if match_ids is not None:
+        e = ds.field("match_id").isin(pa.array(sorted(set(match_ids)), type=pa.int64()))
+        expr = e if expr is None else expr & e
+    return expr
+
+
+def read_table(root, columns=None, seasons=None, match_ids=None):
+    d = dataset(root)
+    if columns is None:
+        # Partition keys first, like the rows were written
+        names = d.schema.names
+        columns = [c for c in MATCH_PARTITION_COLS if c in names] + [c for c in names if c not in MATCH_PARTITION_COLS]
+    return d.to_table(columns=columns, filter=make_filter(seasons, match_ids))
+
+
+def read_frame(root, columns=None, seasons=None, match_ids=None):
+    return read_table(root, columns=columns, seasons=seasons, match_ids=match_ids).to_pandas()
+
+
+def iter_batches(root, columns=None, batch_size=131_072, filter=None):
+    """Record batches of the dataset, one file at a time.
+
+    Unlike Dataset.to_batches, nothing is read ahead of the consumer, so
+    memory stays flat however slowly the batches are processed. `filter`
+    (e.g. from make_filter) skips non-matching partitions without opening them.
+    """
+    d = dataset(root)
+    for fragment in d.get_fragments(filter=filter):
+        yield from fragment.to_batches(schema=d.schema, columns=columns, filter=filter, batch_size=batch_size,
+                                       use_threads=False)
+
+
+def _partition_value(dirname):
+    value = dirname.split("=", 1)[1]
+    return None if value == NULL_PARTITION else int(value)
+
+
+def _key_order(key):
+    return [(v is None, v) for v in key]
+
+
+def list_partitions(root):
+    """Sorted (competition_id, season_id) pairs present under root, from directory names only.
+
+    Rows without a known season sit in a (None, None) partition.
+    """
+    pairs = set()
+    for comp_dir in Path(root).glob("competition_id=*"):
+        for season_dir in comp_dir.glob("season_id=*"):
+            pairs.add((_partition_value(comp_dir.name), _partition_value(season_dir.name)))
+    return sorted(pairs, key=_key_order)
+
+
+def partition_path(root, cols, key):
+    parts = [f"{c}={NULL_PARTITION if v is None else v}" for c, v in zip(cols, key)]
+    return Path(root).joinpath(*parts)
+
+
+def partition_keys(table, cols):
+    if table.num_rows == 0:
+        return []
+    unique = table.select(cols).group_by(cols).aggregate([])
+    return sorted(zip(*(unique.column(c).to_pylist() for c in cols)), key=_key_order)
+
+
+def tree_size(root):
+    """Total bytes of the files under root (a file counts as itself)."""
+    root = Path(root)
+    if root.is_file():
+        return root.stat().st_size
+    return sum(f.stat().st_size for f in root.rglob("*") if f.is_file())
+
+
+def partition_version(root, key, cols=PARTITION_COLS):
+    """Cache key for one partition's data: (file, size, mtime_ns) of every parquet file in it.
+
+    Rewriting the partition changes it; only stats files, so it is cheap to
+    check on every read.
+    """
+    path = partition_path(root, cols, key)
+    files = sorted(path.rglob("*.parquet")) if path.is_dir() else []
+    return tuple((f.relative_to(path).as_posix(), f.stat().st_size, f.stat().st_mtime_ns) for f in files)
+
+
+def _key_filter(cols, key):
+    expr = None
+    for c, v in zip(cols, key):
+        e = ds.field(c).is_null() if v is None else ds.field(c) == v
+        expr = e if expr is None else expr & e
+    return expr
+
+
+class PartitionedWriter:
+    """Append Arrow tables to a Hive-partitioned dataset.
+
+    Keeps one ParquetWriter per partition (each write becomes a row group), up
+    to max_open at a time; a partition seen again after its writer was closed
+    gets another part file.
+    """
+
+    def __init__(self, root, schema, partition_cols=PARTITION_COLS, max_open=64):
+        self.root = Path(root)
+        self.schema = schema
+        self.partition_cols = list(partition_cols)
+        self.file_schema = pa.schema([f for f in schema if f.name not in self.partition_cols])
+        self.max_open = max_open
+        self.writers = {}
+        self.files = {}
+        self.rows = 0
+
+    def _writer(self, key):
+        if key in self.writers:
+            return self.writers[key]
+        if len(self.writers) >= self.max_open:
+            oldest = next(iter(self.writers))
+            self.writers.pop(oldest).close()
+        n = self.files.get(key, 0)
+        self.files[key] = n + 1
+        path = partition_path(self.root, self.partition_cols, key) / f"part-{n}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.writers[key] = pq.ParquetWriter(path, self.file_schema, compression=COMPRESSION)
+        return self.writers[key]
+
+    def write(self, table):
+        table = table.select(self.schema.names).cast(self.schema)
+        for key in partition_keys(table, self.partition_cols):
+            part = table.filter(_key_filter(self.partition_cols, key))
+            self._writer(key).write_table(part.drop_columns(self.partition_cols))
+            self.rows += part.num_rows
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+        if self.rows == 0 and not self.files:
+            # Keep the schema discoverable even for an empty dataset
+            self.root.mkdir(parents=True, exist_ok=True)
+            pq.write_table(self.schema.empty_table(), self.root / "part-0.parquet")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_dataset(tables, root, schema, partition_cols=PARTITION_COLS):
+    """Replace the dataset at root with the given table(s). Returns the row count.
+
+    Written to a sibling directory first and swapped in, so readers never see
+    a half-written dataset.
+    """
+    root = Path(root)
+    if isinstance(tables, pa.Table):
+        tables = [tables]
+    tmp = root.with_name(f"{root.name}.tmp-{uuid.uuid4().hex[:8]}")
+    with instrument.span("write_dataset", root=str(root)) as s:
+        with PartitionedWriter(tmp, schema, partition_cols) as writer:
+            for table in tables:
+                writer.write(table)
+        s.add(rows_out=writer.rows, bytes_written=tree_size(tmp))
+    old = root.with_name(f"{root.name}.old-{uuid.uuid4().hex[:8]}")
+    if root.exists():
+        root.rename(old)
+    tmp.rename(root)
+    shutil.rmtree(old, ignore_errors=True)
+    return writer.rows
+
+
+def replace_matches(root, table, match_ids, partition_cols=PARTITION_COLS):
+    """Replace the rows of match_ids in the dataset at root with table.
+
+    Only partitions holding those matches (before or after) are rewritten;
+    each is staged next to the data and swapped in. Matches in match_ids with
+    no rows in table are removed. Returns the number of rows written.
+    """
+    root = Path(root)
+    d = dataset(root)
+    schema = d.schema
+    ids = pa.array(sorted(set(match_ids)), type=pa.int64())
+    old = d.to_table(columns=partition_cols, filter=ds.field("match_id").isin(ids))
+    keys = sorted(set(partition_keys(old, partition_cols)) | set(partition_keys(table, partition_cols)),
+                  key=_key_order)
+
+    staging = root / STAGING_DIR / uuid.uuid4().hex[:8]
+    with instrument.span("replace_matches", root=str(root), partitions=len(keys)) as s:
+        with PartitionedWriter(staging, schema, partition_cols) as writer:
+            for key in keys:
+                kept = d.to_table(filter=_key_filter(partition_cols, key) & ~ds.field("match_id").isin(ids))
+                writer.write(kept)
+            writer.write(table)
+        s.add(rows_out=writer.rows, bytes_written=tree_size(staging))
+
+    for key in keys:
+        target = partition_path(root, partition_cols, key)
+        shutil.rmtree(target, ignore_errors=True)
+        staged = partition_path(staging, partition_cols, key)
+        if staged.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            staged.rename(target)
+    shutil.rmtree(root / STAGING_DIR, ignore_errors=True)
+    return writer.rows
+
+
+def replace_partitions(root, table, keys, schema, partition_cols=PARTITION_COLS):
+    """Replace the given partitions of the dataset at root with table's rows for them.
+
+    Partitions in keys that table has no rows for are removed; the rest of
+    the dataset is untouched. Each partition is staged next to the data and
+    swapped in. Returns the number of rows written.
+    """
+    root = Path(root)
+    staging = root / STAGING_DIR / uuid.uuid4().hex[:8]
+    with instrument.span("replace_partitions", root=str(root), partitions=len(keys)) as s:
+        with PartitionedWriter(staging, schema, partition_cols) as writer:
+            writer.write(table)
+        s.add(rows_out=writer.rows, bytes_written=tree_size(staging))
+    for key in keys:
+        target = partition_path(root, partition_cols, key)
+        shutil.rmtree(target, ignore_errors=True)
+        staged = partition_path(staging, partition_cols, key)
+        if staged.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            staged.rename(target)
+    shutil.rmtree(root / STAGING_DIR, ignore_errors=True)
+    return writer.rows
+
+
+def decode_dictionaries(table):
+    """The table with dictionary-encoded columns cast back to their plain value type."""
+    schema = pa.schema([f.with_type(f.type.value_type) if pa.types.is_dictionary(f.type) else f for f in table.schema])
+    return table.cast(schema)
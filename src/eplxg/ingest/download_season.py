@@ -1,33 +1,125 @@
-import argparse
+import hashlib
 import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from eplxg import bronze, instrument, options
+from eplxg.config import BASE_URL, BRONZE_DIR
+MANIFEST_NAME = "_manifest.json"
+
+
+def make_session(workers, retries=5, backoff=0.5):
+    # One pooled session shared by all worker threads; retries cover
+    # connection errors as well as throttling / transient server errors.
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
-BASE_URL = "https://raw.githubusercontent.com/statsbomb/open-data/master/data"
 
-def download_json(url, out_path):
-    r = requests.get(url, timeout=30)
-    r.raise_for_status()
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def write_atomic(out_path, data):
+    # Write to a temp file in the same directory, then rename over the target,
+    # so an interrupted run never leaves a truncated JSON file behind.
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(out_path, "w") as f:
-        f.write(r.text)
+    tmp = out_path.with_name(f".{out_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    # Mode 0666 lets the umask apply, as for any new file (mkstemp would make it 0600)
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, out_path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def download_json(session, url, out_path):
+    with instrument.span("download_file", file=out_path.name) as s:
+        r = session.get(url, timeout=30)
+        r.raise_for_status()
+        data = r.content
+        write_atomic(out_path, data)
+        s.add(bytes_written=len(data))
+    return {"size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+
+
+def download_frame(session, url, name):
+    """Download one match's events straight into a compressed pack frame (see bronze.compress)."""
+    with instrument.span("download_file", file=name) as s:
+        r = session.get(url, timeout=30)
+        r.raise_for_status()
+        frame = bronze.compress(r.content)
+        s.add(bytes_written=len(frame[0]))
+    return frame
+
+
+def is_complete(out_path, entry):
+    """True if out_path exists and matches the size/checksum recorded in the manifest."""
+    if entry is None or not out_path.exists():
+        return False
+    if out_path.stat().st_size != entry["size"]:
+        return False
+    return sha256_file(out_path) == entry["sha256"]
+
+
+def load_manifest(path):
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(path, manifest):
+    write_atomic(path, json.dumps(manifest, indent=2, sort_keys=True).encode())
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--competition_id", type=int, required=True)
-    parser.add_argument("--season_id", type=int, required=True)
-    args = parser.parse_args()
 
-    comp_id = args.competition_id
-    season_id = args.season_id
+def download_season(session, base_url, bronze_dir, comp_id, season_id, manifest, workers, packed=False,
+                    remove_json=False):
+    """Download one season's matches list and missing event files.
 
-    bronze_dir = Path("data/bronze/statsbomb")
+    With packed=True the events go into the season's bronze pack instead of
+    loose files. Complete loose files already on disk are folded into it
+    (and deleted with remove_json). Matches already in a pack count as
+    downloaded either way.
+    """
     matches_path = bronze_dir / f"matches_{comp_id}_{season_id}.json"
 
-    # Download matches list
-    matches_url = f"{BASE_URL}/matches/{comp_id}/{season_id}.json"
+    # Matches list is small and can change while a season is in progress: always refresh it
+    matches_url = f"{base_url}/matches/{comp_id}/{season_id}.json"
     print(f"Downloading matches from: {matches_url}")
-    download_json(matches_url, matches_path)
+    try:
+        manifest[matches_path.name] = download_json(session, matches_url, matches_path)
+    except requests.RequestException as e:
+        # Reported with the event failures; the other seasons still download
+        print(f"Failed {matches_path.name}: {e}")
+        return {"matches": 0, "downloaded": 0, "skipped": 0, "failed": [matches_path.name], "bytes": 0}
 
     with open(matches_path) as f:
         matches = json.load(f)
@@ -35,19 +127,136 @@ def main():
     match_ids = [m["match_id"] for m in matches]
     print(f"Found {len(match_ids)} matches")
 
-    # Download events for each match
     events_dir = bronze_dir / "events"
-
-    for i, match_id in enumerate(match_ids, 1):
-        events_url = f"{BASE_URL}/events/{match_id}.json"
+    pack = bronze.pack_path(bronze_dir, comp_id, season_id)
+    old = bronze.open_pack(pack) if pack.exists() else None
+    frames = {}  # packed: match_id -> frame for the new pack
+    folded = []  # packed: loose files moved into it
+    todo = []
+    for match_id in match_ids:
         out_path = events_dir / f"{match_id}.json"
-        download_json(events_url, out_path)
+        key = f"events/{match_id}.json"
+        entry = manifest.get(key)
+        if old is not None and match_id in old and entry and old.entries[match_id]["sha256"] == entry["sha256"]:
+            # Already packed (a season packed once stays packed, --packed or not)
+            if packed:
+                frames[match_id] = old.frame(match_id)
+            continue
+        if is_complete(out_path, entry):
+            if packed:
+                frames[match_id] = bronze.compress(out_path.read_bytes())
+                folded.append(out_path)
+            continue
+        todo.append((match_id, key, f"{base_url}/events/{match_id}.json", out_path))
+
+    skipped = len(match_ids) - len(todo)
+    if skipped:
+        print(f"Skipping {skipped} already downloaded matches")
+
+    downloaded = 0
+    nbytes = 0
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if packed:
+            futures = {pool.submit(download_frame, session, url, key): (match_id, key)
+                       for match_id, key, url, out in todo}
+        else:
+            futures = {pool.submit(download_json, session, url, out): (match_id, key)
+                       for match_id, key, url, out in todo}
+        for fut in as_completed(futures):
+            match_id, key = futures[fut]
+            try:
+                result = fut.result()
+            except requests.RequestException as e:
+                failed.append(key)
+                print(f"Failed {key}: {e}")
+                continue
+            if packed:
+                frames[match_id] = result
+                _, size, sha256 = result
+                result = {"size": size, "sha256": sha256}
+            manifest[key] = result
+            downloaded += 1
+            nbytes += result["size"]
+
+            if downloaded % 20 == 0:
+                print(f"Downloaded {downloaded}/{len(todo)} matches")
+
+    if packed and (downloaded or folded or not pack.exists()):
+        # Failed matches are left out; the next run finds them missing from the pack and retries
+        bronze.write_pack(pack, ((m, frames[m]) for m in match_ids if m in frames))
+        if remove_json:
+            for path in folded:
+                path.unlink()
+        print(f"Packed {len(frames)} matches into {pack}")
+
+    return {"matches": len(match_ids), "downloaded": downloaded, "skipped": skipped,
+            "failed": failed, "bytes": nbytes}
+
+
+def parse_season_pairs(args, parser):
+    pairs = []
+    if args.competition_id is not None or args.season_id is not None:
+        if args.competition_id is None or args.season_id is None:
+            parser.error("--competition_id and --season_id must be given together")
+        pairs.append((args.competition_id, args.season_id))
+    for s in args.season:
+        try:
+            comp_id, season_id = (int(v) for v in s.split(":"))
+        except ValueError:
+            parser.error(f"--season expects COMPETITION_ID:SEASON_ID, got {s!r}")
+        pairs.append((comp_id, season_id))
+    if not pairs:
+        parser.error("give --competition_id/--season_id or at least one --season")
+    return pairs
+
 
-        if i % 20 == 0:
-            print(f"Downloaded {i}/{len(match_ids)} matches")
+def download(pairs, base_url=BASE_URL, bronze_dir=BRONZE_DIR, workers=16, retries=5, packed=False,
+             remove_json=False):
+    """Download (competition_id, season_id) pairs into bronze_dir. Returns aggregate stats.
 
+    packed/remove_json: see download_season.
+    """
+    base_url = base_url.rstrip("/")
+    manifest_path = bronze_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    session = make_session(workers, retries=retries)
+
+    start = time.perf_counter()
+    totals = {"downloaded": 0, "bytes": 0, "failed": []}
+    try:
+        for comp_id, season_id in pairs:
+            with instrument.span("download_season", season=f"{comp_id}:{season_id}") as s:
+                stats = download_season(session, base_url, bronze_dir, comp_id, season_id, manifest, workers,
+                                        packed=packed, remove_json=remove_json)
+                s.add(rows_out=stats["downloaded"], bytes_written=stats["bytes"])
+            totals["downloaded"] += stats["downloaded"]
+            totals["bytes"] += stats["bytes"]
+            totals["failed"] += stats["failed"]
+    finally:
+        # Persist progress even on failure so the next run resumes where this one stopped
+        save_manifest(manifest_path, manifest)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    print(f"Downloaded {totals['downloaded']} files ({totals['bytes'] / 1e6:.1f} MB) in {elapsed:.1f}s: "
+          f"{totals['downloaded'] / elapsed:.1f} files/s, {totals['bytes'] / 1e6 / elapsed:.2f} MB/s")
+    if totals["failed"]:
+        raise SystemExit(f"❌ {len(totals['failed'])} downloads failed; re-run to resume")
+    return totals
+
+
+def main():
+    parser = options.parser("ingest")
+    args = parser.parse_args()
+    if args.remove_json and not args.packed:
+        parser.error("--remove_json needs --packed")
+
+    pairs = parse_season_pairs(args, parser)
+    with instrument.run("download_season"):
+        download(pairs, base_url=args.base_url, bronze_dir=args.bronze_dir,
+                 workers=args.workers, retries=args.retries, packed=args.packed, remove_json=args.remove_json)
     print("✅ Season download complete")
 
+
 if __name__ == "__main__":
     main()
-
@@ -1,32 +1,40 @@
 import argparse
+import json
 import re
-import pandas as pd
+from urllib.request import urlopen
 
 COMPETITIONS_URL = "https://raw.githubusercontent.com/statsbomb/open-data/master/data/competitions.json"
+# Useful columns (exist in StatsBomb open data competitions.json)
+COLUMNS = ["competition_id", "season_id", "competition_name", "season_name",
+           "country_name", "competition_gender", "competition_youth"]
+
+
+def to_string(rows, cols):
+    """rows (dicts) as a right-aligned text table, like DataFrame.to_string(index=False)."""
+    cells = [[str(c) for c in cols]] + [[str(r.get(c)) for c in cols] for r in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(cols))]
+    return "\n".join(" ".join(v.rjust(w) for v, w in zip(row, widths)) for row in cells)
+
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--filter", default="", help="Regex filter for competition/season names")
     parser.add_argument("--top", type=int, default=50)
+    parser.add_argument("--url", default=COMPETITIONS_URL, help="competitions.json to read (any URL, or file://)")
     args = parser.parse_args()
 
-    df = pd.read_json(COMPETITIONS_URL)
-
-    # Useful columns (exist in StatsBomb open data competitions.json)
-    cols = [c for c in [
-        "competition_id", "season_id", "competition_name", "season_name",
-        "country_name", "competition_gender", "competition_youth"
-    ] if c in df.columns]
-    df = df[cols]
+    # Plain json and urllib: a few hundred rows do not need pandas (or its import time)
+    with urlopen(args.url, timeout=30) as f:
+        rows = json.load(f)
+    cols = [c for c in COLUMNS if any(c in r for r in rows)]
 
     if args.filter:
         pat = re.compile(args.filter, flags=re.IGNORECASE)
-        mask = df.apply(lambda r: bool(pat.search(" ".join([str(x) for x in r.values]))), axis=1)
-        df = df[mask]
+        rows = [r for r in rows if pat.search(" ".join(str(r.get(c)) for c in cols))]
+
+    rows.sort(key=lambda r: (str(r.get("competition_name")), str(r.get("season_name"))))
+    print(to_string(rows[:args.top], cols))
 
-    df = df.sort_values(["competition_name", "season_name"]).reset_index(drop=True)
-    print(df.head(args.top).to_string(index=False))
 
 if __name__ == "__main__":
     main()
-
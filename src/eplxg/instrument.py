@@ -0,0 +1,360 @@
+"""Run instrumentation: nested spans with timings, counters and peak memory.
+
+    with instrument.run("pipeline"):
+        with instrument.span("extract", reason="forced") as s:
+            ...
+            s.add(rows_out=n)
+
+Every span records wall time, CPU time (this process plus reaped child
+processes), peak RSS and the counters the code adds to it; by convention
+rows_in, rows_out, bytes_read and bytes_written. When the outermost run()
+exits it writes a JSON report to reports/runs/, plus a Chrome trace
+(chrome://tracing or ui.perfetto.dev) when EPLXG_TRACE is set.
+
+Outside a run() every call is a no-op; inside one a span costs a few
+microseconds, so the stages leave it on.
+"""
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from eplxg.config import REPORTS_DIR
+
+RUNS_DIR = REPORTS_DIR / "runs"
+TRACE_ENV = "EPLXG_TRACE"
+MAX_SPANS = 200_000  # past this, only spans up to stage level are kept
+
+_MAIN = threading.main_thread()
+_recorder = None
+_last_report = None
+
+
+# ---- Process probes ----
+
+def _children_cpu():
+    if resource is None:
+        return 0.0
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+
+_proc_fds = {}  # pid -> (status fd, clear_refs fd); /proc/self is resolved at open, so not shared across forks
+
+
+def _proc(pid):
+    fds = _proc_fds.get(pid)
+    if fds is None:
+        fds = []
+        for name, flags in (("status", os.O_RDONLY), ("clear_refs", os.O_WRONLY)):
+            try:
+                fds.append(os.open(f"/proc/self/{name}", flags))
+            except OSError:
+                fds.append(None)
+        fds = _proc_fds[pid] = tuple(fds)
+    return fds
+
+
+def _peak_rss_kb():
+    """High-water RSS since the last reset (VmHWM), else since process start."""
+    status, _ = _proc(os.getpid())
+    if status is not None:
+        data = os.pread(status, 8192, 0)
+        i = data.find(b"VmHWM:")
+        if i >= 0:
+            return int(data[i + 6:data.index(b"kB", i)])
+    if resource is None:
+        return 0
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb // 1024 if sys.platform == "darwin" else kb
+
+
+def _reset_peak_rss():
+    # Linux only: lets a span measure its own peak rather than the process's
+    _, clear_refs = _proc(os.getpid())
+    if clear_refs is not None:
+        try:
+            os.write(clear_refs, b"5")
+        except OSError:
+            pass
+
+
+def measure(fn, *args):
+    """Call fn(*args) and time it, e.g. inside a pool worker. Returns (result, sample) for record()."""
+    cpu = time.process_time()
+    start = time.perf_counter_ns()
+    result = fn(*args)
+    sample = {"start_ns": start, "end_ns": time.perf_counter_ns(), "cpu_s": time.process_time() - cpu,
+              "peak_kb": _peak_rss_kb(), "pid": os.getpid(), "tid": threading.get_native_id()}
+    return result, sample
+
+
+# ---- Spans ----
+
+class Span:
+    __slots__ = ("id", "parent", "name", "attrs", "counters", "pid", "tid",
+                 "start_ns", "end_ns", "cpu_s", "peak_kb", "main", "_cpu0")
+
+    def add(self, **counters):
+        for k, v in counters.items():
+            self.counters[k] = self.counters.get(k, 0) + v
+        return self
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+        return self
+
+    def to_dict(self, t0):
+        return {
+            "id": self.id, "parent": self.parent, "name": self.name,
+            "start_s": round((self.start_ns - t0) / 1e9, 6), "wall_s": round((self.end_ns - self.start_ns) / 1e9, 6),
+            "cpu_s": round(self.cpu_s, 6),
+            "peak_rss_mb": None if self.peak_kb is None else round(self.peak_kb / 1024, 1),
+            "pid": self.pid, "tid": self.tid, "attrs": self.attrs, "counters": self.counters,
+        }
+
+
+class _NullSpan:
+    def add(self, **counters):
+        return self
+
+    def set(self, **attrs):
+        return self
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Recorder:
+    """Collects the spans of one run. Spans nest per thread; a worker thread's
+    outermost spans hang off whatever the main thread has open."""
+
+    def __init__(self, name, trace=False):
+        now = datetime.now(timezone.utc)
+        self.name = name
+        self.trace = trace
+        self.run_id = f"{now:%Y%m%dT%H%M%SZ}-{name}-{os.urandom(3).hex()}"
+        self.started_at = now.isoformat(timespec="seconds")
+        self.spans = []
+        self.dropped = 0
+        self._ids = itertools.count(1)
+        self._main_stack = []
+        self._local = threading.local()
+
+    def _stack(self):
+        if threading.current_thread() is _MAIN:
+            return self._main_stack
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _top(self, stack):
+        if stack:
+            return stack[-1]
+        return self._main_stack[-1] if self._main_stack else None
+
+    def _new(self, name, attrs, parent):
+        span = Span()
+        span.id = next(self._ids)
+        span.parent = parent.id if parent is not None else None
+        span.name = name
+        span.attrs = attrs
+        span.counters = {}
+        span.pid = os.getpid()
+        span.tid = threading.get_native_id()
+        return span
+
+    def start(self, name, attrs):
+        stack = self._stack()
+        parent = self._top(stack)
+        span = self._new(name, attrs, parent)
+        span.main = stack is self._main_stack
+        span.peak_kb = 0
+        if span.main:
+            if parent is not None:
+                parent.peak_kb = max(parent.peak_kb, _peak_rss_kb())
+            _reset_peak_rss()
+            span._cpu0 = time.process_time() + _children_cpu()
+        else:
+            span._cpu0 = time.thread_time()
+        stack.append(span)
+        span.start_ns = time.perf_counter_ns()
+        return span
+
+    def finish(self, span):
+        span.end_ns = time.perf_counter_ns()
+        stack = self._stack()
+        stack.pop()
+        if span.main:
+            span.cpu_s = time.process_time() + _children_cpu() - span._cpu0
+            span.peak_kb = max(span.peak_kb, _peak_rss_kb())
+            if stack:
+                stack[-1].peak_kb = max(stack[-1].peak_kb, span.peak_kb)
+        else:
+            # Peak RSS is process-wide; only main-thread spans can claim it
+            span.cpu_s = time.thread_time() - span._cpu0
+            span.peak_kb = None
+        self._keep(span, depth=len(stack) if span.main else len(self._main_stack) + len(stack) + 1)
+
+    def record(self, name, sample, attrs, counters):
+        """Add a span measured elsewhere (see measure()) under the current span."""
+        span = self._new(name, attrs, self._top(self._stack()))
+        span.counters = counters
+        span.start_ns, span.end_ns = sample["start_ns"], sample["end_ns"]
+        span.cpu_s, span.peak_kb = sample["cpu_s"], sample["peak_kb"]
+        span.pid, span.tid = sample["pid"], sample["tid"]
+        self._keep(span, depth=len(self._main_stack) + 1)
+
+    def _keep(self, span, depth):
+        if depth <= 1 or len(self.spans) < MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+    # ---- Output ----
+
+    def report(self):
+        import platform  # only for the report; keeps `eplxg status` and friends quick to start
+
+        spans = sorted(self.spans, key=lambda s: s.start_ns)
+        root = next(s for s in spans if s.parent is None)
+        return {
+            "run_id": self.run_id,
+            "name": self.name,
+            "status": "failed" if "error" in root.attrs else "ok",
+            "started_at": self.started_at,
+            "argv": sys.argv,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "wall_s": round((root.end_ns - root.start_ns) / 1e9, 6),
+            "cpu_s": round(root.cpu_s, 6),
+            "peak_rss_mb": round(root.peak_kb / 1024, 1),
+            "dropped_spans": self.dropped,
+            "spans": [s.to_dict(root.start_ns) for s in spans],
+        }
+
+    def chrome_trace(self, report):
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"{self.name} ({pid})"}}
+                  for pid in sorted({s["pid"] for s in report["spans"]})]
+        for s in report["spans"]:
+            args = {**s["attrs"], **s["counters"], "cpu_s": s["cpu_s"]}
+            if s["peak_rss_mb"] is not None:
+                args["peak_rss_mb"] = s["peak_rss_mb"]
+            events.append({"name": s["name"], "cat": "eplxg", "ph": "X", "pid": s["pid"], "tid": s["tid"],
+                           "ts": s["start_s"] * 1e6, "dur": s["wall_s"] * 1e6, "args": args})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, runs_dir=RUNS_DIR):
+        """Write the report (and trace). Returns the report dict with their paths."""
+        runs_dir.mkdir(parents=True, exist_ok=True)
+        report = self.report()
+        report["path"] = str(runs_dir / f"{self.run_id}.json")
+        if self.trace:
+            report["trace_path"] = str(runs_dir / f"{self.run_id}.trace.json")
+            with open(report["trace_path"], "w") as f:
+                json.dump(self.chrome_trace(report), f)
+        with open(report["path"], "w") as f:
+            json.dump(report, f, indent=1)
+        return report
+
+
+# ---- Module API ----
+
+@contextmanager
+def span(name, **attrs):
+    rec = _recorder
+    if rec is None:
+        yield NULL_SPAN
+        return
+    s = rec.start(name, attrs)
+    try:
+        yield s
+    except BaseException as exc:
+        s.attrs["error"] = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        rec.finish(s)
+
+
+@contextmanager
+def run(name, trace=None):
+    """Record a run and write its report on exit. Nested inside another run it is just a span."""
+    global _recorder, _last_report
+    if _recorder is not None:
+        with span(name) as s:
+            yield s
+        return
+    rec = _recorder = Recorder(name, bool(os.environ.get(TRACE_ENV)) if trace is None else trace)
+    try:
+        with span(name) as s:
+            yield s
+    finally:
+        _recorder = None
+        report = _last_report = rec.write()
+        print(f"📊 Run report: {report['path']}" + (f" (trace: {report['trace_path']})" if rec.trace else ""))
+
+
+def last_report():
+    """Report of the most recently finished run, or None."""
+    return _last_report
+
+
+def add(**counters):
+    """Add counters to the innermost open span of this thread."""
+    rec = _recorder
+    if rec is not None:
+        top = rec._top(rec._stack())
+        if top is not None:
+            top.add(**counters)
+
+
+def record(name, sample, attrs=None, **counters):
+    """Add a span timed by measure(), typically in a worker process, under the current span."""
+    rec = _recorder
+    if rec is not None:
+        rec.record(name, sample, attrs or {}, counters)
+
+
+def summary(report, depth=1):
+    """Table of the spans up to `depth` levels below the run, same-named siblings folded into one row."""
+    paths = {report["spans"][0]["id"]: ()}
+    rows = {}
+    for s in report["spans"][1:]:
+        parent = paths.get(s["parent"])
+        if parent is None:
+            continue
+        path = paths[s["id"]] = parent + (s["name"],)
+        if len(path) > depth:
+            continue
+        row = rows.setdefault(path, {"n": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_mb": None, "counters": {}})
+        row["n"] += 1
+        row["wall_s"] += s["wall_s"]
+        row["cpu_s"] += s["cpu_s"]
+        if s["peak_rss_mb"] is not None:
+            row["peak_rss_mb"] = max(row["peak_rss_mb"] or 0, s["peak_rss_mb"])
+        for k, v in s["counters"].items():
+            row["counters"][k] = row["counters"].get(k, 0) + v
+
+    lines = [f"{'step':<28}{'wall s':>9}{'cpu s':>9}{'peak MB':>9}{'rows in':>11}{'rows out':>11}"
+             f"{'MB read':>10}{'MB written':>11}"]
+    for path, row in rows.items():
+        name = "  " * (len(path) - 1) + path[-1] + (f" x{row['n']}" if row["n"] > 1 else "")
+        c = row["counters"]
+        peak = "" if row["peak_rss_mb"] is None else f"{row['peak_rss_mb']:.0f}"
+        lines.append(f"{name:<28}{row['wall_s']:>9.2f}{row['cpu_s']:>9.2f}{peak:>9}"
+                     f"{c.get('rows_in', ''):>11}{c.get('rows_out', ''):>11}"
+                     f"{_mb(c.get('bytes_read')):>10}{_mb(c.get('bytes_written')):>11}")
+    return "\n".join(lines)
+
+
+def _mb(n):
+    return "" if n is None else f"{n / 1e6:.1f}"
@@ -0,0 +1,110 @@
+"""Exported xG model: a versioned JSON file scored with NumPy only.
+
+The export holds everything needed to reproduce sklearn's
+`predict_proba` for the logistic regression — feature order,
+coefficients, intercept and the preprocessing applied to each feature —
+so scoring never imports sklearn or unpickles anything. Interaction
+features (e.g. distance × angle) are exported as `product` steps and
+computed from the gold feature columns at scoring time.
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+FORMAT = "eplxg-linear-xg"
+VERSION = 1
+# Preprocessing steps the scorer knows how to apply, in order
+PREPROCESSING = [{"op": "cast", "dtype": "float64"}]
+# Derived features the scorer can compute: name -> the gold columns multiplied together
+INTERACTIONS = {
+    "distance_x_angle": ["distance", "angle"],
+    "distance_x_header": ["distance", "is_header"],
+    "angle_x_header": ["angle", "is_header"],
+}
+
+
+def product_step(name):
+    return {"op": "product", "inputs": INTERACTIONS[name], "output": name}
+
+
+def add_interactions(columns, names):
+    """Return `columns` (name -> array) with the named interaction features added."""
+    columns = dict(columns)
+    for name in names:
+        a, b = INTERACTIONS[name]
+        columns[name] = np.asarray(columns[a], dtype=np.float64) * np.asarray(columns[b], dtype=np.float64)
+    return columns
+
+
+class LinearXG:
+    """Logistic regression evaluated as expit(intercept + sum(coef * feature))."""
+
+    def __init__(self, features, coefficients, intercept, preprocessing=PREPROCESSING):
+        if len(features) != len(coefficients):
+            raise ValueError(f"{len(features)} features but {len(coefficients)} coefficients")
+        products = [step for step in preprocessing if step.get("op") == "product"]
+        unknown = [step for step in preprocessing
+                   if step not in PREPROCESSING and (step.get("output") not in INTERACTIONS
+                                                     or step != product_step(step["output"]))]
+        if unknown:
+            raise ValueError(f"Unsupported preprocessing: {unknown}")
+        self.features = list(features)
+        self.interactions = [step["output"] for step in products]
+        # Columns the caller supplies; interactions are computed from them
+        self.inputs = [name for name in self.features if name not in self.interactions]
+        self.inputs += [c for name in self.interactions for c in INTERACTIONS[name] if c not in self.inputs]
+        self.coef = np.asarray(coefficients, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.preprocessing = list(preprocessing)
+
+    @classmethod
+    def from_sklearn(cls, model, features):
+        steps = PREPROCESSING + [product_step(name) for name in features if name in INTERACTIONS]
+        return cls(features, model.coef_[0].tolist(), float(model.intercept_[0]), steps)
+
+    def score(self, columns):
+        """Goal probability for each row, from a mapping of input column name -> 1-D array."""
+        columns = add_interactions(columns, self.interactions)
+        z = np.full(len(columns[self.inputs[0]]), self.intercept)
+        for name, c in zip(self.features, self.coef):
+            z += c * np.asarray(columns[name], dtype=np.float64)
+        with np.errstate(over="ignore"):
+            return 1.0 / (1.0 + np.exp(-z))
+
+    def predict_proba(self, X):
+        """sklearn-compatible: X is a 2-D array or DataFrame with columns in `inputs` order."""
+        X = np.asarray(X, dtype=np.float64)
+        p = self.score({name: X[:, i] for i, name in enumerate(self.inputs)})
+        return np.column_stack([1.0 - p, p])
+
+    def to_dict(self):
+        return {
+            "format": FORMAT,
+            "version": VERSION,
+            "features": self.features,
+            "coefficients": self.coef.tolist(),
+            "intercept": self.intercept,
+            "preprocessing": self.preprocessing,
+        }
+
+
+def export_model(model, features, path):
+    """Write an sklearn LogisticRegression as an exported model file. Returns the LinearXG."""
+    linear = LinearXG.from_sklearn(model, features)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_text(json.dumps(linear.to_dict(), indent=2))
+    os.replace(tmp, path)
+    return linear
+
+
+def load_model(path):
+    spec = json.loads(Path(path).read_text())
+    if spec.get("format") != FORMAT:
+        raise ValueError(f"{path} is not an exported xG model (format {spec.get('format')!r})")
+    if spec.get("version") != VERSION:
+        raise ValueError(f"{path} has model format version {spec.get('version')}, expected {VERSION}")
+    return LinearXG(spec["features"], spec["coefficients"], spec["intercept"], spec["preprocessing"])
@@ -0,0 +1,216 @@
+"""Versioned registry of exported xG models.
+
+    models/registry/
+        index.json          active version and every registered version, oldest first
+        v1/model.json       the exported model (see linear.py)
+        v1/meta.json        features, training data fingerprint, metrics, creation time
+
+Every model train_xg saves is registered as the next version (v1, v2, ...)
+and becomes the active one. The active model is also copied to
+MODEL_EXPORT_PATH, which scoring and the API read, so rolling back is
+`--activate <version>` followed by a rescore. score_shots --compare scores
+other versions in the same pass, as `xg_<version>` columns.
+
+    python src/eplxg/model/registry.py --list
+    python src/eplxg/model/registry.py --activate v2
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from eplxg import options
+from eplxg.config import MODEL_EXPORT_PATH, MODEL_REGISTRY_DIR
+from eplxg.model.linear import load_model
+
+FORMAT = "eplxg-model-registry"
+INDEX_NAME = "index.json"
+COLUMN_PREFIX = "xg_"
+# Metrics copied into the index listing; the full metrics stay in meta.json
+SUMMARY_METRICS = ["rows_total", "log_loss", "brier_score", "roc_auc"]
+
+
+def column(version):
+    """Scored column holding a version's xG."""
+    return f"{COLUMN_PREFIX}{version}"
+
+
+def column_versions(names):
+    """Versions that have an xg_<version> column among names, in order."""
+    return [n[len(COLUMN_PREFIX):] for n in names if n.startswith(COLUMN_PREFIX)]
+
+
+def _write_json(path, obj):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_text(json.dumps(obj, indent=2))
+    os.replace(tmp, path)
+
+
+def load_index(root=MODEL_REGISTRY_DIR):
+    path = Path(root) / INDEX_NAME
+    if not path.exists():
+        return {"format": FORMAT, "active": None, "versions": []}
+    index = json.loads(path.read_text())
+    if index.get("format") != FORMAT:
+        raise ValueError(f"{path} is not a model registry index")
+    return index
+
+
+def versions(root=MODEL_REGISTRY_DIR):
+    return load_index(root)["versions"]
+
+
+def active_version(root=MODEL_REGISTRY_DIR):
+    return load_index(root)["active"]
+
+
+def model_path(version, root=MODEL_REGISTRY_DIR):
+    return Path(root) / version / "model.json"
+
+
+def _check(version, root):
+    if version not in versions(root):
+        raise KeyError(f"Unknown model version {version!r}; registered: {', '.join(versions(root)) or 'none'}")
+
+
+def load_version(version, root=MODEL_REGISTRY_DIR):
+    """The exported model of a registered version."""
+    _check(version, root)
+    return load_model(model_path(version, root))
+
+
+def load_meta(version, root=MODEL_REGISTRY_DIR):
+    _check(version, root)
+    return json.loads((Path(root) / version / "meta.json").read_text())
+
+
+def frame_fingerprint(df):
+    """Training data fingerprint of an in-memory frame: its rows and a content hash."""
+    import pandas as pd
+
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return {"rows": len(df), "columns": list(df.columns), "sha256": hashlib.sha256(hashes.tobytes()).hexdigest()}
+
+
+def files_fingerprint(root, seasons=None):
+    """Training data fingerprint of a parquet dataset (the given seasons only): a hash of its files."""
+    from eplxg import datasets
+    from eplxg.config import PARTITION_COLS
+
+    root = Path(root)
+    keys = seasons if seasons is not None else datasets.list_partitions(root)
+    h = hashlib.sha256()
+    files = sorted(f for key in keys for f in datasets.partition_path(root, PARTITION_COLS, key).rglob("*.parquet"))
+    for f in files:
+        h.update(f.relative_to(root).as_posix().encode())
+        with open(f, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+    return {"files": len(files), "sha256": h.hexdigest()}
+
+
+def register(model, metrics, data=None, root=MODEL_REGISTRY_DIR, activate=True, export_path=MODEL_EXPORT_PATH):
+    """Add an exported model (LinearXG) as the next version. Returns the version.
+
+    data is the training data fingerprint (frame_fingerprint / files_fingerprint).
+    Refitting to the same coefficients on the same data registers nothing new:
+    the existing version is returned (and activated).
+    """
+    root = Path(root)
+    index = load_index(root)
+    exported = model.to_dict()
+    for version in reversed(index["versions"]):
+        meta = load_meta(version, root)
+        if (meta.get("data") or {}).get("sha256") == (data or {}).get("sha256") \
+                and json.loads(model_path(version, root).read_text()) == json.loads(json.dumps(exported)):
+            if activate:
+                activate_version(version, root, export_path)
+            return version
+    n = max((int(v[1:]) for v in index["versions"]), default=0) + 1
+    version = f"v{n}"
+    _write_json(model_path(version, root), exported)
+    _write_json(root / version / "meta.json", {
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "features": model.features,
+        "inputs": model.inputs,
+        "data": data,
+        "metrics": metrics,
+    })
+    index["versions"].append(version)
+    _write_json(root / INDEX_NAME, index)
+    if activate:
+        activate_version(version, root, export_path)
+    return version
+
+
+def activate_version(version, root=MODEL_REGISTRY_DIR, export_path=MODEL_EXPORT_PATH):
+    """Make a registered version the one scoring and the API use."""
+    root = Path(root)
+    _check(version, root)
+    export_path = Path(export_path)
+    export_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = export_path.with_name(export_path.name + ".part")
+    shutil.copyfile(model_path(version, root), tmp)
+    os.replace(tmp, export_path)
+    index = load_index(root)
+    index["active"] = version
+    _write_json(root / INDEX_NAME, index)
+
+
+def resolve(names, root=MODEL_REGISTRY_DIR):
+    """Version names from a CLI/pipeline list, where "all" means every registered version."""
+    names = list(names or [])
+    if "all" in names:
+        return versions(root)
+    for name in names:
+        _check(name, root)
+    return list(dict.fromkeys(names))
+
+
+def summary(root=MODEL_REGISTRY_DIR):
+    """One row per version: features, data fingerprint and headline metrics."""
+    active = active_version(root)
+    rows = []
+    for version in versions(root):
+        meta = load_meta(version, root)
+        data = meta.get("data") or {}
+        rows.append({
+            "version": version,
+            "active": version == active,
+            "created_at": meta["created_at"],
+            "features": len(meta["features"]),
+            "data_sha256": (data.get("sha256") or "")[:12],
+            **{m: meta["metrics"].get(m) for m in SUMMARY_METRICS},
+        })
+    return rows
+
+
+def main():
+    args = options.parser("registry").parse_args()
+
+    if args.activate:
+        activate_version(args.activate)
+        print(f"✅ Active model: {args.activate} (copied to {MODEL_EXPORT_PATH}); rescore to apply it")
+    elif args.show:
+        print(json.dumps(load_meta(args.show), indent=2))
+    else:
+        rows = summary()
+        if not rows:
+            print(f"No models registered in {MODEL_REGISTRY_DIR}; run train_xg.py first")
+            return
+        import pandas as pd
+        print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
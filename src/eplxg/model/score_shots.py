@@ -1,26 +1,100 @@
+import sys
 from pathlib import Path
-import joblib
-import pandas as pd
 
-GOLD_PATH = Path("data/gold/shots_features_2015_16.parquet")
-MODEL_PATH = Path("models/xg_lite_logreg.joblib")
-OUT_PATH = Path("data/gold/shots_scored_2015_16.parquet")
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-def main():
-    df = pd.read_parquet(GOLD_PATH)
-    model = joblib.load(MODEL_PATH)
+import numpy as np
+import pyarrow as pa
+
+from eplxg import datasets, instrument, options
+from eplxg.config import BATCH_ROWS, GOLD_FEATURES, GOLD_SCORED, MODEL_EXPORT_PATH
+from eplxg.model import registry
+from eplxg.model.linear import load_model
+from eplxg.transform.features_shots import FEATURES_SCHEMA
+
+SCORED_SCHEMA = FEATURES_SCHEMA.append(pa.field("xg", pa.float32()))  # computed in float64
+
+
+def scored_schema(compare=()):
+    """SCORED_SCHEMA plus one xg_<version> column per compared registry version."""
+    return pa.schema(list(SCORED_SCHEMA) + [pa.field(registry.column(v), pa.float32()) for v in compare])
+
+
+def load_compare(names):
+    """{version: model} for registry versions named on the command line ("all" for every one)."""
+    return {v: registry.load_version(v) for v in registry.resolve(names)}
+
+
+def _models(model, compare):
+    # Output column -> model; the active model's column is plain `xg`
+    return {"xg": model, **{registry.column(v): m for v, m in (compare or {}).items()}}
+
+
+def score_shots(df, model, compare=None):
+    """Add an `xg` column with the model's goal probability for each shot.
+
+    compare: {version: model} of registry versions scored alongside, as xg_<version> columns.
+    """
+    for col, m in _models(model, compare).items():
+        df[col] = m.predict_proba(df[m.inputs].astype(float))[:, 1].astype(np.float32)
+    return df
 
-    feature_cols = ["distance", "angle", "is_header", "is_penalty"]
-    X = df[feature_cols].astype(float)
 
-    df["xg"] = model.predict_proba(X)[:, 1]
+def score_batch(batch, model, compare=None):
+    """Score one Arrow record batch of gold features. Returns a table with `xg` (and xg_<version>) appended.
 
-    df.to_parquet(OUT_PATH, index=False)
+    Every model reads its inputs from the same decoded columns.
+    """
+    models = _models(model, compare)
+    with instrument.span("score_batch", rows_in=batch.num_rows, models=len(models)):
+        names = dict.fromkeys(name for m in models.values() for name in m.inputs)
+        columns = {name: batch.column(name).to_numpy(zero_copy_only=False) for name in names}
+        table = pa.Table.from_batches([batch])
+        for col, m in models.items():
+            table = table.append_column(col, pa.array(m.score(columns).astype(np.float32)))
+        return table
 
-    print(f"✅ Scored shots saved to {OUT_PATH}")
+
+def write_scored(model, features_dir=GOLD_FEATURES, out_dir=GOLD_SCORED, batch_rows=BATCH_ROWS, compare=None):
+    """Stream the gold features dataset through the model in record batches. Returns the row count.
+
+    compare: {version: model} scored in the same pass (see score_batch).
+    """
+    batches = datasets.iter_batches(features_dir, columns=FEATURES_SCHEMA.names, batch_size=batch_rows)
+    return datasets.write_dataset((score_batch(b, model, compare) for b in batches), out_dir,
+                                  scored_schema(compare or ()))
+
+
+def update_scored(model, match_ids, features_dir=GOLD_FEATURES, out_dir=GOLD_SCORED, compare=None):
+    """Rescore match_ids only and merge them into the scored dataset. Returns their new rows.
+
+    For when only those matches' features changed and the models did not;
+    matches without features any more are removed.
+    """
+    features = datasets.read_table(features_dir, columns=FEATURES_SCHEMA.names, match_ids=match_ids)
+    batches = features.to_batches(max_chunksize=BATCH_ROWS)
+    table = (pa.concat_tables([score_batch(b, model, compare) for b in batches]) if batches
+             else scored_schema(compare or ()).empty_table())
+    datasets.replace_matches(out_dir, table, match_ids)
+    return table
+
+
+def main():
+    args = options.parser("score").parse_args()
+
+    with instrument.run("score_shots") as step:
+        model = load_model(args.model)
+        compare = load_compare(args.compare)
+
+        n = write_scored(model, batch_rows=args.batch_rows, compare=compare)
+        step.add(rows_out=n)
+
+    print(f"✅ Scored {n} shots saved to {GOLD_SCORED}")
     print("Example rows:")
-    print(df[["player", "xg", "is_goal"]].head())
+    print(datasets.dataset(GOLD_SCORED).head(5, columns=["player", "xg", *map(registry.column, compare), "is_goal"])
+          .to_pandas())
 
 if __name__ == "__main__":
     main()
-
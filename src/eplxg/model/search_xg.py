@@ -0,0 +1,220 @@
+"""Cross-validated model search for the xG trainer.
+
+Every candidate (model family x feature set x hyperparameters) is fitted
+once per fold. With several seasons, each fold holds out one whole season;
+otherwise it is stratified k-fold. Each (candidate, fold) fit is one task
+on a process pool. Workers get the feature matrix once, at startup, and
+each task just names its candidate and fold, so a 50-season grid costs
+one pickle of the data per worker rather than one per fit.
+
+The selected model is the exportable candidate with the lowest mean log
+loss. Exportable means a logistic regression, which the NumPy scorer can
+evaluate. Other families are cross-validated alongside it for comparison.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import brier_score_loss, log_loss, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from threadpoolctl import threadpool_limits
+
+from eplxg import instrument
+from eplxg.model.linear import INTERACTIONS, add_interactions
+
+# Interaction features added to the base columns
+FEATURE_SETS = {
+    "base": [],
+    "distance_x_angle": ["distance_x_angle"],
+    "all_interactions": list(INTERACTIONS),
+}
+FAMILIES = {
+    "logreg": {
+        "exportable": True,
+        "feature_sets": list(FEATURE_SETS),
+        "grid": [{"C": c} for c in (0.01, 0.1, 1.0, 10.0)],
+    },
+    # Trees find interactions themselves, so they only see the base columns
+    "hist_gb": {
+        "exportable": False,
+        "feature_sets": ["base"],
+        "grid": [{"learning_rate": 0.05, "max_leaf_nodes": 15}, {"learning_rate": 0.1, "max_leaf_nodes": 31}],
+    },
+}
+N_FOLDS = 5
+SEED = 42
+METRICS = ["log_loss", "brier_score", "roc_auc"]
+
+
+def make_estimator(family, params):
+    if family == "logreg":
+        return LogisticRegression(max_iter=2000, **params)
+    if family == "hist_gb":
+        return HistGradientBoostingClassifier(max_iter=200, early_stopping=False, random_state=SEED, **params)
+    raise ValueError(f"Unknown model family {family!r}")
+
+
+def candidates(base_features, families=FAMILIES):
+    """Every grid point of every family, as dicts with a readable name."""
+    out = []
+    for family, spec in families.items():
+        for feature_set in spec["feature_sets"]:
+            for params in spec["grid"]:
+                label = " ".join(f"{k}={v}" for k, v in params.items())
+                out.append({"name": f"{family} {feature_set} {label}", "family": family, "params": params,
+                            "feature_set": feature_set, "features": base_features + FEATURE_SETS[feature_set],
+                            "exportable": spec["exportable"]})
+    return out
+
+
+def assign_folds(y, groups=None, n_folds=N_FOLDS, seed=SEED):
+    """(fold number for each row, a label per fold, scheme name).
+
+    With more than one distinct group (season), every group is its own fold;
+    otherwise rows are split into stratified k-folds.
+    """
+    if groups is not None and len(set(groups)) > 1:
+        labels, fold = np.unique(np.asarray(groups), return_inverse=True)
+        return fold, [str(label) for label in labels], "leave-one-season-out"
+    fold = np.empty(len(y), dtype=np.int64)
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    for k, (_, val) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        fold[val] = k
+    return fold, [f"fold {k}" for k in range(n_folds)], f"stratified {n_folds}-fold"
+
+
+def fold_metrics(y, p):
+    return {
+        "log_loss": float(log_loss(y, p, labels=[0, 1])),
+        "brier_score": float(brier_score_loss(y, p)),
+        # Undefined when a held-out season has no goals (or only goals)
+        "roc_auc": float(roc_auc_score(y, p)) if 0 < y.sum() < len(y) else None,
+    }
+
+
+# ---- Pool workers ----
+# Set once per worker by _init_worker: base + interaction columns, target and fold of every row
+
+_data = {}
+
+
+def _init_worker(columns, y, fold, limit_threads=True):
+    _data["columns"] = add_interactions(columns, list(INTERACTIONS))
+    _data["y"] = y
+    _data["fold"] = fold
+    if limit_threads:
+        # One fit per core: BLAS/OpenMP threads inside each fit would oversubscribe
+        threadpool_limits(1)
+
+
+def _fit_fold(candidate, k):
+    # Built per task (~1% of a fit) rather than cached: many workers x feature sets adds up
+    X = np.column_stack([_data["columns"][f] for f in candidate["features"]])
+    y = _data["y"]
+    train = _data["fold"] != k
+    start = time.perf_counter()
+    model = make_estimator(candidate["family"], candidate["params"]).fit(X[train], y[train])
+    fit_s = time.perf_counter() - start
+    p = model.predict_proba(X[~train])[:, 1]
+    return {"rows_train": int(train.sum()), "rows_val": int((~train).sum()), "fit_s": round(fit_s, 4),
+            **fold_metrics(y[~train], p)}
+
+
+def _fit_fold_measured(task):
+    return instrument.measure(_fit_fold, *task)
+
+
+# ---- Search ----
+
+def summarise(folds):
+    out = {}
+    for name in METRICS:
+        values = [f[name] for f in folds if f[name] is not None]
+        out[name] = {"mean": float(np.mean(values)), "std": float(np.std(values))} if values else None
+    return out
+
+
+def search(df, base_features, groups=None, n_folds=N_FOLDS, workers=None, families=FAMILIES):
+    """Cross-validate every candidate. Returns (ranked candidate results, fold scheme description).
+
+    `groups` (one label per row, e.g. "2:27") switches to leave-one-group-out.
+    Candidates are ranked by mean log loss, best first.
+    """
+    columns = {name: df[name].to_numpy(dtype=np.float64) for name in base_features}
+    y = df["is_goal"].to_numpy(dtype=np.int64)
+    fold, labels, scheme = assign_folds(y, groups, n_folds)
+    grid = candidates(base_features, families)
+    # Slowest fits first, so the pool is not left waiting on a few long trees at the end
+    grid.sort(key=lambda c: c["exportable"])
+    tasks = [(c, k) for c in grid for k in range(len(labels))]
+
+    if workers == 1:
+        _init_worker(columns, y, fold, limit_threads=False)
+        results = map(_fit_fold_measured, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                                   initargs=(columns, y, fold))
+        results = pool.map(_fit_fold_measured, tasks)
+    per_candidate = {c["name"]: [] for c in grid}
+    try:
+        for (candidate, k), (result, sample) in zip(tasks, results):
+            instrument.record("cv_fit", sample, {"candidate": candidate["name"], "fold": labels[k]},
+                              rows_in=result["rows_train"])
+            per_candidate[candidate["name"]].append({"fold": labels[k], **result})
+    finally:
+        if workers != 1:
+            pool.shutdown()
+        _data.clear()
+
+    ranked = []
+    for c in grid:
+        folds = per_candidate[c["name"]]
+        ranked.append({**{k: c[k] for k in ("name", "family", "params", "feature_set", "features", "exportable")},
+                       "cv": summarise(folds), "folds": folds})
+    ranked.sort(key=lambda r: r["cv"]["log_loss"]["mean"])
+    return ranked, scheme
+
+
+def search_model(df, base_features, groups=None, n_folds=N_FOLDS, workers=None, families=FAMILIES):
+    """Search, then refit the best exportable candidate on every row.
+
+    Returns (model, its feature list, metrics). The headline metrics are the
+    selected candidate's cross-validated means; `search` holds every
+    candidate's per-fold results.
+    """
+    with instrument.span("cv_search"):
+        ranked, scheme = search(df, base_features, groups, n_folds, workers, families)
+    best = next((r for r in ranked if r["exportable"]), None)
+    if best is None:
+        raise ValueError("No exportable model family in the search grid")
+
+    columns = add_interactions({name: df[name].to_numpy(dtype=np.float64) for name in base_features},
+                               FEATURE_SETS[best["feature_set"]])
+    X = np.column_stack([columns[f] for f in best["features"]])
+    y = df["is_goal"].to_numpy(dtype=np.int64)
+    model = make_estimator(best["family"], best["params"])
+    with instrument.span("fit", rows_in=len(y)):
+        model.fit(X, y)
+
+    cv = best["cv"]
+    metrics = {
+        "rows_total": int(len(df)),
+        "rows_train": int(len(df)),
+        "rows_val": int(len(df)),  # every row is held out exactly once
+        "goal_rate": float(y.mean()),
+        **{name: cv[name]["mean"] if cv[name] else None for name in METRICS},
+        "features": best["features"],
+        "coefficients": dict(zip(best["features"], model.coef_[0].tolist())),
+        "intercept": float(model.intercept_[0]),
+        "search": {
+            "scheme": scheme,
+            "folds": len(best["folds"]),
+            "selected": best["name"],
+            "best_overall": ranked[0]["name"],
+            "candidates": ranked,
+        },
+    }
+    return model, best["features"], metrics
@@ -0,0 +1,189 @@
+"""Local xG scoring service.
+
+Loads the exported model once and scores shots over HTTP (TCP or a Unix
+socket). Shots are sent as JSON with the raw event fields:
+
+    POST /score  {"x": 108.0, "y": 38.5, "body_part": "Right Foot", "technique": "Normal"}
+                 -> {"xg": 0.21}
+    POST /score  [{"x": ...}, ...]  or  {"shots": [...]}
+                 -> {"xg": [0.21, ...]}
+    GET  /health -> {"status": "ok", ...}
+
+Features are computed with features_shots.shot_features, like the batch
+pipeline. Shots without a location score as null. Requests that arrive
+together are merged into one vectorized micro-batch.
+"""
+import json
+import math
+import queue
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from eplxg import options
+from eplxg.config import MAX_BATCH, MAX_WAIT_MS, MODEL_EXPORT_PATH
+from eplxg.model.linear import load_model
+from eplxg.transform.features_shots import shot_features
+
+SHOT_FIELDS = ["x", "y", "body_part", "technique"]
+TIMEOUT_S = 10.0
+
+
+class MicroBatcher:
+    """Score shot lists from many threads in shared vectorized batches.
+
+    A single worker thread takes everything queued (up to max_batch shots,
+    waiting at most max_wait_ms for more), scores it in one call and hands
+    each caller its slice.
+    """
+
+    def __init__(self, model, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.shots = 0
+        threading.Thread(target=self._run, name="xg-batcher", daemon=True).start()
+
+    def submit(self, shots):
+        """Queue a list of shot dicts. Returns a Future of the list of xG values."""
+        future = Future()
+        self.queue.put((shots, future))
+        return future
+
+    def _collect(self):
+        pending = [self.queue.get()]
+        n = len(pending[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while n < self.max_batch:
+            try:
+                timeout = deadline - time.perf_counter()
+                item = self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            pending.append(item)
+            n += len(item[0])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            try:
+                xg = self.score([shot for shots, _ in pending for shot in shots])
+            except Exception as exc:
+                for _, future in pending:
+                    future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.shots += len(xg)
+            start = 0
+            for shots, future in pending:
+                future.set_result(xg[start:start + len(shots)])
+                start += len(shots)
+
+    def score(self, shots):
+        columns = {field: [shot.get(field) for shot in shots] for field in SHOT_FIELDS}
+        features = shot_features(columns["x"], columns["y"], columns["body_part"], columns["technique"])
+        return [None if math.isnan(p) else p for p in self.model.score(features).tolist()]
+
+
+def parse_shots(payload):
+    """Request body -> (list of shot dicts, whether a single shot was sent)."""
+    single = isinstance(payload, dict) and "shots" not in payload
+    shots = [payload] if single else payload.get("shots") if isinstance(payload, dict) else payload
+    if not isinstance(shots, list) or not all(isinstance(s, dict) for s in shots):
+        raise ValueError("expected a shot object, a list of shots or {\"shots\": [...]}")
+    for shot in shots:
+        for field in ("x", "y"):
+            value = shot.get(field)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                raise ValueError(f"{field} must be a number or null, got {value!r}")
+    return shots, single
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+    # Headers and body go out in separate writes; with Nagle on, the body
+    # waits for the client's delayed ACK (~40ms per response)
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._send(404, {"error": f"unknown path {self.path}"})
+        batcher = self.server.batcher
+        self._send(200, {"status": "ok", "features": batcher.model.features,
+                         "batches": batcher.batches, "shots": batcher.shots})
+
+    def do_POST(self):
+        if self.path != "/score":
+            return self._send(404, {"error": f"unknown path {self.path}"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            shots, single = parse_shots(json.loads(self.rfile.read(length)))
+        except ValueError as exc:  # includes malformed JSON
+            return self._send(400, {"error": str(exc)})
+        xg = self.server.batcher.submit(shots).result(timeout=TIMEOUT_S)
+        self._send(200, {"xg": xg[0] if single else xg})
+
+    def log_message(self, format, *args):
+        pass  # one line per request would dominate the latency
+
+
+class UnixHandler(Handler):
+    disable_nagle_algorithm = False  # TCP-only socket option
+
+
+class UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def make_server(batcher, host="127.0.0.1", port=8000, socket_path=None):
+    if socket_path:
+        Path(socket_path).unlink(missing_ok=True)
+        server = UnixHTTPServer(str(socket_path), UnixHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+    server.batcher = batcher
+    return server
+
+
+def main():
+    args = options.parser("serve").parse_args()
+
+    batcher = MicroBatcher(load_model(args.model), args.max_batch, args.max_wait_ms)
+    server = make_server(batcher, args.host, args.port, args.socket)
+    where = args.socket or f"http://{args.host}:{server.server_address[1]}"
+    print(f"✅ Serving xG model {args.model} on {where}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Out-of-core trainer for the xG logistic regression.
+
+Fits the same model as train_xg: L2-regularised logistic regression with
+sklearn's default C=1. It uses Newton's method over record batches. Each
+pass streams the gold features dataset once and keeps only the gradient
+and the small (features + 1)^2 Hessian. Memory is therefore bounded by one
+batch however many seasons there are. A cold fit takes 6-8 passes; starting
+from the previous coefficients usually takes 2-3.
+
+Matches are split by id: every VAL_EVERY-th match is held out, so the split
+does not move as matches are added. Held-out log loss, Brier score and a
+binned ROC-AUC are accumulated in the same passes, so evaluation costs no
+extra read.
+
+`update` folds in only the matches the saved state has not seen. The old
+data enters as a quadratic penalty around the previous coefficients, with
+the saved Hessian as curvature (its Laplace approximation). A new
+matchweek then costs a few passes over that matchweek alone; with no new
+training rows it leaves the state as it is. A full `fit` resets the
+approximation.
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pyarrow.dataset as ds
+from sklearn.linear_model import LogisticRegression
+
+from eplxg import datasets, instrument
+
+C = 1.0  # inverse L2 strength, as sklearn's LogisticRegression default
+VAL_EVERY = 5  # match_id % VAL_EVERY == 0 -> held out
+MAX_PASSES = 25
+TOL = 1e-8  # largest coefficient change that counts as converged
+AUC_BINS = 10_000
+BATCH_ROWS = 131_072
+STATE_FORMAT = "eplxg-stream-state"
+
+
+class StreamingMetrics:
+    """Log loss, Brier score and ROC-AUC accumulated batch by batch.
+
+    AUC comes from per-bin goal/non-goal counts of the predicted probability,
+    exact up to ties within a 1/AUC_BINS-wide bin.
+    """
+
+    def __init__(self, bins=AUC_BINS):
+        self.n = 0
+        self.goals = 0
+        self.log_loss = 0.0
+        self.brier = 0.0
+        self.pos = np.zeros(bins, dtype=np.int64)
+        self.neg = np.zeros(bins, dtype=np.int64)
+
+    def update(self, y, p):
+        eps = np.finfo(np.float64).eps
+        q = np.clip(p, eps, 1 - eps)
+        self.n += len(y)
+        self.goals += int(y.sum())
+        self.log_loss -= float(np.sum(y * np.log(q) + (1 - y) * np.log1p(-q)))
+        self.brier += float(np.sum((p - y) ** 2))
+        b = np.minimum((p * len(self.pos)).astype(np.int64), len(self.pos) - 1)
+        self.pos += np.bincount(b[y == 1], minlength=len(self.pos))
+        self.neg += np.bincount(b[y == 0], minlength=len(self.neg))
+
+    def roc_auc(self):
+        n_pos, n_neg = self.pos.sum(), self.neg.sum()
+        if n_pos == 0 or n_neg == 0:
+            return None
+        # Each goal beats every non-goal in a lower bin and ties half of its own bin
+        below = np.cumsum(self.neg) - self.neg
+        return float((self.pos * below).sum() + 0.5 * (self.pos * self.neg).sum()) / (n_pos * n_neg)
+
+    def result(self):
+        if self.n == 0:
+            return {"rows_val": 0, "log_loss": None, "brier_score": None, "roc_auc": None}
+        return {"rows_val": self.n, "log_loss": self.log_loss / self.n, "brier_score": self.brier / self.n,
+                "roc_auc": self.roc_auc()}
+
+
+def _expit(z):
+    with np.errstate(over="ignore"):
+        return 1.0 / (1.0 + np.exp(-z))
+
+
+def newton_pass(batches, features, coef):
+    """One streaming pass at `coef` (intercept first).
+
+    Returns (gradient, Hessian, training rows, training goals, match ids seen,
+    held-out StreamingMetrics) of the unpenalised log loss.
+    """
+    d = len(features) + 1
+    grad, hess = np.zeros(d), np.zeros((d, d))
+    rows = goals = 0
+    matches = set()
+    val = StreamingMetrics()
+    for batch in batches:
+        X = np.column_stack([np.ones(batch.num_rows)]
+                            + [batch.column(f).to_numpy(zero_copy_only=False).astype(np.float64) for f in features])
+        y = batch.column("is_goal").to_numpy(zero_copy_only=False).astype(np.float64)
+        match_id = batch.column("match_id").to_numpy(zero_copy_only=False)
+        matches.update(np.unique(match_id).tolist())
+        p = _expit(X @ coef)
+        held = match_id % VAL_EVERY == 0
+        val.update(y[held], p[held])
+        train = ~held
+        X, y, p = X[train], y[train], p[train]
+        grad += X.T @ (p - y)
+        hess += (X * (p * (1 - p))[:, None]).T @ X
+        rows += len(y)
+        goals += int(y.sum())
+    return grad, hess, rows, goals, matches, val
+
+
+def newton(batches_fn, features, coef, prior_coef, prior_hess, max_passes=MAX_PASSES, tol=TOL):
+    """Minimise log loss + 0.5 (b - prior_coef)' prior_hess (b - prior_coef) by streaming Newton steps.
+
+    `batches_fn()` returns a fresh iterator of record batches for each pass.
+    Returns (coef, Hessian at the solution, last pass's stats, passes).
+    """
+    for passes in range(1, max_passes + 1):
+        with instrument.span("newton_pass") as span:
+            grad, hess, rows, goals, matches, val = newton_pass(batches_fn(), features, coef)
+            span.add(rows_in=rows + val.n)
+        if rows == 0:
+            raise ValueError("No training rows (every match is held out or already trained on)")
+        grad += prior_hess @ (coef - prior_coef)
+        hess += prior_hess
+        step = np.linalg.solve(hess, grad)
+        coef = coef - step
+        if np.abs(step).max() < tol:
+            break
+    # The final step is below tol, so the stats of this pass stand for the solution
+    return coef, hess, (rows, goals, matches, val), passes
+
+
+def _ridge(d, c=C):
+    """sklearn's L2 penalty 0.5 * ||w||^2 / C as a quadratic prior at zero; the intercept is unpenalised."""
+    penalty = np.eye(d) / c
+    penalty[0, 0] = 0.0
+    return np.zeros(d), penalty
+
+
+def _batches(features_dir, features, seasons=None, exclude_matches=None, batch_rows=BATCH_ROWS):
+    expr = datasets.make_filter(seasons)
+    if exclude_matches:
+        e = ~ds.field("match_id").isin(np.asarray(sorted(exclude_matches), dtype=np.int64))
+        expr = e if expr is None else expr & e
+    columns = features + ["is_goal", "match_id"]
+    return lambda: (b for b in datasets.iter_batches(features_dir, columns=columns, batch_size=batch_rows,
+                                                     filter=expr) if b.num_rows)
+
+
+def _training_rows(features_dir, seasons=None, exclude_matches=None):
+    """Rows newton would train on (not held out), reading only the match ids and labels."""
+    batches = _batches(features_dir, [], seasons, exclude_matches)
+    return sum(int(np.count_nonzero(b.column("match_id").to_numpy() % VAL_EVERY)) for b in batches())
+
+
+def fit(features_dir, features, seasons=None, warm_start=None, batch_rows=BATCH_ROWS):
+    """Exact streaming fit on every match. Returns (sklearn model, metrics, state).
+
+    `warm_start` (a saved state) only sets the starting coefficients.
+    """
+    prior_coef, prior_hess = _ridge(len(features) + 1)
+    coef = np.asarray(warm_start["coef"]) if warm_start and warm_start["features"] == features else prior_coef
+    coef, hess, stats, passes = newton(_batches(features_dir, features, seasons, batch_rows=batch_rows),
+                                       features, coef, prior_coef, prior_hess)
+    return _finish(features, coef, hess, stats, passes, "fit", rows_before=0, matches_before=set())
+
+
+def update(features_dir, features, state, seasons=None, batch_rows=BATCH_ROWS):
+    """Fold matches not in `state` into the model. Returns (sklearn model, metrics, state).
+
+    Returns None when there are no new training rows: the state and the model
+    it describes stand. Held-out metrics cover the new matches only. Matches
+    whose rows changed since they were trained on need a full `fit`.
+    """
+    if state["features"] != features:
+        raise ValueError(f"State was fitted on {state['features']}, not {features}; run a full fit")
+    seen = set(state["matches"])
+    if not _training_rows(features_dir, seasons, seen):
+        return None
+    prior_coef, prior_hess = np.asarray(state["coef"]), np.asarray(state["hessian"])
+    coef, hess, stats, passes = newton(_batches(features_dir, features, seasons, seen, batch_rows),
+                                       features, prior_coef, prior_coef, prior_hess)
+    return _finish(features, coef, hess, stats, passes, "update", rows_before=state["rows_train"],
+                   matches_before=seen)
+
+
+def _finish(features, coef, hess, stats, passes, method, rows_before, matches_before):
+    rows, goals, matches, val = stats
+    model = LogisticRegression(C=C)  # carries the coefficients for joblib/export, never fitted itself
+    model.classes_ = np.array([0, 1])
+    model.coef_ = coef[None, 1:]
+    model.intercept_ = coef[:1]
+    model.n_features_in_ = len(features)
+
+    metrics = {
+        "rows_total": rows + val.n,
+        "rows_train": rows,
+        "goal_rate": (goals + val.goals) / max(rows + val.n, 1),
+        **val.result(),
+        "features": features,
+        "coefficients": dict(zip(features, coef[1:].tolist())),
+        "intercept": float(coef[0]),
+        "training": {"method": f"streaming newton ({method})", "passes": passes,
+                     "validation": f"match_id % {VAL_EVERY} == 0"
+                                   + (" (new matches only)" if method == "update" else ""),
+                     "new_matches": len(matches), "rows_trained_total": rows_before + rows},
+    }
+    state = {"format": STATE_FORMAT, "features": features, "coef": coef.tolist(), "hessian": hess.tolist(),
+             "rows_train": rows_before + rows, "matches": sorted(matches_before | matches)}
+    return model, metrics, state
+
+
+def load_state(path):
+    path = Path(path)
+    if not path.exists():
+        return None
+    state = json.loads(path.read_text())
+    if state.get("format") != STATE_FORMAT:
+        raise ValueError(f"{path} is not a streaming trainer state")
+    return state
+
+
+def save_state(state, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
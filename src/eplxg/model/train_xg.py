@@ -1,28 +1,41 @@
 import json
+import sys
 from pathlib import Path
 
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
 import joblib
 import numpy as np
-import pandas as pd
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import log_loss, brier_score_loss, roc_auc_score
 from sklearn.model_selection import train_test_split
 
+from eplxg import datasets, instrument, options
+from eplxg.config import (
+    GOLD_FEATURES, METRICS_PATH, MODEL_EXPORT_PATH, MODEL_PATH, MODEL_REGISTRY_DIR, MODEL_STATE_PATH, PARTITION_COLS,
+    parse_season,
+)
+from eplxg.model import registry
+from eplxg.model.linear import export_model
 
-GOLD_PATH = Path("data/gold/shots_features_2015_16.parquet")
-MODELS_DIR = Path("models")
-REPORTS_DIR = Path("reports")
+# Simple feature set (fast + interpretable)
+FEATURE_COLS = ["distance", "angle", "is_header", "is_penalty"]
+# One row per shot; incremental feature updates reorder the gold dataset, so rows are sorted by
+# these before the split or folds are drawn (see training_frame)
+ORDER_COLS = PARTITION_COLS + ["match_id", "event_index"]
 
 
-def main():
-    MODELS_DIR.mkdir(parents=True, exist_ok=True)
-    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+def training_frame(df):
+    """df sorted by ORDER_COLS (those it has), so the same shots always give the same split and model."""
+    keys = [c for c in ORDER_COLS if c in df.columns]
+    return df.sort_values(keys, kind="stable", ignore_index=True) if keys else df
 
-    df = pd.read_parquet(GOLD_PATH)
 
-    # Simple feature set (fast + interpretable)
-    feature_cols = ["distance", "angle", "is_header", "is_penalty"]
-    X = df[feature_cols].astype(float)
+def train_model(df):
+    """Fit the xG model on a gold features frame. Returns (model, metrics)."""
+    X = df[FEATURE_COLS].astype(float)
     y = df["is_goal"].astype(int)
 
     # Train/valid split
@@ -31,7 +44,8 @@ def main():
     )
 
     model = LogisticRegression(max_iter=2000)
-    model.fit(X_train, y_train)
+    with instrument.span("fit", rows_in=len(X_train)):
+        model.fit(X_train, y_train)
 
     # Probabilities
     p_val = model.predict_proba(X_val)[:, 1]
@@ -44,24 +58,124 @@ def main():
         "log_loss": float(log_loss(y_val, p_val)),
         "brier_score": float(brier_score_loss(y_val, p_val)),
         "roc_auc": float(roc_auc_score(y_val, p_val)),
-        "features": feature_cols,
-        "coefficients": dict(zip(feature_cols, model.coef_[0].tolist())),
+        "features": FEATURE_COLS,
+        "coefficients": dict(zip(FEATURE_COLS, model.coef_[0].tolist())),
         "intercept": float(model.intercept_[0]),
     }
+    return model, metrics
 
-    # Save artifacts
-    model_path = MODELS_DIR / "xg_lite_logreg.joblib"
-    joblib.dump(model, model_path)
 
-    metrics_path = REPORTS_DIR / "metrics.json"
+def season_groups(df):
+    """'comp:season' label per row, or None when the frame has no partition columns."""
+    if not set(PARTITION_COLS) <= set(df.columns):
+        return None
+    comp, season = (df[c].astype("Int64").astype(str) for c in PARTITION_COLS)
+    return (comp + ":" + season).to_numpy()
+
+
+def search_model(df, n_folds=5, workers=None):
+    """Cross-validated search over model families, interactions and regularisation.
+
+    Returns (model, features, metrics); see search_xg. Folds hold out one
+    season at a time when df spans several seasons.
+    """
+    from eplxg.model import search_xg  # keeps the default training path light
+
+    return search_xg.search_model(df, FEATURE_COLS, season_groups(df), n_folds=n_folds, workers=workers)
+
+
+def stream_model(features_dir=GOLD_FEATURES, seasons=None, update=False, state_path=MODEL_STATE_PATH):
+    """Out-of-core fit that streams the gold dataset in record batches (see stream_xg).
+
+    Warm-starts from the saved state. With update=True only matches the state
+    has not seen are read. Returns (model, metrics) and saves the new state,
+    or None when an update finds no new matches (nothing is saved).
+    """
+    from eplxg.model import stream_xg
+
+    state = stream_xg.load_state(state_path)
+    if update and state is not None:
+        updated = stream_xg.update(features_dir, FEATURE_COLS, state, seasons)
+        if updated is None:
+            print(f"No new matches since the saved state ({len(state['matches'])} matches); model unchanged")
+            return None
+        model, metrics, state = updated
+    else:
+        model, metrics, state = stream_xg.fit(features_dir, FEATURE_COLS, seasons, warm_start=state)
+    stream_xg.save_state(state, state_path)
+    return model, metrics
+
+
+def training_data(df=None, seasons=None):
+    """Fingerprint of what a model was trained on: the frame, or the gold files it streamed."""
+    data = registry.frame_fingerprint(df) if df is not None else registry.files_fingerprint(GOLD_FEATURES, seasons)
+    return {**data, "seasons": None if seasons is None else [list(s) for s in seasons]}
+
+
+def save_artifacts(model, metrics, model_path=MODEL_PATH, metrics_path=METRICS_PATH,
+                   export_path=MODEL_EXPORT_PATH, features=FEATURE_COLS, data=None, registry_dir=MODEL_REGISTRY_DIR):
+    """Save the pickled model, its metrics and the exported scoring model. Returns the export.
+
+    The export is also registered as a new active version (see registry);
+    data is its training data fingerprint (training_data).
+    """
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    metrics_path.parent.mkdir(parents=True, exist_ok=True)
+
+    joblib.dump(model, model_path)
     with open(metrics_path, "w") as f:
         json.dump(metrics, f, indent=2)
+    linear = export_model(model, features, export_path)
+    registry.register(linear, metrics, data, root=registry_dir, export_path=export_path)
+    return linear
 
-    print(f"✅ Saved model: {model_path}")
-    print(f"✅ Saved metrics: {metrics_path}")
-    print(json.dumps(metrics, indent=2))
+
+def main():
+    parser = options.parser("train")
+    args = parser.parse_args()
+    if args.update and not args.stream:
+        parser.error("--update needs --stream")
+    if args.stream and args.search:
+        parser.error("--stream and --search are alternatives")
+    seasons = [parse_season(s) for s in args.season] or None
+
+    with instrument.run("train_xg") as step:
+        if args.stream:
+            streamed = stream_model(seasons=seasons, update=args.update)
+            if streamed is None:
+                return
+            (model, metrics), features = streamed, FEATURE_COLS
+            data = training_data(seasons=seasons)
+            step.add(rows_in=metrics["rows_total"])
+        else:
+            # Only the model columns are read, and only from the selected seasons
+            columns = FEATURE_COLS + ["is_goal"] + ORDER_COLS
+            df = training_frame(datasets.read_frame(GOLD_FEATURES, columns=columns, seasons=seasons))
+            data = training_data(df, seasons)
+            step.add(rows_in=len(df))
+            if args.search:
+                model, features, metrics = search_model(df, n_folds=args.folds, workers=args.workers)
+            else:
+                (model, metrics), features = train_model(df), FEATURE_COLS
+
+        # Save artifacts
+        save_artifacts(model, metrics, features=features, data=data)
+
+    print(f"✅ Saved model: {MODEL_PATH} (exported for scoring: {MODEL_EXPORT_PATH}, "
+          f"registered as {registry.active_version()})")
+    print(f"✅ Saved metrics: {METRICS_PATH}")
+    if args.search:
+        summary = metrics["search"]
+        print(f"Search ({summary['scheme']}, {len(summary['candidates'])} candidates): "
+              f"selected {summary['selected']}, best overall {summary['best_overall']}")
+        for c in summary["candidates"]:
+            cv = c["cv"]
+            auc = f"{cv['roc_auc']['mean']:.4f}" if cv["roc_auc"] else "n/a"
+            print(f"  {c['name']:<50} log loss {cv['log_loss']['mean']:.4f} ± {cv['log_loss']['std']:.4f}"
+                  f"  ROC-AUC {auc}")
+    else:
+        print(json.dumps(metrics, indent=2))
 
 
 if __name__ == "__main__":
     main()
-
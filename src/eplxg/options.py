@@ -0,0 +1,159 @@
+"""Command-line options of every stage script, keyed by `eplxg` command name.
+
+The stage modules import pandas, pyarrow, NumPy and friends at the top, so
+their parsers live here instead: `eplxg extract --help` (or a usage error)
+is answered from this module and config.py alone, and the stage is only
+imported once its arguments parse. Each stage's main() builds the same
+parser with `options.parser(<command>)`; checks that span several options
+stay in main().
+"""
+import argparse
+from pathlib import Path
+
+from eplxg.config import (
+    BASE_URL, BATCH_ROWS, BRONZE_DIR, MAX_BATCH, MAX_WAIT_MS, MODEL_EXPORT_PATH, SEED, SILVER_EVENTS, SILVER_SHOTS,
+    SIMS,
+)
+
+
+def _season(parser, help):
+    parser.add_argument("--season", action="append", default=[], metavar="COMP:SEASON", help=help)
+
+
+def _workers(parser, help):
+    parser.add_argument("--workers", type=int, default=None, help=help)
+
+
+def _update_matches(parser, help):
+    parser.add_argument("--update_matches", type=int, nargs="*", default=None, metavar="MATCH_ID", help=help)
+
+
+def _extract(parser, out, help):
+    parser.add_argument("--bronze_dir", type=Path, default=BRONZE_DIR)
+    parser.add_argument("--out", type=Path, default=out, help=help)
+    _workers(parser, "Parser processes (default: all cores; 1 = in-process)")
+
+
+def _ingest(parser):
+    parser.add_argument("--competition_id", type=int)
+    parser.add_argument("--season_id", type=int)
+    _season(parser, "Competition/season pair, e.g. 2:27 (repeatable)")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent downloads")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--base_url", default=BASE_URL,
+                        help="Open-data root URL (point at a local server for testing)")
+    parser.add_argument("--bronze_dir", type=Path, default=BRONZE_DIR)
+    parser.add_argument("--packed", action="store_true",
+                        help="Store each season's events in one compressed pack (packed/) instead of loose JSON; "
+                             "event files already downloaded are folded in")
+    parser.add_argument("--remove_json", action="store_true",
+                        help="With --packed, delete the loose event files once they are in a pack")
+
+
+def _extract_shots(parser):
+    _extract(parser, SILVER_SHOTS, "Silver shots dataset root")
+    parser.add_argument("--partition_by_match", action="store_true",
+                        help="Partition by match as well as competition/season")
+    _update_matches(parser, "Only re-extract these matches and merge them into the existing output "
+                            "(matches without a bronze file are removed)")
+
+
+def _features(parser):
+    _update_matches(parser, "Only recompute features for these matches and merge them into the existing output")
+
+
+def _train(parser):
+    _season(parser, "Train on these competition/seasons only (repeatable, default: all)")
+    parser.add_argument("--search", action="store_true",
+                        help="Cross-validate a grid of models and keep the best (default: one 80/20 split)")
+    parser.add_argument("--folds", type=int, default=5, help="Stratified folds when there is only one season")
+    _workers(parser, "Search processes (default: all cores)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Fit out of core, streaming record batches (warm-starts from the saved state)")
+    parser.add_argument("--update", action="store_true",
+                        help="With --stream: only fold in matches the saved model has not seen")
+
+
+def _registry(parser):
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--list", action="store_true", help="List registered versions (default)")
+    action.add_argument("--activate", metavar="VERSION", help="Score and serve with this version from now on")
+    action.add_argument("--show", metavar="VERSION", help="Print a version's metadata")
+
+
+def _score(parser):
+    parser.add_argument("--model", type=Path, default=MODEL_EXPORT_PATH, help="Exported model file")
+    parser.add_argument("--batch_rows", type=int, default=BATCH_ROWS)
+    parser.add_argument("--compare", action="append", default=[], metavar="VERSION",
+                        help="Also score this registered model version, as an xg_<version> column "
+                             "(repeatable; 'all' for every version)")
+
+
+def _serve(parser):
+    parser.add_argument("--model", type=Path, default=MODEL_EXPORT_PATH, help="Exported model file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--socket", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--max_batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max_wait_ms", type=float, default=MAX_WAIT_MS)
+
+
+def _aggregate(parser):
+    parser.add_argument("--memory_limit", help="DuckDB memory limit, e.g. 2GB (spills to disk beyond it)")
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--sims", type=int, default=SIMS,
+                        help="Monte Carlo replays per season for Goals − xG intervals (0 to skip)")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--model_version", metavar="VERSION",
+                        help="Base xg on this registered version's xg_<version> column instead of the active "
+                             "model's (it must have been scored with score_shots.py --compare)")
+    parser.add_argument("--update", action="store_true",
+                        help="Only fold in matches scored since the last run (and drop unscored ones) "
+                             "using the saved per-match state")
+    parser.add_argument("--replace", type=int, action="append", default=[], metavar="MATCH_ID",
+                        help="With --update: recompute this match's state too (e.g. after event corrections)")
+    parser.add_argument("--check", action="store_true",
+                        help="Compare the saved tables with a full recompute instead of writing anything")
+
+
+def _simulate(parser):
+    parser.add_argument("--sims", type=int, default=SIMS)
+    parser.add_argument("--seed", type=int, default=SEED)
+    _workers(parser, "Seasons simulated in parallel (default: all cores)")
+
+
+def _events(parser):
+    _extract(parser, SILVER_EVENTS, "Silver events dataset root")
+    _update_matches(parser, "Only re-extract these matches and merge them into the existing output "
+                            "(matches without a bronze file are removed)")
+
+
+def _none(parser):
+    pass
+
+
+# command -> (description, adds the arguments); the run/status/competitions commands parse their own
+OPTIONS = {
+    "ingest": (None, _ingest),
+    "extract": (None, _extract_shots),
+    "features": (None, _features),
+    "train": (None, _train),
+    "registry": ("List registered xG models or change the active one.", _registry),
+    "score": (None, _score),
+    "serve": (None, _serve),
+    "aggregate": (None, _aggregate),
+    "simulate": (None, _simulate),
+    "outcomes": (None, _none),
+    "heatmaps": (None, _none),
+    "shot_index": (None, _none),
+    "events": (None, _events),
+    "chain": (None, _none),
+}
+
+
+def parser(command):
+    """The ArgumentParser of a stage command (prog comes from sys.argv[0], as usual)."""
+    description, add = OPTIONS[command]
+    p = argparse.ArgumentParser(description=description)
+    add(p)
+    return p
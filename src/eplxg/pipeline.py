@@ -0,0 +1,625 @@
+"""Incremental, in-process pipeline runner.
+
+Stages run as function calls in one interpreter and hand their results to
+the next stage in memory; silver/gold intermediates are written to disk only
+when materialisation is on (the default).
+
+Each stage declares its input files, output files, source files and
+parameters. A run records, per stage, a key hashing all of those into
+`data/_pipeline_manifest.json`; stages whose key is unchanged (and whose
+outputs still exist) are skipped. File content hashes are cached by
+(size, mtime) so a no-op rerun only stats files.
+
+The extract, features, score, aggregate and events stages are incremental
+at match granularity: when only bronze match files changed, just those
+matches are re-extracted, their features recomputed and, as long as the
+model did not change (e.g. --skip train), rescored and folded into the
+aggregate tables.
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from eplxg import instrument  # noqa: E402
+from eplxg.config import (  # noqa: E402
+    AGGREGATE_STATE, BRONZE_DIR, BRONZE_EVENTS_DIR, BRONZE_PACKED_DIR, DATA_DIR, GOLD_FEATURES, GOLD_SCORED,
+    MATCH_OUTCOMES, MATCH_TEAM_METRICS, MATCHES_PATH, METRICS_PATH, MINUTE_METRICS, MINUTE_PLAY_PATTERN_METRICS,
+    MODEL_EXPORT_PATH, MODEL_PATH, MODEL_REGISTRY_DIR, PLAY_PATTERN_METRICS, PLAYER_HEATMAP,
+    PLAYER_CHAIN, PLAYER_METRICS, PLAYER_TEAM_CHAIN, PLAYER_TEAM_METRICS, PLAYERS_PATH, SEASON_HEATMAP, SEASONS_PATH,
+    SHOT_INDEX, SILVER_EVENTS, SILVER_SHOTS, TEAM_HEATMAP, TEAM_METRICS, TEAMS_PATH, XG_TABLE, parse_season,
+)
+
+SRC_DIR = Path(__file__).resolve().parent
+MANIFEST_PATH = DATA_DIR / "_pipeline_manifest.json"
+
+
+def _files(dataset_root):
+    return f"{dataset_root}/**/*.parquet"
+
+
+EVENTS_GLOB = f"{BRONZE_EVENTS_DIR}/*.json"
+PACKS_GLOB = f"{BRONZE_PACKED_DIR}/*.pack"
+BRONZE_INPUTS = [EVENTS_GLOB, PACKS_GLOB]  # loose and packed bronze events; either can be empty
+SILVER_FILES = _files(SILVER_SHOTS)
+FEATURES_FILES = _files(GOLD_FEATURES)
+SCORED_FILES = _files(GOLD_SCORED)
+AGG_FILES = [_files(p) for p in (TEAM_METRICS, PLAYER_METRICS, PLAYER_TEAM_METRICS, MATCH_TEAM_METRICS,
+                                  MINUTE_METRICS, PLAY_PATTERN_METRICS, MINUTE_PLAY_PATTERN_METRICS,
+                                  AGGREGATE_STATE)]
+OUTCOME_FILES = [_files(p) for p in (MATCH_OUTCOMES, XG_TABLE)]
+HEATMAP_FILES = [_files(p) for p in (SEASON_HEATMAP, TEAM_HEATMAP, PLAYER_HEATMAP)]
+EVENTS_FILES = _files(SILVER_EVENTS)
+CHAIN_FILES = [_files(p) for p in (PLAYER_CHAIN, PLAYER_TEAM_CHAIN)]
+SHOT_INDEX_FILES = [str(SHOT_INDEX / "shots.parquet")]
+
+DEFAULT_SEASONS = [(2, 27)]
+
+
+@dataclass
+class Stage:
+    name: str
+    func: object  # func(ctx, action)
+    script: str
+    inputs: list
+    outputs: list
+    params: dict = field(default_factory=dict)
+    per_match: bool = False  # can reprocess a subset of matches
+    deps: list = field(default_factory=list)  # shared modules the script imports
+    touches: list = field(default_factory=list)  # later stages' inputs it rewrites besides its outputs
+
+    @property
+    def code(self):
+        return [SRC_DIR / p for p in (self.script, *self.deps)]
+
+
+# ---- Stage implementations ----
+# Heavy imports stay inside the functions so that planning (and a no-op run)
+# never pays for pandas/sklearn/pyarrow.
+
+class Context:
+    """Values handed between stages, loaded from the materialised files when a stage was skipped."""
+
+    def __init__(self, materialize=True, base_url=None):
+        self.materialize = materialize
+        self.base_url = base_url
+        self.values = {}
+
+    def get(self, name):
+        if name not in self.values:
+            self.values[name] = LOADERS[name]()
+        return self.values[name]
+
+    def put(self, name, value):
+        self.values[name] = value
+
+
+def _read_dataset(root, arrow=False):
+    def load():
+        from eplxg import datasets
+        return datasets.read_table(root) if arrow else datasets.read_frame(root)
+    return load
+
+
+def _load_model():
+    from eplxg.model.linear import load_model
+    return load_model(MODEL_EXPORT_PATH)
+
+
+LOADERS = {
+    "silver": _read_dataset(SILVER_SHOTS, arrow=True),  # freeze frames stay Arrow arrays
+    "features": _read_dataset(GOLD_FEATURES),
+    "model": _load_model,
+    "scored": _read_dataset(GOLD_SCORED),
+    "events": _read_dataset(SILVER_EVENTS, arrow=True),
+}
+
+
+def run_ingest(ctx, action):
+    from eplxg.ingest import download_season
+
+    pairs = [tuple(p) for p in action.stage.params["seasons"]]
+    totals = download_season.download(pairs, base_url=ctx.base_url or download_season.BASE_URL,
+                                      packed=action.stage.params.get("packed", False))
+    instrument.add(rows_out=totals["downloaded"])
+
+
+def run_extract(ctx, action):
+    from eplxg import bronze
+    from eplxg.transform import extract_shots
+
+    match_seasons, seasons = extract_shots.load_match_seasons(BRONZE_DIR)
+    extract_shots.write_seasons(seasons)
+    extract_shots.write_matches(extract_shots.load_matches(BRONZE_DIR))
+    if action.matches is not None:
+        files = bronze.event_sources(BRONZE_DIR, match_ids=action.matches)
+        changed = extract_shots.update_shots(files, match_seasons, action.matches)
+        extract_shots.write_ids()
+        ctx.put("silver_changed", changed)
+        n = changed.num_rows
+        print(f"✅ Re-extracted {n} shots from {len(action.matches)} changed matches")
+    elif ctx.materialize:
+        # Stream straight to disk; the next stage reads it back season by season
+        files = bronze.event_sources(BRONZE_DIR)
+        n = extract_shots.write_shots(files, match_seasons)
+        extract_shots.write_ids()
+        print(f"✅ Extracted {n} shots")
+    else:
+        files = bronze.event_sources(BRONZE_DIR)
+        silver = extract_shots.extract_shots(files, match_seasons)
+        extract_shots.write_ids(silver)
+        ctx.put("silver", silver)
+        n = silver.num_rows
+        print(f"✅ Extracted {n} shots")
+    instrument.add(rows_in=len(files), rows_out=n)
+
+
+def run_features(ctx, action):
+    from eplxg.transform import features_shots
+
+    if action.matches is not None:
+        df = features_shots.update_features(action.matches, changed=ctx.values.get("silver_changed"))
+        n = len(df)
+        print(f"✅ Recomputed features for {n} shots")
+    elif ctx.materialize:
+        n = features_shots.write_features()
+        print(f"✅ Gold features: {n} rows")
+    else:
+        df = features_shots.build_features(ctx.get("silver"))
+        ctx.put("features", df)
+        n = len(df)
+        print(f"✅ Gold features: {n} rows, {int(df['is_goal'].sum())} goals")
+    instrument.add(rows_out=n)
+
+
+def run_train(ctx, action):
+    from eplxg import datasets
+    from eplxg.model import train_xg
+
+    mode = action.stage.params.get("mode")
+    if mode == "stream":
+        # Reads gold from disk batch by batch, warm-started from the last fit
+        (model, metrics), features = train_xg.stream_model(), train_xg.FEATURE_COLS
+        data = train_xg.training_data()
+        instrument.add(rows_in=metrics["rows_total"])
+        print(f"Streaming fit: {metrics['training']['passes']} passes")
+    else:
+        df = ctx.values.get("features")
+        if df is None:
+            columns = train_xg.FEATURE_COLS + ["is_goal"] + train_xg.ORDER_COLS
+            df = datasets.read_frame(GOLD_FEATURES, columns=columns)
+        df = train_xg.training_frame(df)
+        data = train_xg.training_data(df)
+        instrument.add(rows_in=len(df))
+        if mode == "search":
+            model, features, metrics = train_xg.search_model(df)
+            print(f"Selected {metrics['search']['selected']} ({metrics['search']['scheme']})")
+        else:
+            (model, metrics), features = train_xg.train_model(df), train_xg.FEATURE_COLS
+    # Downstream stages score with the exported model, never the sklearn object
+    # and each fit is registered as a new version (see registry)
+    ctx.put("model", train_xg.save_artifacts(model, metrics, features=features, data=data))
+    # ROC-AUC is None when no held-out fold had both goals and misses
+    auc = "n/a" if metrics["roc_auc"] is None else f"{metrics['roc_auc']:.4f}"
+    print(f"✅ Trained model: log loss {metrics['log_loss']:.4f}, ROC-AUC {auc}")
+
+
+def run_score(ctx, action):
+    from eplxg.model import registry, score_shots
+
+    compare = score_shots.load_compare(action.stage.params.get("compare"))
+    if action.matches is not None:
+        # Same models, new features for these matches only
+        n = score_shots.update_scored(ctx.get("model"), action.matches, compare=compare).num_rows
+    elif ctx.materialize:
+        n = score_shots.write_scored(ctx.get("model"), compare=compare)
+    else:
+        df = score_shots.score_shots(ctx.get("features").copy(), ctx.get("model"), compare=compare)
+        ctx.put("scored", df)
+        n = len(df)
+    instrument.add(rows_out=n)
+    print(f"✅ Scored {n} shots" + (f" (also as {', '.join(map(registry.column, compare))})" if compare else ""))
+
+
+def run_aggregate(ctx, action):
+    from eplxg.transform import aggregate_metrics
+
+    if action.matches is not None and aggregate_metrics.can_update():
+        # Fold the rescored matches into the saved tables through the per-match state
+        tables, summary = aggregate_metrics.update_metrics(action.matches, strict=False)
+        instrument.add(rows_in=summary.get("shots_read", 0), rows_out=sum(t.num_rows for t in tables.values()))
+        print(f"✅ Aggregates updated: {summary['added']} new, {summary['replaced']} replaced, "
+              f"{summary['removed']} removed matches")
+        return
+    # In-memory runs hand DuckDB the scored frame; otherwise it scans the parquet dataset itself
+    tables = aggregate_metrics.aggregate_metrics(ctx.values.get("scored"))
+    aggregate_metrics.save_metrics(tables)
+    instrument.add(rows_out=sum(t.num_rows for t in tables.values()))
+    print(f"✅ Aggregated {', '.join(tables)} saved.")
+
+
+def run_outcomes(ctx, action):
+    from eplxg.transform import match_outcomes
+
+    tables = match_outcomes.build_outcomes(ctx.values.get("scored"))
+    match_outcomes.save_outcomes(tables)
+    instrument.add(rows_out=tables["match_outcomes"].num_rows)
+    print(f"✅ Outcome probabilities for {tables['match_outcomes'].num_rows} matches saved.")
+
+
+def run_heatmaps(ctx, action):
+    from eplxg.transform import shot_heatmaps
+
+    tables = shot_heatmaps.build_heatmaps(ctx.values.get("scored"))
+    shot_heatmaps.save_heatmaps(tables)
+    instrument.add(rows_out=sum(t.num_rows for t in tables.values()))
+    print(f"✅ Shot heatmap tiles saved: {', '.join(f'{s} {t.num_rows} cells' for s, t in tables.items())}")
+
+
+def run_events(ctx, action):
+    from eplxg import bronze
+    from eplxg.transform import extract_events, extract_shots
+
+    match_seasons, _ = extract_shots.load_match_seasons(BRONZE_DIR)
+    if action.matches is not None:
+        files = bronze.event_sources(BRONZE_DIR, match_ids=action.matches)
+        n = extract_events.update_events(files, match_seasons, action.matches).num_rows
+        print(f"✅ Re-extracted {n} events from {len(action.matches)} changed matches")
+    elif ctx.materialize:
+        files = bronze.event_sources(BRONZE_DIR)
+        n = extract_events.write_events(files, match_seasons)
+        print(f"✅ Extracted {n} on-ball events")
+    else:
+        files = bronze.event_sources(BRONZE_DIR)
+        events = extract_events.extract_events(files, match_seasons)
+        ctx.put("events", events)
+        n = events.num_rows
+        print(f"✅ Extracted {n} on-ball events")
+    instrument.add(rows_in=len(files), rows_out=n)
+
+
+def run_chain(ctx, action):
+    from eplxg.transform import xg_chain
+
+    tables = xg_chain.build_chain(ctx.values.get("events"), ctx.values.get("scored"))
+    xg_chain.save_chain(tables)
+    instrument.add(rows_out=sum(t.num_rows for t in tables.values()))
+    print(f"✅ xG chain / buildup saved: {', '.join(f'{s} {t.num_rows} rows' for s, t in tables.items())}")
+
+
+def run_shot_index(ctx, action):
+    from eplxg.transform import similar_shots
+
+    index = similar_shots.build_index(ctx.values.get("scored"))
+    index.save()
+    instrument.add(rows_out=len(index))
+    print(f"✅ Similar-shot index over {len(index)} shots saved.")
+
+
+def build_stages(seasons, train_mode=None, packed=False, compare=()):
+    # Compared registry versions are score inputs: "all" tracks every registered model
+    compare_models = ([str(MODEL_REGISTRY_DIR / "*" / "model.json")] if "all" in compare
+                      else [str(MODEL_REGISTRY_DIR / v / "model.json") for v in compare])
+    return [
+        Stage("ingest", run_ingest, "ingest/download_season.py", inputs=[],
+              outputs=[str(BRONZE_DIR / f"matches_{c}_{s}.json") for c, s in seasons],
+              params={"seasons": [list(p) for p in seasons], **({"packed": True} if packed else {})},
+              deps=["bronze.py"], touches=BRONZE_INPUTS),
+        Stage("extract", run_extract, "transform/extract_shots.py", inputs=BRONZE_INPUTS,
+              outputs=[SILVER_FILES, str(SEASONS_PATH), str(MATCHES_PATH), str(TEAMS_PATH), str(PLAYERS_PATH)],
+              per_match=True, deps=["bronze.py", "datasets.py"]),
+        Stage("features", run_features, "transform/features_shots.py", inputs=[SILVER_FILES],
+              outputs=[FEATURES_FILES], per_match=True,
+              deps=["transform/geometry.py", "transform/freeze_frame.py", "datasets.py"]),
+        Stage("train", run_train, "model/train_xg.py", inputs=[FEATURES_FILES],
+              outputs=[str(MODEL_PATH), str(METRICS_PATH), str(MODEL_EXPORT_PATH),
+                       str(MODEL_REGISTRY_DIR / "index.json")],
+              params={"mode": train_mode} if train_mode else {},
+              deps=["model/linear.py", "model/search_xg.py", "model/stream_xg.py", "model/registry.py"]),
+        Stage("score", run_score, "model/score_shots.py",
+              inputs=[FEATURES_FILES, str(MODEL_EXPORT_PATH)] + compare_models,
+              outputs=[SCORED_FILES], params={"compare": list(compare)} if compare else {}, per_match=True,
+              deps=["model/linear.py", "model/registry.py", "datasets.py"]),
+        Stage("aggregate", run_aggregate, "transform/aggregate_metrics.py", inputs=[SCORED_FILES],
+              outputs=AGG_FILES, per_match=True, deps=["transform/simulate_xg.py", "datasets.py", "config.py"]),
+        Stage("outcomes", run_outcomes, "transform/match_outcomes.py", inputs=[SCORED_FILES, str(MATCHES_PATH)],
+              outputs=OUTCOME_FILES, deps=["datasets.py"]),
+        Stage("heatmaps", run_heatmaps, "transform/shot_heatmaps.py", inputs=[SCORED_FILES],
+              outputs=HEATMAP_FILES, deps=["transform/geometry.py", "datasets.py"]),
+        Stage("shot_index", run_shot_index, "transform/similar_shots.py", inputs=[SCORED_FILES],
+              outputs=SHOT_INDEX_FILES, deps=["transform/geometry.py", "datasets.py"]),
+        # Events come straight from bronze but sit last, after every stage that reads shots
+        Stage("events", run_events, "transform/extract_events.py", inputs=BRONZE_INPUTS, outputs=[EVENTS_FILES],
+              per_match=True, deps=["bronze.py", "datasets.py", "transform/extract_shots.py"]),
+        Stage("chain", run_chain, "transform/xg_chain.py", inputs=[EVENTS_FILES, SCORED_FILES],
+              outputs=CHAIN_FILES, deps=["datasets.py"]),
+    ]
+
+
+# ---- Hashing ----
+
+class FileHasher:
+    """sha256 of file contents, memoised on (size, mtime_ns) across runs."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __call__(self, path):
+        key = str(path)
+        st = os.stat(path)
+        hit = self.cache.get(key)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.cache[key] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+
+def _hidden(path):
+    # Staging directories inside datasets are not part of their content
+    return any(part.startswith(("_", ".")) for part in path.parts[1:])
+
+
+def expand(patterns):
+    files = []
+    for p in patterns:
+        if any(ch in p for ch in "*?["):
+            files.extend(sorted(str(f) for f in Path().glob(p) if not _hidden(f)))
+        elif Path(p).exists():
+            files.append(p)
+    return files
+
+
+def files_size(files):
+    return sum(os.path.getsize(f) for f in files)
+
+
+def digest(obj):
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode()).hexdigest()
+
+
+def input_digests(patterns, hasher):
+    """{input file: content digest} for the files matching patterns.
+
+    Each match in a bronze pack is its own input, "<pack>#<match_id>", so
+    per-match change detection works on either layout.
+    """
+    digests = {}
+    for f in expand(patterns):
+        if f.endswith(".pack"):
+            from eplxg import bronze  # only the index is read: no pyarrow
+            digests.update({f"{f}#{m}": e["sha256"] for m, e in bronze.open_pack(f).entries.items()})
+        else:
+            digests[f] = hasher(f)
+    return digests
+
+
+def stage_state(stage, hasher):
+    inputs = input_digests(stage.inputs, hasher)
+    code = {str(p.relative_to(SRC_DIR)): hasher(p) for p in stage.code}
+    setup = digest({"code": code, "params": stage.params, "outputs": stage.outputs})
+    return {"setup": setup, "inputs": inputs, "key": digest({"setup": setup, "inputs": inputs})}
+
+
+def match_id_of(path):
+    # events/<match_id>.json, or <pack>#<match_id> for a packed match
+    return int(path.rsplit("#", 1)[1]) if "#" in path else int(Path(path).stem)
+
+
+def match_digests(inputs):
+    """{match_id: digest of its events} from bronze input digests."""
+    # Packed matches first, so a loose file of the same match wins (as in bronze.event_sources)
+    return {match_id_of(f): inputs[f] for f in sorted(inputs, key=lambda f: "#" not in f)}
+
+
+def changed_matches(old_inputs, new_inputs):
+    """Match ids whose bronze events were added, changed or removed.
+
+    Compared per match, not per file, so moving a match into a pack unchanged is not a change.
+    """
+    old, new = match_digests(old_inputs), match_digests(new_inputs)
+    return sorted(m for m in old.keys() | new.keys() if old.get(m) != new.get(m))
+
+
+# ---- Manifest ----
+
+def load_manifest(path=MANIFEST_PATH):
+    if not path.exists():
+        return {"files": {}, "stages": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# ---- Planning ----
+
+@dataclass
+class Action:
+    stage: Stage
+    run: bool
+    reason: str
+    matches: list = None  # set for incremental runs
+    outputs_before: dict = None  # output pattern -> {file: hash} before this run
+
+
+def _upstream_matches(upstreams):
+    # Matches the upstream actions reprocess, or None if any of them runs in full
+    if not upstreams or any(a.matches is None for a in upstreams.values()):
+        return None
+    return sorted({m for a in upstreams.values() for m in a.matches})
+
+
+def incremental_matches(stage, state, record, upstreams):
+    """Match ids to reprocess for an incremental run, or None if a full run is needed."""
+    if not stage.per_match or record["setup"] != state["setup"]:
+        return None
+    if stage.inputs == BRONZE_INPUTS:
+        return changed_matches(record["inputs"], state["inputs"])
+    # Downstream of incremental stages: only valid if we last saw exactly the
+    # outputs they started from, and every other input is unchanged
+    matches = _upstream_matches(upstreams)
+    if matches is None or any(a.outputs_before is None for a in upstreams.values()):
+        return None
+    rewritten = set(expand(list(upstreams)))
+    before = {f: d for f, d in state["inputs"].items() if f not in rewritten}
+    for pattern, action in upstreams.items():
+        before.update(action.outputs_before[pattern])
+    return matches if before == record["inputs"] else None
+
+
+def plan_stage(stage, state, record, forced, upstreams, dry_run=False):
+    """Decide whether (and how) a stage runs.
+
+    upstreams: {input pattern: Action of an earlier stage that runs and rewrites it}.
+    """
+    if stage.name in forced:
+        return Action(stage, True, "forced")
+    if record is None:
+        return Action(stage, True, "never run")
+    missing = [o for o in stage.outputs if not expand([o])]
+    if missing:
+        return Action(stage, True, f"missing output {missing[0]}")
+    if record["key"] == state["key"]:
+        if dry_run and upstreams:
+            # Upstream has not produced its new output yet; assume it changes
+            matches = _upstream_matches(upstreams) if stage.per_match and record["setup"] == state["setup"] else None
+            return Action(stage, True, "upstream would change", matches=matches)
+        return Action(stage, False, "up to date")
+    if record["setup"] != state["setup"]:
+        return Action(stage, True, "code or parameters changed")
+    matches = incremental_matches(stage, state, record, upstreams)
+    if matches is not None:
+        return Action(stage, True, f"{len(matches)} matches changed", matches=matches)
+    return Action(stage, True, "inputs changed")
+
+
+def run(seasons=DEFAULT_SEASONS, forced=(), skip=(), dry_run=False, materialize=True, base_url=None, trace=None,
+        train_mode=None, packed=False, compare=()):
+    """Run the pipeline in this process. Returns the number of stages run.
+
+    With materialize=False every stage after ingest runs from scratch in memory
+    and only the model, metrics and aggregate tables are written. Real runs
+    leave a report in reports/runs/ (and a Chrome trace when trace is set).
+    train_mode is None (one 80/20 split), "search" or "stream"; see train_xg.
+    packed makes ingest write season packs instead of loose event files; see bronze.
+    compare names registry versions scored alongside the active model ("all" for every one).
+    """
+    stages = build_stages(seasons, train_mode=train_mode, packed=packed, compare=compare)
+    if train_mode == "stream" and not materialize:
+        raise SystemExit("Streaming training reads gold from disk; it cannot run with --no-materialize")
+    names = [s.name for s in stages]
+    forced = set(names if "all" in forced else forced)
+    unknown = (forced | set(skip)) - set(names)
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(names)}")
+    if not materialize:
+        forced |= set(names) - {"ingest"}
+
+    manifest = load_manifest()
+    hasher = FileHasher(manifest["files"])
+    ctx = Context(materialize=materialize, base_url=base_url)
+    producers = {}  # file pattern -> Action of the stage that rewrites it in this run
+    ran = 0
+    with contextlib.nullcontext() if dry_run else instrument.run("pipeline", trace=trace):
+        for stage in stages:
+            if stage.name in skip:
+                action = Action(stage, False, "skipped")
+            else:
+                with instrument.span("plan", stage=stage.name):
+                    state = stage_state(stage, hasher)
+                    record = manifest["stages"].get(stage.name)
+                    upstreams = {p: producers[p] for p in stage.inputs if p in producers}
+                    action = plan_stage(stage, state, record, forced, upstreams, dry_run=dry_run)
+
+            if dry_run:
+                verb = "run " if action.run else "skip"
+                extra = f" [{len(action.matches)} matches]" if action.matches is not None else ""
+                print(f"{verb} {stage.name:<10} {action.reason}{extra}")
+            elif action.run:
+                print(f"\nRunning: {stage.name} ({action.reason})\n")
+                with instrument.span(stage.name, reason=action.reason) as span:
+                    # Stage-level bytes are the sizes of its declared inputs and outputs
+                    span.add(bytes_read=files_size(expand(stage.inputs)))
+                    if materialize:
+                        action.outputs_before = {o: {f: hasher(f) for f in expand([o])} for o in stage.outputs}
+                    stage.func(ctx, action)
+                    span.add(bytes_written=files_size(expand(stage.outputs)))
+                ran += 1
+                if materialize:
+                    manifest["stages"][stage.name] = {**state, "finished_at": time.time()}
+                elif stage.name != "ingest":
+                    # Intermediates were not written, so what is on disk no longer
+                    # matches these outputs: the next materialised run must redo them
+                    manifest["stages"].pop(stage.name, None)
+                save_manifest(manifest)
+            if action.run:
+                producers.update((p, action) for p in stage.outputs + stage.touches)
+
+        if not dry_run:
+            save_manifest(manifest)
+    return ran
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the xG pipeline, skipping up-to-date stages.")
+    parser.add_argument("--season", action="append", default=[], metavar="COMP:SEASON",
+                        help="Competition/season to ingest (repeatable, default 2:27)")
+    parser.add_argument("--force", action="append", default=[], metavar="STAGE",
+                        help="Re-run a stage even if its inputs are unchanged ('all' for every stage)")
+    parser.add_argument("--skip", action="append", default=[], metavar="STAGE",
+                        help="Do not run a stage (e.g. --skip ingest to work offline)")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would run without running it")
+    parser.add_argument("--no-materialize", dest="materialize", action="store_false",
+                        help="Keep silver/gold intermediates in memory instead of writing them")
+    parser.add_argument("--base_url", help="Open-data root URL passed to the downloader")
+    parser.add_argument("--packed", action="store_true",
+                        help="Download events into one compressed pack per season instead of loose JSON files")
+    train = parser.add_mutually_exclusive_group()
+    train.add_argument("--search", dest="train_mode", action="store_const", const="search",
+                       help="Train by cross-validated model search instead of a single 80/20 split")
+    train.add_argument("--stream", dest="train_mode", action="store_const", const="stream",
+                       help="Train out of core from the gold dataset, warm-started from the previous fit")
+    parser.add_argument("--compare", action="append", default=[], metavar="VERSION",
+                        help="Also score this registered model version as xg_<VERSION> (repeatable, 'all')")
+    parser.add_argument("--trace", action="store_true", default=None,
+                        help=f"Also write a Chrome/Perfetto trace of the run (or set {instrument.TRACE_ENV}=1)")
+    parser.add_argument("--profile_depth", type=int, default=1,
+                        help="Span levels shown in the end-of-run timing table (0 to hide it)")
+    args = parser.parse_args(argv)
+
+    seasons = [parse_season(s) for s in args.season] or DEFAULT_SEASONS
+
+    start = time.perf_counter()
+    ran = run(seasons, forced=args.force, skip=args.skip, dry_run=args.dry_run,
+              materialize=args.materialize, base_url=args.base_url, trace=args.trace,
+              train_mode=args.train_mode, packed=args.packed, compare=args.compare)
+    if args.dry_run:
+        return
+    if args.profile_depth > 0:
+        print("\n" + instrument.summary(instrument.last_report(), depth=args.profile_depth))
+    print(f"\nPipeline complete: {ran} stage(s) run in {time.perf_counter() - start:.2f}s.")
+    print("Now run: streamlit run app/app.py")
+
+
+if __name__ == "__main__":
+    main()
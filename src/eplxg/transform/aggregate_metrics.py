@@ -1,57 +1,407 @@
+import json
+import sys
 from pathlib import Path
-import pandas as pd
 
-SCORED_PATH = Path("data/gold/shots_scored_2015_16.parquet")
-OUT_DIR = Path("data/gold")
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 
-def main():
-    df = pd.read_parquet(SCORED_PATH)
-
-    # Team aggregation
-    team_df = (
-        df.groupby("team")
-        .agg(
-            shots=("xg", "count"),
-            goals=("is_goal", "sum"),
-            xg=("xg", "sum"),
-        )
-        .reset_index()
-    )
-    team_df["goal_minus_xg"] = team_df["goals"] - team_df["xg"]
+from eplxg import datasets, instrument, options
+from eplxg.model import registry
+from eplxg.transform import simulate_xg
+from eplxg.transform.extract_shots import LABEL, NAME
+from eplxg.config import (
+    AGGREGATE_STATE, GOLD_SCORED, MATCH_PARTITION_COLS, MATCH_TEAM_METRICS, MINUTE_METRICS,
+    MINUTE_PLAY_PATTERN_METRICS, PARTITION_COLS, PLAY_PATTERN_METRICS, PLAYER_METRICS, PLAYER_TEAM_METRICS,
+    TEAM_METRICS,
+)
+
+# Columns of the scored dataset the aggregation reads, plus any xg_<version> columns
+SCORED_COLS = PARTITION_COLS + ["match_id", "team", "player", "minute", "play_pattern", "xg", "is_goal"]
+
+MINUTE_BUCKET = 15  # minutes; stoppage time past 90' falls in the last bucket
 
+# Output table -> grouping keys (on top of competition/season). All of them
+# come out of a single GROUPING SETS scan.
+GROUPINGS = {
+    "team_metrics": ["team"],
     # Player aggregation (overall)
-    player_df = (
-        df.groupby("player")
-        .agg(
-            shots=("xg", "count"),
-            goals=("is_goal", "sum"),
-            xg=("xg", "sum"),
-        )
-        .reset_index()
+    "player_metrics": ["player"],
+    # Player-by-team aggregation (enables team filter in dashboard)
+    "player_team_metrics": ["team", "player"],
+    "match_team_metrics": ["match_id", "team"],
+    "minute_metrics": ["minute_bucket"],
+    "play_pattern_metrics": ["play_pattern"],
+    "minute_play_pattern_metrics": ["minute_bucket", "play_pattern"],
+}
+OUT_PATHS = {
+    "team_metrics": TEAM_METRICS,
+    "player_metrics": PLAYER_METRICS,
+    "player_team_metrics": PLAYER_TEAM_METRICS,
+    "match_team_metrics": MATCH_TEAM_METRICS,
+    "minute_metrics": MINUTE_METRICS,
+    "play_pattern_metrics": PLAY_PATTERN_METRICS,
+    "minute_play_pattern_metrics": MINUTE_PLAY_PATTERN_METRICS,
+}
+KEYS = ["team", "player", "match_id", "minute_bucket", "play_pattern"]
+# What every grouping sums, as aggregates over shots. xg_var is the variance
+# of Goals − xG (Bernoulli shots): sum of xg(1 − xg), i.e. sum(xg) − sum(xg²).
+SHOT_SUMS = {
+    "shots": "count(xg)",
+    "goals": "sum(is_goal)::BIGINT",
+    "xg": "sum(xg)",
+    "xg_var": "sum(xg::DOUBLE * (1 - xg))",
+}
+# Partial state: those sums per match and (team, player, minute bucket, play
+# pattern) cell. Every grouping is a sum of these rows, so a match's rows are
+# what it adds to the tables, and what to take off when it is retracted.
+STATE_KEYS = ["match_id", "team", "player", "minute_bucket", "play_pattern"]
+STATE_TABLE = "aggregate_state"
+STATE_META = "_state.json"  # how the state was built (leading underscore: not part of the dataset)
+
+
+def state_schema(versions=()):
+    return pa.schema(
+        [(c, pa.int64()) for c in MATCH_PARTITION_COLS]
+        + [("team", NAME), ("player", NAME), ("minute_bucket", pa.int16()), ("play_pattern", LABEL)]
+        + [("shots", pa.int64()), ("goals", pa.int64()), ("xg", pa.float64()), ("xg_var", pa.float64())]
+        + [(registry.column(v), pa.float64()) for v in versions]
     )
-    player_df["goal_minus_xg"] = player_df["goals"] - player_df["xg"]
 
-    # Player-by-team aggregation (enables team filter in dashboard)
-    player_team_df = (
-        df.groupby(["team", "player"])
-        .agg(
-            shots=("xg", "count"),
-            goals=("is_goal", "sum"),
-            xg=("xg", "sum"),
-        )
-        .reset_index()
+
+def _grouping_id(keys):
+    # DuckDB's GROUPING(a, b, ...) sets a bit, first argument most significant,
+    # for every column that is *not* grouped in the row's grouping set
+    return sum(1 << (len(KEYS) - 1 - i) for i, k in enumerate(KEYS) if k not in keys)
+
+
+def _sums(versions, state):
+    """Aggregate expressions: SHOT_SUMS over shots, or plain sums over partial state rows."""
+    sums = {c: (f"sum({c})::BIGINT" if c in ("shots", "goals") else f"sum({c})") if state else expr
+            for c, expr in SHOT_SUMS.items()}
+    sums.update((c, f"sum({c})") for c in map(registry.column, versions))
+    return ",\n        ".join(f"{expr} AS {c}" for c, expr in sums.items())
+
+
+def _shots_cte(source, xg_col):
+    return f"""
+    WITH shots AS (
+        -- Categorical names (ENUMs when scanning a DataFrame) come out as plain strings either way
+        SELECT * REPLACE (team::VARCHAR AS team, player::VARCHAR AS player, play_pattern::VARCHAR AS play_pattern,
+                          {xg_col} AS xg),
+            (least(minute // {MINUTE_BUCKET}, {90 // MINUTE_BUCKET}) * {MINUTE_BUCKET})::SMALLINT AS minute_bucket
+        FROM {source}
+    )"""
+
+
+def grouping_sets_sql(source, versions=(), xg_col="xg", state=False):
+    """Every table's sums in one GROUPING SETS scan of source: scored shots, or partial state rows if state.
+
+    versions: registry versions with xg_<version> columns to sum alongside xg.
+    xg_col: the scored column aggregated as `xg` (another version's, to switch without rescoring).
+    """
+    partition = ", ".join(PARTITION_COLS)
+    sets = ",\n        ".join(f"({partition}, {', '.join(keys)})" for keys in GROUPINGS.values())
+    return f"""{"" if state else _shots_cte(source, xg_col)}
+    SELECT
+        {partition}, {", ".join(KEYS)},
+        GROUPING({", ".join(KEYS)}) AS grouping_id,
+        {_sums(versions, state)}
+    FROM {source if state else "shots"}
+    GROUP BY GROUPING SETS (
+        {sets}
     )
-    player_team_df["goal_minus_xg"] = player_team_df["goals"] - player_team_df["xg"]
+    """
+
+
+def partial_state_sql(source, versions=(), xg_col="xg"):
+    """Partial state rows (see STATE_KEYS) of the scored shots in source."""
+    keys = ", ".join(PARTITION_COLS + STATE_KEYS)
+    return f"""{_shots_cte(source, xg_col)}
+    SELECT
+        {keys},
+        {_sums(versions, state=False)}
+    FROM shots
+    GROUP BY {keys}
+    """
+
+
+def finish(sums, keys, versions=()):
+    """An output table from grouped sums: Goals − xG and its standard deviation, per compared version too."""
+    goals = sums["goals"]
+    cols = {c: sums[c] for c in PARTITION_COLS + keys + ["shots", "goals", "xg"]}
+    cols["goal_minus_xg"] = pc.subtract(goals, sums["xg"])
+    cols["goal_minus_xg_sd"] = pc.sqrt(pc.max_element_wise(sums["xg_var"], 0.0))
+    for c in map(registry.column, versions):
+        cols[c], cols[f"goal_minus_{c}"] = sums[c], pc.subtract(goals, sums[c])
+    return pa.table(cols).sort_by([(c, "ascending") for c in PARTITION_COLS + keys])
+
+
+def split_groupings(result):
+    """{table name: its rows of a grouping_sets_sql result}."""
+    return {name: result.filter(pc.equal(result["grouping_id"], _grouping_id(keys)))
+            for name, keys in GROUPINGS.items()}
+
+
+def connect(memory_limit=None, threads=None):
+    con = duckdb.connect()
+    if memory_limit:
+        # Larger-than-memory inputs spill to disk instead of failing
+        con.execute(f"SET memory_limit = '{memory_limit}'")
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    return con
+
+
+def _xg_col(versions, model_version):
+    if model_version is None:
+        return "xg"
+    if model_version not in versions:
+        raise ValueError(f"Scored data has no {registry.column(model_version)} column; "
+                         f"rescore with score_shots.py --compare {model_version}")
+    return registry.column(model_version)
+
+
+def aggregate_metrics(df=None, scored_dir=GOLD_SCORED, con=None, sims=simulate_xg.SIMS, seed=simulate_xg.SEED,
+                      model_version=None, state=True):
+    """All aggregate tables in one scan, as pyarrow tables keyed by table name.
+
+    Scans the given scored DataFrame, or the scored parquet dataset when df is None.
+    With sims > 0 the team/player tables also get Monte Carlo intervals and
+    p-values for Goals − xG (see simulate_xg).
+
+    Model versions scored side by side (score_shots --compare) get their own
+    xg_<version> / goal_minus_xg_<version> columns from the same scan.
+    model_version makes one of them the `xg` every column is based on.
+
+    With state, the per-match partial state comes back too, as
+    tables[STATE_TABLE]; save_metrics keeps it so update_metrics can fold in
+    new matches later.
+    """
+    con = con or connect()
+    names = df.columns if df is not None else datasets.dataset(scored_dir).schema.names
+    versions = registry.column_versions(names)
+    xg_col = _xg_col(versions, model_version)
+    if df is not None:
+        con.register("scored", df[SCORED_COLS + list(map(registry.column, versions))])
+        source = "scored"
+    else:
+        source = (f"read_parquet('{Path(scored_dir).as_posix()}/**/*.parquet', hive_partitioning = true, "
+                  f"hive_types = {{'competition_id': BIGINT, 'season_id': BIGINT}})")
+    with instrument.span("grouping_sets") as s:
+        result = con.execute(grouping_sets_sql(source, versions, xg_col)).to_arrow_table()
+        s.add(rows_out=result.num_rows)
+
+    tables = {name: finish(part, GROUPINGS[name], versions) for name, part in split_groupings(result).items()}
+    if sims:
+        with instrument.span("simulate", sims=sims):
+            simulated = simulate_xg.simulate(df, scored_dir, sims=sims, seed=seed, xg_col=xg_col)
+            tables = simulate_xg.attach(tables, simulated)
+    if state:
+        with instrument.span("partial_state") as s:
+            partials = con.execute(partial_state_sql(source, versions, xg_col)).to_arrow_table()
+            s.add(rows_out=partials.num_rows)
+        # How the state was built rides on its schema metadata until save_metrics writes it next to the state
+        meta = {"model_version": model_version, "versions": versions, "sims": sims, "seed": seed}
+        tables[STATE_TABLE] = partials.replace_schema_metadata({STATE_META: json.dumps(meta)})
+    return tables
+
+
+def load_state_meta(state_dir=AGGREGATE_STATE):
+    path = Path(state_dir) / STATE_META
+    if not path.exists():
+        raise FileNotFoundError(f"No aggregate state at {state_dir}; run aggregate_metrics.py without --update first")
+    return json.loads(path.read_text())
+
+
+def save_metrics(tables, state_dir=AGGREGATE_STATE):
+    for name, table in tables.items():
+        if name == STATE_TABLE:
+            meta = table.schema.metadata[STATE_META.encode()].decode()
+            datasets.write_dataset(table, state_dir, state_schema(json.loads(meta)["versions"]))
+            (Path(state_dir) / STATE_META).write_text(meta)
+        else:
+            datasets.write_dataset(table, OUT_PATHS[name], table.schema)
+
+
+def dataset_matches(root):
+    """{match_id: (competition_id, season_id)} of the matches in a dataset (reads only the keys)."""
+    keys = datasets.read_table(root, columns=MATCH_PARTITION_COLS).group_by(MATCH_PARTITION_COLS).aggregate([])
+    return {m: (c, s) for c, s, m in zip(*(keys[c].to_pylist() for c in MATCH_PARTITION_COLS))}
+
+
+def _merge_sql(keys, versions):
+    # Groups whose last shots were retracted drop out
+    cols = ["shots", "goals", "xg", "xg_var"] + list(map(registry.column, versions))
+    sums = ", ".join(f"sum({c})::BIGINT AS {c}" if c in ("shots", "goals") else f"sum({c}) AS {c}" for c in cols)
+    group = ", ".join(PARTITION_COLS + keys)
+    return f"""
+    SELECT {group}, {sums}
+    FROM (SELECT * FROM old UNION ALL BY NAME SELECT * FROM delta)
+    GROUP BY {group}
+    HAVING sum(shots) > 0
+    """
+
+
+def can_update(scored_dir=GOLD_SCORED, state_dir=AGGREGATE_STATE, sims=simulate_xg.SIMS, seed=simulate_xg.SEED,
+               model_version=None):
+    """True if the saved state was built with these settings and the scored data's versions, so
+    update_metrics gives what aggregate_metrics with them would."""
+    try:
+        meta = load_state_meta(state_dir)
+    except FileNotFoundError:
+        return False
+    versions = registry.column_versions(datasets.dataset(scored_dir).schema.names)
+    return meta == {"model_version": model_version, "versions": versions, "sims": sims, "seed": seed}
+
+
+def update_metrics(replace=(), scored_dir=GOLD_SCORED, state_dir=AGGREGATE_STATE, con=None, workers=None,
+                   strict=True):
+    """Fold scored matches that are new since the last run into the saved aggregate tables.
+
+    Compares the scored dataset's matches with the state's. New matches and
+    the ones in `replace` (e.g. events corrected upstream) get their partial
+    state from just their shots; matches no longer scored are retracted.
+    The new rows minus the old rows of those matches are grouped like the
+    tables and added to the affected seasons' saved sums, so every summed
+    column costs O(changed shots), not a rescan. Sims, seed and model
+    version are the ones the state was built with.
+
+    The Monte Carlo interval and p-value columns are the accepted exception:
+    a replay cannot be updated without keeping every draw, so each affected
+    season is replayed in full, O(season shots x sims). Every season has its
+    own seed, so they come out as in a full run.
+
+    strict: raise on `replace` ids that are not scored. The pipeline passes
+    every changed match, including ones without shots, with strict=False.
+
+    Returns (tables of the affected seasons, summary dict).
+    """
+    meta = load_state_meta(state_dir)
+    versions = registry.column_versions(datasets.dataset(scored_dir).schema.names)
+    if versions != meta["versions"]:
+        raise ValueError(f"Scored data compares versions {versions}, the state {meta['versions']}; "
+                         f"run a full aggregation")
+    xg_col = _xg_col(versions, meta["model_version"])
+
+    scored, known = dataset_matches(scored_dir), dataset_matches(state_dir)
+    missing = set(replace) - set(scored)
+    if missing and strict:
+        raise ValueError(f"Matches not in the scored data: {sorted(missing)}")
+    replace = set(replace) - missing
+    added = set(scored) - set(known)
+    removed = set(known) - set(scored)
+    changed = added | replace
+    seasons = sorted({scored[m] for m in changed} | {known[m] for m in removed | changed if m in known},
+                     key=lambda k: [(v is None, v) for v in k])
+    summary = {"added": len(added), "replaced": len(replace - added), "removed": len(removed), "seasons": seasons}
+    if not seasons:
+        return {}, summary
+
+    con = con or connect()
+    shots = datasets.read_table(scored_dir, columns=SCORED_COLS + list(map(registry.column, versions)),
+                                match_ids=changed)
+    summary["shots_read"] = shots.num_rows
+    con.register("scored", datasets.decode_dictionaries(shots))
+    with instrument.span("partial_state", rows_in=shots.num_rows) as s:
+        partials = con.execute(partial_state_sql("scored", versions, xg_col)).to_arrow_table()
+        s.add(rows_out=partials.num_rows)
+
+    # What the tables gain (new rows) and lose (the old rows of replaced or retracted matches)
+    old = datasets.decode_dictionaries(datasets.read_table(state_dir, columns=partials.column_names,
+                                                           match_ids=changed | removed))
+    sums = [c for c in partials.column_names if c not in PARTITION_COLS + STATE_KEYS]
+    retracted = pa.table({c: pc.negate(old[c]) if c in sums else old[c] for c in old.column_names})
+    con.register("state", pa.concat_tables([partials, retracted.cast(partials.schema)]))
+    deltas = split_groupings(con.execute(grouping_sets_sql("state", versions, state=True)).to_arrow_table())
+
+    tables = {}
+    for name, keys in GROUPINGS.items():
+        saved = datasets.read_table(OUT_PATHS[name], seasons=seasons)
+        # Saved tables keep the standard deviation; its square is the summed variance
+        con.register("old", saved.select(PARTITION_COLS + keys + ["shots", "goals", "xg"] + list(
+            map(registry.column, versions))).append_column("xg_var", pc.power(saved["goal_minus_xg_sd"], 2)))
+        con.register("delta", deltas[name].drop_columns(["grouping_id"] + [k for k in KEYS if k not in keys]))
+        tables[name] = finish(con.execute(_merge_sql(keys, versions)).to_arrow_table(), keys, versions)
+    if meta["sims"]:
+        with instrument.span("simulate", sims=meta["sims"]):
+            simulated = simulate_xg.simulate(scored_dir=scored_dir, sims=meta["sims"], seed=meta["seed"],
+                                             workers=workers, xg_col=xg_col, seasons=seasons)
+            tables = simulate_xg.attach(tables, simulated)
+    for name, table in tables.items():
+        datasets.replace_partitions(OUT_PATHS[name], table, seasons, table.schema)
+    datasets.replace_matches(state_dir, partials, changed | removed)
+    return tables, summary
+
+
+def check_metrics(scored_dir=GOLD_SCORED, state_dir=AGGREGATE_STATE, con=None, rtol=1e-9):
+    """Differences between the saved aggregate tables and a full recompute, as {table name: problem}.
+
+    Keys and counts must match exactly, sums to rtol (the order floats are
+    summed in may differ). Empty when the incrementally maintained tables
+    are what a full run gives.
+    """
+    meta = load_state_meta(state_dir)
+    full = aggregate_metrics(scored_dir=scored_dir, con=con, sims=meta["sims"], seed=meta["seed"],
+                             model_version=meta["model_version"])
+    problems = {}
+    for name, expected in full.items():
+        root = state_dir if name == STATE_TABLE else OUT_PATHS[name]
+        keys = PARTITION_COLS + (STATE_KEYS if name == STATE_TABLE else GROUPINGS[name])
+        order = [(c, "ascending") for c in keys]
+        expected = datasets.decode_dictionaries(expected).sort_by(order)
+        saved = datasets.decode_dictionaries(datasets.read_table(root)).sort_by(order)
+        if saved.num_rows != expected.num_rows or set(saved.column_names) != set(expected.column_names):
+            problems[name] = f"{saved.num_rows} rows {sorted(saved.column_names)}, expected " \
+                             f"{expected.num_rows} rows {sorted(expected.column_names)}"
+            continue
+        for col in expected.column_names:
+            a, b = saved[col].to_numpy(zero_copy_only=False), expected[col].to_numpy(zero_copy_only=False)
+            if pa.types.is_floating(expected.schema.field(col).type):
+                same = np.allclose(a.astype(float), b.astype(float), rtol=rtol, atol=rtol, equal_nan=True)
+            else:
+                same = saved[col].equals(expected[col].cast(saved[col].type))
+            if not same:
+                problems[name] = f"column {col} differs"
+                break
+    return problems
+
+
+def main():
+    args = options.parser("aggregate").parse_args()
+    con = connect(args.memory_limit, args.threads)
+
+    if args.check:
+        with instrument.run("aggregate_metrics"):
+            problems = check_metrics(con=con)
+        for name, problem in problems.items():
+            print(f"❌ {name}: {problem}")
+        if problems:
+            sys.exit(1)
+        print("✅ Saved aggregates match a full recompute.")
+        return
+
+    if args.update or args.replace:
+        with instrument.run("aggregate_metrics"):
+            tables, summary = update_metrics(args.replace, con=con)
+        seasons = ", ".join(f"{c}:{s}" for c, s in summary["seasons"]) or "none"
+        print(f"✅ Aggregates updated: {summary['added']} new, {summary['replaced']} replaced, "
+              f"{summary['removed']} removed matches ({summary.get('shots_read', 0)} shots read); "
+              f"seasons rewritten: {seasons}")
+        return
 
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-    team_df.to_parquet(OUT_DIR / "team_metrics_2015_16.parquet", index=False)
-    player_df.to_parquet(OUT_DIR / "player_metrics_2015_16.parquet", index=False)
-    player_team_df.to_parquet(OUT_DIR / "player_team_metrics_2015_16.parquet", index=False)
+    with instrument.run("aggregate_metrics"):
+        tables = aggregate_metrics(con=con, sims=args.sims, seed=args.seed, model_version=args.model_version)
+        save_metrics(tables)
 
-    print("✅ Aggregated team, player, and player-by-team metrics saved.")
-    print("Top 5 overperforming players (overall):")
-    print(player_df.sort_values("goal_minus_xg", ascending=False).head())
+    print(f"✅ Aggregated {', '.join(tables)} saved.")
+    print("Top 5 overperforming players (per season):")
+    print(tables["player_metrics"].to_pandas().sort_values("goal_minus_xg", ascending=False).head())
 
 
 if __name__ == "__main__":
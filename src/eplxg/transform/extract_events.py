@@ -0,0 +1,156 @@
+"""Silver on-ball events: every touch of the ball, for possession-level metrics.
+
+extract_shots keeps only shots. xG Chain and xG Buildup (transform/xg_chain.py)
+also need everyone who touched the ball before them, so this stage keeps
+every on-ball event (ON_BALL types with a player) in a compact columnar
+table:
+
+    match_id, possession, event_index    where the event sits in its match
+    team, player (ids and names), type   who did what
+    possession_team_id                   the side in possession
+    key_pass                             the pass right before a shot
+
+Unlike shots, no event can be skipped without decoding it, so each match
+file is parsed in full, across a process pool. The table holds ~1500
+narrow rows per match. Names are dictionary-encoded and ids are int32.
+"""
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import pyarrow as pa
+
+from eplxg import bronze, datasets, instrument, options
+from eplxg.config import BRONZE_DIR, PARTITION_COLS, SILVER_EVENTS
+from eplxg.transform.extract_shots import LABEL, NAME, load_match_seasons
+
+# Event types where the player has the ball (defensive pressure, substitutions
+# and the like never make a player part of a possession)
+ON_BALL = frozenset([
+    "Pass", "Ball Receipt*", "Carry", "Dribble", "Shot", "Ball Recovery", "Interception", "Clearance",
+    "Miscontrol", "Dispossessed", "Duel", "Block", "Goal Keeper", "Foul Won", "50/50", "Shield", "Error",
+])
+
+EVENTS_SCHEMA = pa.schema([
+    ("competition_id", pa.int64()),
+    ("season_id", pa.int64()),
+    ("match_id", pa.int64()),
+    ("possession", pa.int16()),  # StatsBomb possession number, from 1 in each match
+    ("event_index", pa.int32()),  # StatsBomb event index: order within the match
+    ("team_id", pa.int32()),
+    ("team", NAME),
+    ("player_id", pa.int32()),
+    ("player", NAME),
+    ("type", LABEL),
+    ("possession_team_id", pa.int32()),
+    ("key_pass", pa.bool_()),  # the pass a shot came from (the shot's key_pass_id)
+])
+# Columns each match file yields; competition/season are added from the matches files
+MATCH_FIELDS = [f.name for f in EVENTS_SCHEMA if f.name not in PARTITION_COLS]
+MATCH_SCHEMA = pa.schema([EVENTS_SCHEMA.field(c) for c in MATCH_FIELDS])
+
+
+def event_columns(events):
+    """One match's on-ball events as {column: list}, in event order."""
+    key_passes = {e["shot"].get("key_pass_id") for e in events if "shot" in e}
+    cols = {c: [] for c in MATCH_FIELDS}
+    for e in events:
+        kind = e.get("type", {}).get("name")
+        player = e.get("player")
+        if kind not in ON_BALL or player is None:
+            continue
+        team = e.get("team", {})
+        cols["match_id"].append(e.get("match_id"))
+        cols["possession"].append(e.get("possession"))
+        cols["event_index"].append(e.get("index"))
+        cols["team_id"].append(team.get("id"))
+        cols["team"].append(team.get("name"))
+        cols["player_id"].append(player.get("id"))
+        cols["player"].append(player.get("name"))
+        cols["type"].append(kind)
+        cols["possession_team_id"].append(e.get("possession_team", {}).get("id"))
+        cols["key_pass"].append(e.get("id") in key_passes)
+    return cols
+
+
+def extract_file(source):
+    """On-ball events of one match's bronze events (a loose file or a packed match), as an Arrow table."""
+    events = json.loads(bronze.read_events(source))
+    return pa.table(event_columns(events), schema=MATCH_SCHEMA)
+
+
+def _extract_measured(source):
+    table, sample = instrument.measure(extract_file, source)
+    return table, sample, bronze.source_size(source)
+
+
+def iter_event_tables(files, match_seasons, workers=None, batch_rows=500_000, chunksize=8):
+    """Events of files as Arrow tables of about batch_rows rows, tagged with competition/season."""
+    if workers == 1:
+        results = map(_extract_measured, files)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_extract_measured, files, chunksize=chunksize)
+    buf, rows = [], 0
+    try:
+        for path, (table, sample, size) in zip(files, results):
+            instrument.record("extract_events_file", sample, {"file": bronze.source_name(path)},
+                              rows_in=1, bytes_read=size, rows_out=table.num_rows)
+            if table.num_rows == 0:
+                continue
+            season = match_seasons.get(table["match_id"][0].as_py(), (None, None))
+            for i, (col, value) in enumerate(zip(PARTITION_COLS, season)):
+                table = table.add_column(i, col, pa.array([value] * table.num_rows, pa.int64()))
+            buf.append(table)
+            rows += table.num_rows
+            if rows >= batch_rows:
+                yield pa.concat_tables(buf).unify_dictionaries()
+                buf, rows = [], 0
+    finally:
+        if workers != 1:
+            pool.shutdown()
+    if buf:
+        yield pa.concat_tables(buf).unify_dictionaries()
+
+
+def extract_events(files, match_seasons, workers=None):
+    """Events of all files as one in-memory Arrow table."""
+    tables = [EVENTS_SCHEMA.empty_table(), *iter_event_tables(files, match_seasons, workers)]
+    return pa.concat_tables(tables).unify_dictionaries()
+
+
+def write_events(files, match_seasons, out_dir=SILVER_EVENTS, workers=None):
+    """Stream events into the partitioned silver dataset, replacing it. Returns the row count."""
+    return datasets.write_dataset(iter_event_tables(files, match_seasons, workers), out_dir, EVENTS_SCHEMA)
+
+
+def update_events(files, match_seasons, match_ids, out_dir=SILVER_EVENTS, workers=None):
+    """Re-extract match_ids from files into the existing silver dataset. Returns the new events."""
+    changed = extract_events(files, match_seasons, workers)
+    datasets.replace_matches(out_dir, changed, match_ids)
+    return changed
+
+
+def main():
+    args = options.parser("events").parse_args()
+
+    with instrument.run("extract_events"):
+        match_seasons, _ = load_match_seasons(args.bronze_dir)
+        if args.update_matches is not None and args.out.exists():
+            files = bronze.event_sources(args.bronze_dir, match_ids=args.update_matches)
+            changed = update_events(files, match_seasons, args.update_matches, args.out, workers=args.workers)
+            print(f"✅ Re-extracted {changed.num_rows} events from {len(args.update_matches)} changed matches")
+        else:
+            files = bronze.event_sources(args.bronze_dir)
+            n = write_events(files, match_seasons, args.out, workers=args.workers)
+            print(f"✅ Extracted {n} on-ball events")
+    print(f"Saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
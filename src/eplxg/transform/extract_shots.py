@@ -1,46 +1,328 @@
+import bisect
 import json
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import pandas as pd
 
-BRONZE_EVENTS_DIR = Path("data/bronze/statsbomb/events")
-SILVER_DIR = Path("data/silver")
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-def main():
-    SILVER_DIR.mkdir(parents=True, exist_ok=True)
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
-    rows = []
+from eplxg import bronze, datasets, instrument, options
+from eplxg.config import (
+    BRONZE_DIR, MATCH_PARTITION_COLS, MATCHES_PATH, PARTITION_COLS, PLAYERS_PATH, SEASONS_PATH, SILVER_SHOTS,
+    TEAMS_PATH,
+)
+
+# Names repeat across thousands of shots, so they are stored dictionary-encoded
+# (pandas: categorical); a few dozen labels fit int8 codes, teams and players
+# get int32. StatsBomb ids stay alongside as the stable keys (see TEAMS_PATH,
+# PLAYERS_PATH).
+NAME = pa.dictionary(pa.int32(), pa.string())
+LABEL = pa.dictionary(pa.int8(), pa.string())
+
+# A shot's freeze frame: every visible player at the moment of the shot.
+# Arrow stores the list flat (offsets + one array per field over all shots'
+# players); transform/freeze_frame.py computes features on those arrays.
+FREEZE_FRAME = pa.list_(pa.struct([
+    ("x", pa.float32()),
+    ("y", pa.float32()),
+    ("teammate", pa.bool_()),  # of the shooter
+    ("position_id", pa.int8()),  # StatsBomb position, 1 = goalkeeper
+]))
+
+SHOTS_SCHEMA = pa.schema([
+    ("competition_id", pa.int64()),
+    ("season_id", pa.int64()),
+    ("match_id", pa.int64()),
+    ("team_id", pa.int32()),
+    ("team", NAME),
+    ("player_id", pa.int32()),
+    ("player", NAME),
+    ("minute", pa.int16()),  # extra time plus stoppage can pass 127
+    ("second", pa.int8()),
+    ("event_index", pa.int32()),  # the event's position in its match (joins shots to silver events)
+    ("x", pa.float32()),  # StatsBomb locations have one decimal
+    ("y", pa.float32()),
+    ("outcome", LABEL),
+    ("body_part", LABEL),
+    ("technique", LABEL),
+    ("play_pattern", LABEL),
+    ("freeze_frame", FREEZE_FRAME),  # null when the event has none
+])
+
+# Cheap pre-filter: every top-level StatsBomb event opens with its UUID "id";
+# nested objects only carry integer ids. Shots are ~1-2% of events, so we only
+# locate "Shot" type names and decode the enclosing event instead of the file.
+# A name outside every event found this way sends the file to a full parse.
+EVENT_START = re.compile(r'\{\s*"id"\s*:\s*"[0-9a-fA-F-]{36}"')
+SHOT_NAME = re.compile(r'"name"\s*:\s*"Shot"')
+
+SEASONS_SCHEMA = pa.schema([
+    ("competition_id", pa.int64()),
+    ("season_id", pa.int64()),
+    ("competition_name", pa.string()),
+    ("season_name", pa.string()),
+    ("matches", pa.int64()),
+])
 
-    for file in BRONZE_EVENTS_DIR.glob("*.json"):
-        with open(file) as f:
-            events = json.load(f)
+ID_SCHEMAS = {
+    "team": pa.schema([("team_id", pa.int32()), ("team", pa.string())]),
+    "player": pa.schema([("player_id", pa.int32()), ("player", pa.string())]),
+}
 
-        for event in events:
-            if event.get("type", {}).get("name") == "Shot":
-                location = event.get("location", [None, None])
-                shot_data = event.get("shot", {})
+# Fixtures; scores are null when the matches file has none
+MATCHES_SCHEMA = pa.schema([
+    ("competition_id", pa.int64()),
+    ("season_id", pa.int64()),
+    ("match_id", pa.int64()),
+    ("match_date", pa.string()),
+    ("home_team", pa.string()),
+    ("away_team", pa.string()),
+    ("home_score", pa.int64()),
+    ("away_score", pa.int64()),
+])
 
+_decoder = json.JSONDecoder()
+
+
+def load_match_seasons(bronze_dir=BRONZE_DIR):
+    """Map match_id -> (competition_id, season_id) from the bronze matches_<comp>_<season>.json files.
+
+    Also returns one row per season with its display names.
+    """
+    match_seasons = {}
+    seasons = []
+    for path in sorted(Path(bronze_dir).glob("matches_*_*.json")):
+        comp_id, season_id = (int(v) for v in path.stem.split("_")[1:3])
+        with open(path) as f:
+            matches = json.load(f)
+        for m in matches:
+            match_seasons[m["match_id"]] = (comp_id, season_id)
+        first = matches[0] if matches else {}
+        seasons.append({
+            "competition_id": comp_id,
+            "season_id": season_id,
+            "competition_name": first.get("competition", {}).get("competition_name"),
+            "season_name": first.get("season", {}).get("season_name"),
+            "matches": len(matches),
+        })
+    return match_seasons, seasons
+
+
+def load_matches(bronze_dir=BRONZE_DIR):
+    """One row per match (teams, date, final score) from the bronze matches files."""
+    rows = []
+    for path in sorted(Path(bronze_dir).glob("matches_*_*.json")):
+        comp_id, season_id = (int(v) for v in path.stem.split("_")[1:3])
+        with open(path) as f:
+            for m in json.load(f):
                 rows.append({
-                    "match_id": event.get("match_id"),
-                    "team": event.get("team", {}).get("name"),
-                    "player": event.get("player", {}).get("name"),
-                    "minute": event.get("minute"),
-                    "second": event.get("second"),
-                    "x": location[0] if len(location) > 0 else None,
-                    "y": location[1] if len(location) > 1 else None,
-                    "outcome": shot_data.get("outcome", {}).get("name"),
-                    "body_part": shot_data.get("body_part", {}).get("name"),
-                    "technique": shot_data.get("technique", {}).get("name"),
-                    "play_pattern": event.get("play_pattern", {}).get("name"),
+                    "competition_id": comp_id,
+                    "season_id": season_id,
+                    "match_id": m["match_id"],
+                    "match_date": m.get("match_date"),
+                    "home_team": m.get("home_team", {}).get("home_team_name"),
+                    "away_team": m.get("away_team", {}).get("away_team_name"),
+                    "home_score": m.get("home_score"),
+                    "away_score": m.get("away_score"),
                 })
+    return rows
+
+
+def frame_player(player):
+    location = player.get("location") or [None, None]
+    return {
+        "x": location[0],
+        "y": location[1] if len(location) > 1 else None,
+        "teammate": player.get("teammate"),
+        "position_id": player.get("position", {}).get("id"),
+    }
+
+
+def shot_row(event):
+    location = event.get("location", [None, None])
+    shot_data = event.get("shot", {})
+    frame = shot_data.get("freeze_frame")
+
+    return {
+        "match_id": event.get("match_id"),
+        "team_id": event.get("team", {}).get("id"),
+        "team": event.get("team", {}).get("name"),
+        "player_id": event.get("player", {}).get("id"),
+        "player": event.get("player", {}).get("name"),
+        "minute": event.get("minute"),
+        "second": event.get("second"),
+        "event_index": event.get("index"),
+        "x": location[0] if len(location) > 0 else None,
+        "y": location[1] if len(location) > 1 else None,
+        "outcome": shot_data.get("outcome", {}).get("name"),
+        "body_part": shot_data.get("body_part", {}).get("name"),
+        "technique": shot_data.get("technique", {}).get("name"),
+        "play_pattern": event.get("play_pattern", {}).get("name"),
+        "freeze_frame": None if frame is None else [frame_player(p) for p in frame],
+    }
+
+
+def is_shot(event):
+    return event.get("type", {}).get("name") == "Shot"
+
+
+def iter_shot_events(text):
+    starts = [m.start() for m in EVENT_START.finditer(text)]
+    if not starts:
+        # Unexpected layout: fall back to a full parse
+        yield from (e for e in json.loads(text) if is_shot(e))
+        return
+
+    shots = []
+    ends = {}  # start -> end of each decoded event
+    for m in SHOT_NAME.finditer(text):
+        i = bisect.bisect_right(starts, m.start()) - 1
+        if i >= 0 and starts[i] not in ends:
+            event, ends[starts[i]] = _decoder.raw_decode(text, starts[i])
+            if is_shot(event):
+                shots.append(event)
+        if i < 0 or m.start() >= ends[starts[i]]:
+            # The name is outside every event the pre-filter found (another key order or id
+            # format): parse the whole file rather than drop an event
+            yield from (e for e in json.loads(text) if is_shot(e))
+            return
+    yield from shots
+
+
+def extract_file(source):
+    """Shot rows for one match's bronze events (a loose file or a packed match, see bronze.event_sources)."""
+    text = bronze.read_events(source).decode("utf-8")
+    return [shot_row(e) for e in iter_shot_events(text)]
+
+
+def extract_file_full(path):
+    """Reference implementation: parse the whole file and walk every event."""
+    with open(path) as f:
+        events = json.load(f)
+    return [shot_row(e) for e in events if is_shot(e)]
 
-    df = pd.DataFrame(rows)
 
-    out_path = SILVER_DIR / "shots_2015_16.parquet"
-    df.to_parquet(out_path, index=False)
+def _extract_measured(source):
+    rows, sample = instrument.measure(extract_file, source)
+    return rows, sample, bronze.source_size(source)
+
+
+def iter_shot_rows(files, workers=None, chunksize=8):
+    """Yield per-match shot rows, in order, parsing across a process pool.
+
+    `files` are bronze event sources: loose file paths or packed matches (bronze.event_sources).
+    """
+    if workers == 1:
+        results = map(_extract_measured, files)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_extract_measured, files, chunksize=chunksize)
+    try:
+        for path, (rows, sample, size) in zip(files, results):
+            # Timed in the worker; recorded here as one span per match file
+            instrument.record("extract_file", sample, {"file": bronze.source_name(path)},
+                              rows_in=1, bytes_read=size, rows_out=len(rows))
+            yield rows
+    finally:
+        if workers != 1:
+            pool.shutdown()
+
+
+def iter_shot_tables(files, match_seasons, workers=None, batch_rows=50_000):
+    """Shot rows as Arrow tables of about batch_rows rows, tagged with competition/season."""
+    buf = []
+    for rows in iter_shot_rows(files, workers=workers):
+        for row in rows:
+            row["competition_id"], row["season_id"] = match_seasons.get(row["match_id"], (None, None))
+        buf.extend(rows)
+        if len(buf) >= batch_rows:
+            yield pa.Table.from_pylist(buf, schema=SHOTS_SCHEMA)
+            buf = []
+    if buf:
+        yield pa.Table.from_pylist(buf, schema=SHOTS_SCHEMA)
+
+
+def extract_shots(files, match_seasons, workers=None):
+    """Shot rows of all files as one in-memory Arrow table."""
+    return pa.concat_tables([SHOTS_SCHEMA.empty_table(), *iter_shot_tables(files, match_seasons, workers)])
+
+
+def write_shots(files, match_seasons, out_dir=SILVER_SHOTS, workers=None, by_match=False):
+    """Stream shot rows into the partitioned silver dataset, replacing it. Returns the row count."""
+    cols = MATCH_PARTITION_COLS if by_match else PARTITION_COLS
+    return datasets.write_dataset(iter_shot_tables(files, match_seasons, workers), out_dir, SHOTS_SCHEMA, cols)
+
+
+def update_shots(files, match_seasons, match_ids, out_dir=SILVER_SHOTS, workers=None, by_match=False):
+    """Re-extract match_ids from files into the existing silver dataset. Returns the new shots."""
+    cols = MATCH_PARTITION_COLS if by_match else PARTITION_COLS
+    changed = extract_shots(files, match_seasons, workers)
+    datasets.replace_matches(out_dir, changed, match_ids, cols)
+    return changed
+
+
+def write_seasons(seasons, path=SEASONS_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(seasons, schema=SEASONS_SCHEMA), path)
+
+
+def write_matches(matches, path=MATCHES_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(matches, schema=MATCHES_SCHEMA), path)
+
+
+def id_table(shots, kind):
+    """Distinct (id, name) rows of "team" or "player" in a silver table, one per id, sorted by id.
+
+    An id seen under several spellings keeps the alphabetically last one.
+    """
+    schema = ID_SCHEMAS[kind]
+    id_col, name_col = schema.names
+    pairs = shots.select(schema.names).cast(schema).filter(pc.is_valid(shots[id_col]))
+    table = pairs.group_by(id_col).aggregate([(name_col, "max")]).rename_columns(schema.names)
+    return table.sort_by(id_col)
+
+
+def write_ids(shots=None, silver_dir=SILVER_SHOTS, paths=None):
+    """Write the team and player id tables, from a silver table or the silver dataset."""
+    paths = paths or {"team": TEAMS_PATH, "player": PLAYERS_PATH}
+    if shots is None:
+        shots = datasets.read_table(silver_dir, columns=["team_id", "team", "player_id", "player"])
+    for kind, path in paths.items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(id_table(shots, kind), path)
+
+
+def main():
+    args = options.parser("extract").parse_args()
+
+    # Season, match and id tables go next to the shots dataset, so --out elsewhere leaves data/silver alone
+    silver_dir = args.out.parent
+    with instrument.run("extract_shots"):
+        match_seasons, seasons = load_match_seasons(args.bronze_dir)
+        write_seasons(seasons, silver_dir / SEASONS_PATH.name)
+        write_matches(load_matches(args.bronze_dir), silver_dir / MATCHES_PATH.name)
+
+        if args.update_matches is not None and args.out.exists():
+            files = bronze.event_sources(args.bronze_dir, match_ids=args.update_matches)
+            changed = update_shots(files, match_seasons, args.update_matches, args.out,
+                                   workers=args.workers, by_match=args.partition_by_match)
+            print(f"✅ Re-extracted {changed.num_rows} shots from {len(args.update_matches)} changed matches")
+        else:
+            files = bronze.event_sources(args.bronze_dir)
+            n = write_shots(files, match_seasons, args.out, workers=args.workers, by_match=args.partition_by_match)
+            print(f"✅ Extracted {n} shots")
+        write_ids(silver_dir=args.out,
+                  paths={"team": silver_dir / TEAMS_PATH.name, "player": silver_dir / PLAYERS_PATH.name})
+    print(f"Saved to {args.out}")
 
-    print(f"✅ Extracted {len(df)} shots")
-    print(f"Saved to {out_path}")
 
 if __name__ == "__main__":
     main()
-
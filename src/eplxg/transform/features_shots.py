@@ -1,77 +1,121 @@
-import math
+import sys
 from pathlib import Path
 
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
 import numpy as np
-import pandas as pd
+import pyarrow as pa
+
+from eplxg import datasets, instrument, options
+from eplxg.config import GOLD_FEATURES, SILVER_SHOTS
+from eplxg.transform.extract_shots import SHOTS_SCHEMA
+from eplxg.transform.freeze_frame import freeze_frame_features
+from eplxg.transform.geometry import geometry_features
+
+# Flags are booleans and geometry float32 (computed in float64 first). The
+# freeze frame itself stays in silver; gold keeps the features taken from it.
+FEATURES_SCHEMA = pa.schema([f for f in SHOTS_SCHEMA if f.name != "freeze_frame"] + [
+    ("is_goal", pa.bool_()),
+    ("distance", pa.float32()),
+    ("angle", pa.float32()),
+    ("is_header", pa.bool_()),
+    ("is_penalty", pa.bool_()),
+    ("frame_players", pa.int16()),
+    ("defenders_in_cone", pa.int16()),
+    ("nearest_defender", pa.float32()),
+    ("gk_distance", pa.float32()),
+    ("gk_angle_offset", pa.float32()),
+])
+
+
+def _flag(values, expected):
+    # Case-insensitive match; missing values (None/NaN) count as no match
+    cat = getattr(values, "cat", None)
+    if cat is not None:
+        # Categorical: compare each category once, then look rows up by code (-1, missing, hits the False pad)
+        hits = np.array([isinstance(c, str) and c.lower() == expected for c in cat.categories] + [False])
+        return hits[cat.codes.to_numpy()]
+    return np.fromiter((isinstance(v, str) and v.lower() == expected for v in values),
+                       dtype=bool, count=len(values))
+
+
+def shot_features(x, y, body_part, technique):
+    """Model features from raw shot columns (any sequences), as a dict of column name -> array.
+
+    Shared by the batch pipeline and the scoring service.
+    """
+    features = geometry_features(x, y)
+    features["is_header"] = _flag(body_part, "head")
+    features["is_penalty"] = _flag(technique, "penalty")
+    return features
 
-SILVER_PATH = Path("data/silver/shots_2015_16.parquet")
-GOLD_DIR = Path("data/gold")
 
-# StatsBomb pitch is 120 x 80
-PITCH_LENGTH = 120.0
-PITCH_WIDTH = 80.0
+def build_features(shots):
+    """Gold features DataFrame from a silver shots table (pyarrow).
 
-# Goal center on StatsBomb coordinate system
-GOAL_X = PITCH_LENGTH
-GOAL_Y = PITCH_WIDTH / 2.0
-GOAL_WIDTH = 8.0  # yards, but this is relative; we use as 8 in SB units approx for geometry
-# We'll compute angle using goal posts at y = 40 +/- 4 (since goal width ~8)
-LEFT_POST_Y = GOAL_Y - 4.0
-RIGHT_POST_Y = GOAL_Y + 4.0
+    Freeze frames are turned into features while still Arrow arrays, and
+    never converted to Python objects.
+    """
+    frame = freeze_frame_features(shots["freeze_frame"], shots["x"].to_numpy(zero_copy_only=False),
+                                  shots["y"].to_numpy(zero_copy_only=False))
+    df = shots.drop_columns(["freeze_frame"]).to_pandas()
 
+    # Label: goal or not
+    df["is_goal"] = _flag(df["outcome"], "goal")
 
-def shot_distance(x, y):
-    if pd.isna(x) or pd.isna(y):
-        return np.nan
-    return math.sqrt((GOAL_X - x) ** 2 + (GOAL_Y - y) ** 2)
+    # Features (vectorized over the whole table)
+    features = shot_features(df["x"], df["y"], df["body_part"], df["technique"])
+    for col, values in {**features, **frame}.items():
+        df[col] = values.astype(FEATURES_SCHEMA.field(col).type.to_pandas_dtype())
 
+    # Keep only rows with geometry
+    return df.dropna(subset=["distance", "angle"])
 
-def shot_angle(x, y):
-    """
-    Angle between lines from shot location to left and right goal posts.
-    """
-    if pd.isna(x) or pd.isna(y):
-        return np.nan
 
-    a = math.sqrt((GOAL_X - x) ** 2 + (LEFT_POST_Y - y) ** 2)
-    b = math.sqrt((GOAL_X - x) ** 2 + (RIGHT_POST_Y - y) ** 2)
-    c = abs(RIGHT_POST_Y - LEFT_POST_Y)  # distance between posts
+def to_table(df):
+    return pa.Table.from_pandas(df[FEATURES_SCHEMA.names], schema=FEATURES_SCHEMA, preserve_index=False)
 
-    # Law of cosines: angle at shot point
-    # cos(theta) = (a^2 + b^2 - c^2) / (2ab)
-    denom = 2 * a * b
-    if denom == 0:
-        return 0.0
-    cos_theta = (a * a + b * b - c * c) / denom
-    cos_theta = max(-1.0, min(1.0, cos_theta))
-    return math.acos(cos_theta)
 
+def _season_features(silver_dir, season):
+    with instrument.span("features_season", season=f"{season[0]}:{season[1]}") as s:
+        shots = datasets.read_table(silver_dir, seasons=[season])
+        table = to_table(build_features(shots))
+        s.add(rows_in=shots.num_rows, rows_out=table.num_rows)
+    return table
 
-def main():
-    GOLD_DIR.mkdir(parents=True, exist_ok=True)
 
-    df = pd.read_parquet(SILVER_PATH)
+def write_features(silver_dir=SILVER_SHOTS, out_dir=GOLD_FEATURES):
+    """Rebuild the gold features dataset one season at a time. Returns the row count."""
+    tables = (_season_features(silver_dir, season) for season in datasets.list_partitions(silver_dir))
+    return datasets.write_dataset(tables, out_dir, FEATURES_SCHEMA)
 
-    # Label: goal or not
-    df["is_goal"] = (df["outcome"].fillna("").str.lower() == "goal").astype(int)
 
-    # Features
-    df["distance"] = df.apply(lambda r: shot_distance(r["x"], r["y"]), axis=1)
-    df["angle"] = df.apply(lambda r: shot_angle(r["x"], r["y"]), axis=1)
+def update_features(match_ids, silver_dir=SILVER_SHOTS, out_dir=GOLD_FEATURES, changed=None):
+    """Recompute features for match_ids only and merge them into the gold dataset. Returns the new rows.
 
-    df["is_header"] = (df["body_part"].fillna("").str.lower() == "head").astype(int)
-    df["is_penalty"] = (df["technique"].fillna("").str.lower() == "penalty").astype(int)
+    changed: the matches' silver shots table, if already in memory.
+    """
+    if changed is None:
+        changed = datasets.read_table(silver_dir, match_ids=match_ids)
+    df = build_features(changed)
+    datasets.replace_matches(out_dir, to_table(df), match_ids)
+    return df
 
-    # Keep only rows with geometry
-    df = df.dropna(subset=["distance", "angle"])
 
-    out_path = GOLD_DIR / "shots_features_2015_16.parquet"
-    df.to_parquet(out_path, index=False)
+def main():
+    args = options.parser("features").parse_args()
+
+    with instrument.run("features_shots"):
+        if args.update_matches is not None and GOLD_FEATURES.exists():
+            df = update_features(args.update_matches)
+            print(f"Recomputed features for {df['match_id'].nunique()} matches")
+        else:
+            n = write_features()
+            print("Rows:", n)
 
-    print(f"✅ Gold features saved: {out_path}")
-    print("Rows:", len(df))
-    print("Goals:", int(df['is_goal'].sum()))
+    print(f"✅ Gold features saved: {GOLD_FEATURES}")
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,157 @@
+"""Freeze-frame features: where the other players were when the shot was taken.
+
+StatsBomb shots carry a freeze frame, the location of every visible player.
+Silver keeps it as one list column (FREEZE_FRAME in extract_shots), which
+Arrow stores flat: an offsets array plus x, y, teammate and position_id
+arrays over the players of all shots. The vectorized features work on those
+arrays directly. Every player row is tagged with its shot, each test is one
+array expression over all players, and per-shot results are reduced with
+np.bincount / np.minimum.reduceat. There is no Python loop over shots or
+players.
+
+"Defenders" are the shooter's opponents other than their goalkeeper. The
+cone is the triangle between the shot location and the two goal posts.
+"""
+import math
+
+import numpy as np
+
+from eplxg.transform.geometry import GOAL_X, GOAL_Y, LEFT_POST_Y, RIGHT_POST_Y
+
+GOALKEEPER = 1  # StatsBomb position id
+
+# Feature name -> value for a shot without a freeze frame
+FRAME_FEATURES = {
+    "frame_players": 0,  # players in the frame; 0 = no freeze frame
+    "defenders_in_cone": 0,
+    "nearest_defender": np.nan,
+    "gk_distance": np.nan,  # the opposing goalkeeper, when in the frame
+    "gk_angle_offset": np.nan,  # radians between the shot->goal-centre and shot->keeper lines
+}
+
+
+# ---- Scalar reference implementations (one shot, frame as a list of dicts) ----
+
+def _cone_sides(dx, dy, x, y):
+    # Cross products of the player (dx, dy from the shot) with the shot->post
+    # vectors, and with the goal line; inside the cone all three share a sign
+    ax, ay, by = GOAL_X - x, LEFT_POST_Y - y, RIGHT_POST_Y - y
+    return ax * dy - ay * dx, ax - dx, by * dx - ax * dy
+
+
+def in_cone(x, y, px, py):
+    """True if (px, py) is inside (or on the edge of) the triangle shot -> left post -> right post."""
+    d1, d2, d3 = _cone_sides(px - x, py - y, x, y)
+    return (d1 >= 0 and d2 >= 0 and d3 >= 0) or (d1 <= 0 and d2 <= 0 and d3 <= 0)
+
+
+def _wrap(angle):
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+def frame_features(x, y, frame):
+    """FRAME_FEATURES for one shot; frame entries have x, y, teammate and position_id."""
+    out = dict(FRAME_FEATURES)
+    if not frame:
+        return out
+    out["frame_players"] = len(frame)
+    nearest = math.inf
+    for p in frame:
+        if p["teammate"] or p["x"] is None or p["y"] is None:
+            continue
+        dist = math.hypot(p["x"] - x, p["y"] - y)
+        if p["position_id"] == GOALKEEPER:
+            if math.isnan(out["gk_distance"]):
+                out["gk_distance"] = dist
+                out["gk_angle_offset"] = abs(_wrap(math.atan2(p["y"] - y, p["x"] - x)
+                                                   - math.atan2(GOAL_Y - y, GOAL_X - x)))
+            continue
+        out["defenders_in_cone"] += in_cone(x, y, p["x"], p["y"])
+        nearest = min(nearest, dist)
+    if nearest < math.inf:
+        out["nearest_defender"] = nearest
+    return out
+
+
+# ---- Vectorized over all shots ----
+
+def frame_arrays(frames):
+    """Flat player arrays of a freeze-frame list column (Arrow array or chunked array).
+
+    Returns (shot, x, y, teammate, position_id): one entry per player, `shot`
+    being the row of the shot it belongs to. Rows are grouped by shot in
+    order.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if isinstance(frames, pa.ChunkedArray):
+        frames = frames.combine_chunks() if frames.num_chunks else pa.array([], frames.type)
+    # Offsets index the whole child arrays (also when the column is a slice);
+    # a null frame may still span child values, so it counts as empty
+    offsets = frames.offsets.to_numpy().astype(np.int64)
+    counts = np.where(frames.is_valid().to_numpy(zero_copy_only=False), np.diff(offsets), 0)
+    shot = np.repeat(np.arange(len(frames)), counts)
+    take = np.arange(len(shot)) + np.repeat(offsets[:-1] - (np.cumsum(counts) - counts), counts)
+    players = frames.values
+
+    def column(name, fill=None):
+        values = players.field(name)
+        if fill is not None:
+            values = pc.fill_null(values, fill)
+        return values.to_numpy(zero_copy_only=False)[take]
+
+    return (shot, column("x").astype(np.float64), column("y").astype(np.float64),
+            column("teammate", False), column("position_id", 0))
+
+
+def _first_per_shot(shot, mask):
+    """Index of the first masked player of each shot that has one."""
+    idx = np.flatnonzero(mask)
+    return idx[np.r_[True, shot[idx][1:] != shot[idx][:-1]]] if len(idx) else idx
+
+
+def _min_per_shot(values, shot, n):
+    """Minimum of values per shot (NaN where a shot has none); rows grouped by shot."""
+    out = np.full(n, np.nan)
+    ok = ~np.isnan(values)
+    values, shot = values[ok], shot[ok]
+    if len(values):
+        starts = np.flatnonzero(np.r_[True, shot[1:] != shot[:-1]])
+        out[shot[starts]] = np.minimum.reduceat(values, starts)
+    return out
+
+
+def freeze_frame_features(frames, x, y):
+    """FRAME_FEATURES for every shot, as a dict of column name -> array.
+
+    frames is the silver freeze_frame column; x, y are the shot locations
+    (same length). Matches frame_features shot by shot.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    shot, px, py, teammate, position = frame_arrays(frames)
+
+    # Outfield opponents: only their rows go through the distance and cone tests
+    defender = np.flatnonzero(~teammate & (position != GOALKEEPER))
+    d_shot = shot[defender]
+    sx, sy = x[d_shot], y[d_shot]
+    dx, dy = px[defender] - sx, py[defender] - sy
+    d1, d2, d3 = _cone_sides(dx, dy, sx, sy)
+    inside = ((d1 >= 0) & (d2 >= 0) & (d3 >= 0)) | ((d1 <= 0) & (d2 <= 0) & (d3 <= 0))
+
+    gk = _first_per_shot(shot, ~teammate & (position == GOALKEEPER) & ~np.isnan(px) & ~np.isnan(py))
+    g_shot = shot[gk]
+    gx, gy = px[gk] - x[g_shot], py[gk] - y[g_shot]
+    gk_distance = np.full(n, np.nan)
+    gk_distance[g_shot] = np.hypot(gx, gy)
+    gk_angle_offset = np.full(n, np.nan)
+    gk_angle_offset[g_shot] = np.abs(_wrap(np.arctan2(gy, gx) - np.arctan2(GOAL_Y - y[g_shot], GOAL_X - x[g_shot])))
+    return {
+        "frame_players": np.bincount(shot, minlength=n),
+        "defenders_in_cone": np.bincount(d_shot[inside], minlength=n),
+        "nearest_defender": _min_per_shot(np.hypot(dx, dy), d_shot, n),
+        "gk_distance": gk_distance,
+        "gk_angle_offset": gk_angle_offset,
+    }
@@ -0,0 +1,79 @@
+import math
+
+import numpy as np
+
+# StatsBomb pitch is 120 x 80
+PITCH_LENGTH = 120.0
+PITCH_WIDTH = 80.0
+
+# Goal center on StatsBomb coordinate system
+GOAL_X = PITCH_LENGTH
+GOAL_Y = PITCH_WIDTH / 2.0
+GOAL_WIDTH = 8.0  # yards, but this is relative; we use as 8 in SB units approx for geometry
+# We'll compute angle using goal posts at y = 40 +/- 4 (since goal width ~8)
+LEFT_POST_Y = GOAL_Y - 4.0
+RIGHT_POST_Y = GOAL_Y + 4.0
+
+
+# ---- Scalar reference implementations ----
+
+def shot_distance(x, y):
+    if x is None or y is None or math.isnan(x) or math.isnan(y):
+        return np.nan
+    return math.sqrt((GOAL_X - x) ** 2 + (GOAL_Y - y) ** 2)
+
+
+def shot_angle(x, y):
+    """
+    Angle between lines from shot location to left and right goal posts.
+    """
+    if x is None or y is None or math.isnan(x) or math.isnan(y):
+        return np.nan
+
+    a = math.sqrt((GOAL_X - x) ** 2 + (LEFT_POST_Y - y) ** 2)
+    b = math.sqrt((GOAL_X - x) ** 2 + (RIGHT_POST_Y - y) ** 2)
+    c = abs(RIGHT_POST_Y - LEFT_POST_Y)  # distance between posts
+
+    # Law of cosines: angle at shot point
+    # cos(theta) = (a^2 + b^2 - c^2) / (2ab)
+    denom = 2 * a * b
+    if denom == 0:
+        return 0.0
+    cos_theta = (a * a + b * b - c * c) / denom
+    cos_theta = max(-1.0, min(1.0, cos_theta))
+    return math.acos(cos_theta)
+
+
+# ---- Vectorized versions (whole arrays, NaN in -> NaN out) ----
+
+def _as_float(v):
+    return np.asarray(v, dtype=np.float64)
+
+
+def distance_to_goal(x, y):
+    x, y = _as_float(x), _as_float(y)
+    return np.sqrt((GOAL_X - x) ** 2 + (GOAL_Y - y) ** 2)
+
+
+def goal_angle(x, y):
+    """Post-to-post angle (radians) for arrays of shot locations. Matches shot_angle."""
+    x, y = _as_float(x), _as_float(y)
+    dx2 = (GOAL_X - x) ** 2
+    a = np.sqrt(dx2 + (LEFT_POST_Y - y) ** 2)
+    b = np.sqrt(dx2 + (RIGHT_POST_Y - y) ** 2)
+    c = abs(RIGHT_POST_Y - LEFT_POST_Y)
+
+    denom = 2 * a * b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_theta = (a * a + b * b - c * c) / denom
+    angle = np.arccos(np.clip(cos_theta, -1.0, 1.0))
+    # Shot exactly on a post: the scalar version defines the angle as 0
+    return np.where(denom == 0, 0.0, angle)
+
+
+def geometry_features(x, y):
+    """All geometric shot features as a dict of column name -> array."""
+    return {
+        "distance": distance_to_goal(x, y),
+        "angle": goal_angle(x, y),
+    }
@@ -0,0 +1,199 @@
+"""Exact match outcome probabilities from shot xG.
+
+If every shot is an independent Bernoulli trial that scores with
+probability `xg`, a side's goals follow a Poisson-binomial distribution.
+Its exact PMF comes from the usual recurrence over shots,
+
+    P_k(g) = P_{k-1}(g) (1 - p_k) + P_{k-1}(g - 1) p_k
+
+Every side of every match is run at once. Shots go into a sides x max_shots
+matrix, and the loop is over the shot index, never over matches. Sides are
+ordered by shot count, so step k only touches the sides that still have a
+k-th shot. Both sides' PMFs give P(home win), P(draw) and P(away win)
+exactly. Expected points (3 per win, 1 per draw) then sum into a season
+"xG table" to compare with the real one.
+
+Actual goals come from the silver matches table (the final score, own goals
+included) and fall back to the shots when a matches file has no score.
+"""
+import sys
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from eplxg import datasets, instrument, options
+from eplxg.config import GOLD_SCORED, MATCH_OUTCOMES, MATCHES_PATH, PARTITION_COLS, XG_TABLE
+
+# Columns of the scored dataset this stage reads
+SCORED_COLS = ["match_id", "team", "xg", "is_goal"]
+OUT_PATHS = {"match_outcomes": MATCH_OUTCOMES, "xg_table": XG_TABLE}
+
+
+def goal_pmfs(xg, side, n_sides):
+    """Exact goals distribution of every side, as an (n_sides, max shots + 1) array.
+
+    `side` gives the side (0..n_sides-1) of each shot in `xg`. Row s holds
+    P(side s scores g goals) for g = 0, 1, ...; a side without shots scores
+    0 with probability 1.
+    """
+    xg = np.nan_to_num(np.asarray(xg, dtype=np.float64))
+    side = np.asarray(side, dtype=np.int64)
+    counts = np.bincount(side, minlength=n_sides)
+    width = int(counts.max(initial=0))
+
+    # Rank sides by shot count, most first, and lay their shots out row by row
+    rank = np.empty(n_sides, dtype=np.int64)
+    by_count = np.argsort(-counts, kind="stable")
+    rank[by_count] = np.arange(n_sides)
+    row = rank[side]
+    order = np.argsort(row, kind="stable")
+    sorted_counts = counts[by_count]
+    col = np.arange(len(side)) - np.repeat(np.cumsum(sorted_counts) - sorted_counts, sorted_counts)
+    probs = np.zeros((n_sides, width))
+    probs[row[order], col] = xg[order]
+
+    pmf = np.zeros((n_sides, width + 1))
+    pmf[:, 0] = 1.0
+    # Sides with more than k shots; counts are descending, so they are the first `active` rows
+    active = np.searchsorted(-sorted_counts, -np.arange(width), side="left")
+    for k in range(width):
+        a = active[k]
+        p = probs[:a, k:k + 1]
+        # After k shots a side has at most k goals, so only columns 0..k+1 change
+        pmf[:a, 1:k + 2] = pmf[:a, 1:k + 2] * (1 - p) + pmf[:a, :k + 1] * p
+        pmf[:a, :1] *= 1 - p
+    return pmf[rank]
+
+
+def outcome_probs(home, away):
+    """(P(home win), P(draw), P(away win)) per row of two goal PMF arrays of the same width."""
+    home_cdf = np.cumsum(home, axis=1)
+    away_cdf = np.cumsum(away, axis=1)
+    p_home = np.einsum("ij,ij->i", home[:, 1:], away_cdf[:, :-1])
+    p_away = np.einsum("ij,ij->i", away[:, 1:], home_cdf[:, :-1])
+    p_draw = np.einsum("ij,ij->i", home, away)
+    return p_home, p_draw, p_away
+
+
+def _pmf_lists(pmf, lengths):
+    """One list per row of `pmf`, cut to the row's length (its shots + 1)."""
+    keep = np.arange(pmf.shape[1]) < lengths[:, None]
+    offsets = np.r_[0, np.cumsum(lengths)].astype(np.int32)
+    return pa.ListArray.from_arrays(pa.array(offsets), pa.array(pmf[keep]))
+
+
+def _points(goals_for, goals_against):
+    return np.where(goals_for > goals_against, 3, np.where(goals_for == goals_against, 1, 0))
+
+
+def match_outcomes(df=None, scored_dir=GOLD_SCORED, matches_path=MATCHES_PATH):
+    """Outcome probabilities of every match, as a pyarrow table sorted by match.
+
+    Uses the scored DataFrame if given, otherwise the scored dataset. Fixtures
+    come from the silver matches table; matches without scored shots (events
+    not extracted yet) are left out.
+    """
+    shots = df[SCORED_COLS] if df is not None else datasets.read_frame(scored_dir, columns=SCORED_COLS)
+    if not Path(matches_path).exists():
+        raise FileNotFoundError(f"{matches_path} not found; run extract_shots.py first")
+    matches = pd.read_parquet(matches_path)
+    matches = (matches[matches["match_id"].isin(shots["match_id"])]
+               .sort_values(PARTITION_COLS + ["match_id"], ignore_index=True))
+
+    with instrument.span("match_outcomes", rows_in=len(shots)) as span:
+        # Side 2i is match i's home team, 2i + 1 its away team
+        fixtures = shots.merge(matches[["match_id", "home_team", "away_team"]].reset_index(names="row"),
+                               on="match_id")
+        is_away = (fixtures["team"] == fixtures["away_team"]).to_numpy()
+        known = is_away | (fixtures["team"] == fixtures["home_team"]).to_numpy()
+        side = 2 * fixtures["row"].to_numpy()[known] + is_away[known]
+        n_sides = 2 * len(matches)
+        pmf = goal_pmfs(fixtures["xg"].to_numpy()[known], side, n_sides)
+        home, away = pmf[0::2], pmf[1::2]
+        p_home, p_draw, p_away = outcome_probs(home, away)
+
+        xg = np.bincount(side, weights=np.nan_to_num(fixtures["xg"].to_numpy(dtype=np.float64)[known]),
+                         minlength=n_sides)
+        shot_goals = np.bincount(side, weights=fixtures["is_goal"].to_numpy(dtype=np.float64)[known],
+                                 minlength=n_sides).astype(np.int64)
+        n_shots = np.bincount(side, minlength=n_sides)
+        score = matches[["home_score", "away_score"]].to_numpy(dtype=np.float64).ravel()
+        goals = np.where(np.isnan(score), shot_goals, score).astype(np.int64)
+        span.add(rows_out=len(matches), unmatched_shots=int((~known).sum()))
+
+    out = {c: matches[c] for c in PARTITION_COLS + ["match_id", "match_date", "home_team", "away_team"]}
+    for prefix, s in (("home", slice(0, None, 2)), ("away", slice(1, None, 2))):
+        out[f"{prefix}_shots"] = n_shots[s]
+        out[f"{prefix}_xg"] = xg[s]
+        out[f"{prefix}_goals"] = goals[s]
+    out.update(p_home_win=p_home, p_draw=p_draw, p_away_win=p_away,
+               home_xpts=3 * p_home + p_draw, away_xpts=3 * p_away + p_draw)
+    table = pa.Table.from_pandas(pd.DataFrame(out), preserve_index=False)
+    table = table.append_column("home_goals_pmf", _pmf_lists(home, n_shots[0::2] + 1))
+    return table.append_column("away_goals_pmf", _pmf_lists(away, n_shots[1::2] + 1))
+
+
+def xg_table(outcomes):
+    """Season table of expected vs actual points per team, from match_outcomes.
+
+    Ranked by expected points within each season (1 = best).
+    """
+    m = outcomes.drop_columns(["home_goals_pmf", "away_goals_pmf"]).to_pandas()
+    sides = []
+    for us, them, p_win, p_loss in (("home", "away", "p_home_win", "p_away_win"),
+                                    ("away", "home", "p_away_win", "p_home_win")):
+        sides.append(pd.DataFrame({
+            **{c: m[c] for c in PARTITION_COLS},
+            "team": m[f"{us}_team"],
+            "xg_for": m[f"{us}_xg"], "xg_against": m[f"{them}_xg"],
+            "goals_for": m[f"{us}_goals"], "goals_against": m[f"{them}_goals"],
+            "exp_wins": m[p_win], "exp_draws": m["p_draw"], "exp_losses": m[p_loss],
+            "xpts": m[f"{us}_xpts"],
+            "points": _points(m[f"{us}_goals"].to_numpy(), m[f"{them}_goals"].to_numpy()),
+        }))
+    long = pd.concat(sides, ignore_index=True)
+    table = (long.groupby(PARTITION_COLS + ["team"], dropna=False, sort=False)
+             .agg(matches=("xpts", "size"), **{c: (c, "sum") for c in long.columns[3:]})
+             .reset_index())
+    table["points_minus_xpts"] = table["points"] - table["xpts"]
+    by_season = table.groupby(PARTITION_COLS, dropna=False)
+    table["xpts_rank"] = by_season["xpts"].rank(method="min", ascending=False).astype(np.int64)
+    table["points_rank"] = by_season["points"].rank(method="min", ascending=False).astype(np.int64)
+    table = table.sort_values(PARTITION_COLS + ["xpts_rank", "team"], ignore_index=True)
+    return pa.Table.from_pandas(table, preserve_index=False)
+
+
+def build_outcomes(df=None, scored_dir=GOLD_SCORED, matches_path=MATCHES_PATH):
+    """{"match_outcomes": ..., "xg_table": ...} as pyarrow tables."""
+    outcomes = match_outcomes(df, scored_dir, matches_path)
+    return {"match_outcomes": outcomes, "xg_table": xg_table(outcomes)}
+
+
+def save_outcomes(tables):
+    for name, table in tables.items():
+        datasets.write_dataset(table, OUT_PATHS[name], table.schema)
+
+
+def main():
+    options.parser("outcomes").parse_args()
+
+    with instrument.run("match_outcomes"):
+        tables = build_outcomes()
+        save_outcomes(tables)
+
+    table = tables["xg_table"].to_pandas()
+    print(f"✅ Outcome probabilities for {tables['match_outcomes'].num_rows} matches saved.")
+    print("Biggest gaps between points and expected points:")
+    cols = PARTITION_COLS + ["team", "matches", "points", "xpts", "points_minus_xpts"]
+    print(table.reindex(table["points_minus_xpts"].abs().sort_values(ascending=False).index)[cols]
+          .head(10).round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Binned shot heatmaps: scored shots counted on grids over the pitch.
+
+The dashboard draws heatmaps from these tiles instead of raw shots, so what
+it loads and renders depends on the grid resolution, not the shot count.
+Every season's shots are binned onto square grids over the 120 x 80
+StatsBomb pitch, one per cell size in CELLS (10, 5 and 2 yards, i.e.
+12 x 8 up to 60 x 40 cells), for three scopes:
+
+    heatmap_season   one grid per season
+    heatmap_team     one grid per team
+    heatmap_player   one grid per player
+
+Each row is one non-empty cell: its size and (col, row) index, with shots,
+goals, xG and Goals − xG. Binning is vectorized. Every shot gets an integer
+key (group, cell) and the keys are reduced with np.unique / np.bincount.
+Seasons are read one at a time.
+"""
+import sys
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from eplxg import datasets, instrument, options
+from eplxg.config import GOLD_SCORED, PARTITION_COLS, PLAYER_HEATMAP, SEASON_HEATMAP, TEAM_HEATMAP
+from eplxg.transform.extract_shots import NAME
+from eplxg.transform.geometry import PITCH_LENGTH, PITCH_WIDTH
+
+CELLS = [10, 5, 2]  # yards per cell side; each divides 120 and 80
+# Columns of the scored dataset this stage reads
+SCORED_COLS = ["team", "player", "x", "y", "xg", "is_goal"]
+# Scope -> grouping column (None: the whole season)
+SCOPES = {"season": None, "team": "team", "player": "player"}
+OUT_PATHS = {"season": SEASON_HEATMAP, "team": TEAM_HEATMAP, "player": PLAYER_HEATMAP}
+
+TILE_FIELDS = [
+    ("cell", pa.int8()),  # yards per cell side
+    ("col", pa.int16()),  # along the pitch: covers x in [col * cell, (col + 1) * cell)
+    ("row", pa.int16()),  # across the pitch: covers y in [row * cell, (row + 1) * cell)
+    ("shots", pa.int32()),
+    ("goals", pa.int32()),
+    ("xg", pa.float32()),
+    ("goal_minus_xg", pa.float32()),
+]
+SCHEMAS = {
+    scope: pa.schema([(c, pa.int64()) for c in PARTITION_COLS] + ([(key, NAME)] if key else []) + TILE_FIELDS)
+    for scope, key in SCOPES.items()
+}
+
+
+def grid_shape(cell):
+    """(cols, rows) of the grid with the given cell size."""
+    return int(PITCH_LENGTH // cell), int(PITCH_WIDTH // cell)
+
+
+def bin_shots(x, y, xg, is_goal, group=None, cell=CELLS[0]):
+    """Per-cell sums of the shots, over the non-empty (group, cell) pairs.
+
+    group gives each shot's group code (>= 0; default: one group). Shots
+    without a location are skipped; ones on or past the touchlines land in
+    the edge cells. Returns a dict of arrays: group, col, row, shots, goals, xg.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    group = np.zeros(len(x), dtype=np.int64) if group is None else np.asarray(group, dtype=np.int64)
+    ok = ~(np.isnan(x) | np.isnan(y)) & (group >= 0)
+    ncols, nrows = grid_shape(cell)
+    col = np.clip((x[ok] // cell).astype(np.int64), 0, ncols - 1)
+    row = np.clip((y[ok] // cell).astype(np.int64), 0, nrows - 1)
+    keys, inverse = np.unique((group[ok] * nrows + row) * ncols + col, return_inverse=True)
+    return {
+        "group": keys // (ncols * nrows),
+        "col": keys % ncols,
+        "row": keys // ncols % nrows,
+        "shots": np.bincount(inverse, minlength=len(keys)),
+        "goals": np.bincount(inverse, weights=np.asarray(is_goal, dtype=np.float64)[ok], minlength=len(keys)),
+        "xg": np.bincount(inverse, weights=np.nan_to_num(np.asarray(xg, dtype=np.float64)[ok]),
+                          minlength=len(keys)),
+    }
+
+
+def season_tiles(shots, season):
+    """{scope: pyarrow table} of one season's tiles at every cell size."""
+    out = {}
+    for scope, key in SCOPES.items():
+        if key is None:
+            codes, names = None, None
+        else:
+            codes, names = pd.factorize(shots[key].astype("string"), sort=True)
+        parts = []
+        for cell in CELLS:
+            b = bin_shots(shots["x"], shots["y"], shots["xg"], shots["is_goal"], codes, cell)
+            n = len(b["shots"])
+            cols = {c: pa.array(np.full(n, v), pa.int64()) for c, v in zip(PARTITION_COLS, season)}
+            if key is not None:
+                cols[key] = pa.DictionaryArray.from_arrays(pa.array(b["group"], pa.int32()),
+                                                           pa.array(np.asarray(names, dtype=object), pa.string()))
+            cols.update(cell=np.full(n, cell), col=b["col"], row=b["row"], shots=b["shots"], goals=b["goals"],
+                        xg=b["xg"], goal_minus_xg=b["goals"] - b["xg"])
+            parts.append(pa.table(cols).cast(SCHEMAS[scope]))
+        out[scope] = pa.concat_tables(parts).unify_dictionaries() if key else pa.concat_tables(parts)
+    return out
+
+
+def build_heatmaps(df=None, scored_dir=GOLD_SCORED):
+    """{scope: pyarrow table} of tiles for every season.
+
+    Uses the scored DataFrame if given, otherwise reads the scored dataset
+    one season at a time.
+    """
+    if df is not None:
+        seasons = {key: part[SCORED_COLS] for key, part in df.groupby(PARTITION_COLS, dropna=False, sort=False)}
+        seasons = {tuple(None if pd.isna(v) else int(v) for v in key): part for key, part in seasons.items()}
+        load = seasons.__getitem__
+    else:
+        seasons = datasets.list_partitions(scored_dir)
+        load = lambda season: datasets.read_frame(scored_dir, columns=SCORED_COLS, seasons=[season])  # noqa: E731
+
+    tables = {scope: [SCHEMAS[scope].empty_table()] for scope in SCOPES}
+    for season in seasons:
+        shots = load(season)
+        with instrument.span("season_tiles", rows_in=len(shots)) as span:
+            for scope, table in season_tiles(shots, season).items():
+                tables[scope].append(table)
+            span.add(rows_out=sum(t[-1].num_rows for t in tables.values()))
+    return {scope: pa.concat_tables(parts).unify_dictionaries() for scope, parts in tables.items()}
+
+
+def save_heatmaps(tables):
+    for scope, table in tables.items():
+        datasets.write_dataset(table, OUT_PATHS[scope], SCHEMAS[scope])
+
+
+def main():
+    options.parser("heatmaps").parse_args()
+
+    with instrument.run("shot_heatmaps"):
+        tables = build_heatmaps()
+        save_heatmaps(tables)
+
+    print(f"✅ Shot heatmap tiles saved: {', '.join(f'{s} {t.num_rows} cells' for s, t in tables.items())}")
+
+
+if __name__ == "__main__":
+    main()
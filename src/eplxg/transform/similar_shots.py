@@ -0,0 +1,296 @@
+"""Nearest-neighbour index over scored shots, for "similar shots" queries.
+
+A shot is a point in feature space: its location (x, y, yards) plus its
+post-to-post angle, weighted by ANGLE_YARDS so a tenth of a radian counts
+like a yard. Body part and penalties are not distances: a header is only
+compared with headers, a penalty with penalties. So every (is_header,
+is_penalty) stratum gets its own KD-tree (scipy.spatial.cKDTree).
+
+The index covers every scored season and is saved under gold/shot_index as
+shots.parquet: the indexed shots, grouped by stratum in tree order, with
+the layout VERSION in the file's metadata. Only data is stored, never the
+trees (no pickle in the data directory): loading rebuilds each stratum's
+KD-trees from the saved rows, about 1 s per million shots. A file in
+another layout is re-indexed from its shots instead.
+
+Queries are batched: knn(), within() and count_within()
+answer many query shots with one tree call per stratum, and similar() turns
+the neighbours into shot counts, goals, empirical conversion rates and mean
+xG. Radius summaries only count neighbours (in the goals-only tree too)
+rather than listing them, which is what makes them fast.
+"""
+import itertools
+import json
+import shutil
+import sys
+import time
+import uuid
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from scipy.spatial import cKDTree
+
+from eplxg import datasets, instrument, options
+from eplxg.config import GOLD_SCORED, PARTITION_COLS, SHOT_INDEX
+from eplxg.transform.geometry import goal_angle
+
+ANGLE_YARDS = 10.0  # yards of distance per radian of angle difference
+# Columns of the scored dataset the index keeps
+SCORED_COLS = PARTITION_COLS + ["match_id", "team", "player", "minute", "second", "x", "y", "is_header", "is_penalty",
+                                "is_goal", "xg"]
+STRATA = [(False, False), (False, True), (True, False), (True, True)]  # (is_header, is_penalty)
+VERSION = 2  # of the saved layout; bump when it changes
+SHOTS_FILE = "shots.parquet"
+META_KEY = b"eplxg.shot_index"  # parquet metadata key holding {"version": VERSION}
+
+
+def points(x, y):
+    """Feature-space points (n x 3) of shot locations."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    return np.column_stack([x, y, ANGLE_YARDS * goal_angle(x, y)])
+
+
+def _strata(is_header, is_penalty):
+    # Position of each shot's stratum in STRATA
+    return 2 * np.asarray(is_header, dtype=np.int64) + np.asarray(is_penalty, dtype=np.int64)
+
+
+def _flag(column):
+    return pc.fill_null(column, False).to_numpy(zero_copy_only=False)
+
+
+def _trees(shots):
+    """{stratum: (first row, cKDTree of its rows, cKDTree of its goals)} for shots sorted by stratum."""
+    strata = _strata(_flag(shots["is_header"]), _flag(shots["is_penalty"]))
+    # The angle is recomputed like for queries, so a shot is at distance 0 from itself
+    xyz = points(shots["x"].to_numpy(), shots["y"].to_numpy())
+    goals = _flag(shots["is_goal"])
+    bounds = np.searchsorted(strata, np.arange(len(STRATA) + 1))
+    trees = {}
+    for i, stratum in enumerate(STRATA):
+        start, stop = bounds[i], bounds[i + 1]
+        if stop > start:
+            scored = xyz[start:stop][goals[start:stop]]
+            trees[stratum] = (int(start), cKDTree(xyz[start:stop]), cKDTree(scored) if len(scored) else None)
+    return trees
+
+
+class ShotIndex:
+    """KD-trees over scored shots, one per (is_header, is_penalty) stratum.
+
+    `shots` holds the indexed shots (a pyarrow table); neighbours are
+    returned as row positions in it.
+    """
+
+    def __init__(self, shots, trees):
+        """shots in index order; trees: {stratum: (first row, cKDTree of its rows, cKDTree of its goals)}."""
+        self.shots = shots
+        self.trees = trees
+        self.strata = _strata(_flag(shots["is_header"]), _flag(shots["is_penalty"]))
+        self.is_goal = _flag(shots["is_goal"]).astype(np.float64)
+        self.xg = pc.fill_null(shots["xg"], 0.0).to_numpy().astype(np.float64)
+
+    def __len__(self):
+        return self.shots.num_rows
+
+    @classmethod
+    def build(cls, shots):
+        """Index a table of scored shots (needs SCORED_COLS); shots without a location are left out."""
+        shots = shots.select(SCORED_COLS)
+        shots = shots.filter(pc.invert(pc.or_(pc.is_null(shots["x"], nan_is_null=True),
+                                              pc.is_null(shots["y"], nan_is_null=True))))
+        strata = _strata(_flag(shots["is_header"]), _flag(shots["is_penalty"]))
+        shots = shots.take(np.argsort(strata, kind="stable"))
+        return cls(shots, _trees(shots))
+
+    def save(self, root=SHOT_INDEX):
+        """Write the index to root, swapping it in whole like datasets.write_dataset."""
+        root = Path(root)
+        tmp = root.with_name(f"{root.name}.tmp-{uuid.uuid4().hex[:8]}")
+        tmp.mkdir(parents=True)
+        meta = {**(self.shots.schema.metadata or {}), META_KEY: json.dumps({"version": VERSION}).encode()}
+        pq.write_table(self.shots.replace_schema_metadata(meta), tmp / SHOTS_FILE,
+                       compression=datasets.COMPRESSION)
+        old = root.with_name(f"{root.name}.old-{uuid.uuid4().hex[:8]}")
+        if root.exists():
+            root.rename(old)
+        tmp.rename(root)
+        shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load(cls, root=SHOT_INDEX):
+        """The saved index, its trees rebuilt from the saved rows. Raises FileNotFoundError when it was not built."""
+        shots = pq.read_table(Path(root) / SHOTS_FILE)
+        meta = json.loads((shots.schema.metadata or {}).get(META_KEY, b"{}"))
+        strata = _strata(_flag(shots["is_header"]), _flag(shots["is_penalty"]))
+        if meta.get("version") != VERSION or np.any(np.diff(strata) < 0):
+            return cls.build(shots)  # another layout: index its shots afresh
+        return cls(shots, _trees(shots))
+
+    def features(self, rows):
+        """Query arguments (x, y, is_header, is_penalty) for indexed shots, e.g. to find shots like them."""
+        rows = pa.array(np.asarray(rows, dtype=np.int64))
+        shots = self.shots.select(["x", "y", "is_header", "is_penalty"]).take(rows)
+        return {"x": shots["x"].to_numpy(), "y": shots["y"].to_numpy(),
+                "is_header": _flag(shots["is_header"]), "is_penalty": _flag(shots["is_penalty"])}
+
+    def rows(self, season=None, player=None, team=None):
+        """Positions of the indexed shots of a season, player and/or team."""
+        mask = np.ones(len(self), dtype=bool)
+        if season is not None:
+            for col, value in zip(PARTITION_COLS, season):
+                mask &= _flag(pc.equal(self.shots[col], value))
+        for col, value in (("player", player), ("team", team)):
+            if value is not None:
+                mask &= _flag(pc.equal(self.shots[col].cast(pa.string()), value))
+        return np.flatnonzero(mask)
+
+    def _by_stratum(self, is_header, is_penalty):
+        strata = _strata(is_header, is_penalty)
+        for i, stratum in enumerate(STRATA):
+            sel = np.flatnonzero(strata == i)
+            if len(sel) and stratum in self.trees:
+                yield sel, self.trees[stratum]
+
+    def knn(self, x, y, is_header, is_penalty, k=50, exclude=None):
+        """(distances, rows) of the k nearest indexed shots to each query shot, in its stratum.
+
+        Both are (n, k) arrays, nearest first; missing neighbours (a stratum
+        with fewer shots) have row -1 and distance inf. exclude gives one row
+        per query to leave out, such as the query shot itself (-1: none).
+        """
+        xyz = points(x, y)
+        dist = np.full((len(xyz), k), np.inf)
+        rows = np.full((len(xyz), k), -1, dtype=np.int64)
+        extra = 0 if exclude is None else 1
+        for sel, (start, tree, _) in self._by_stratum(is_header, is_penalty):
+            d, i = tree.query(xyz[sel], k=np.arange(1, k + extra + 1))
+            r = np.where(i < tree.n, i + start, -1)
+            if exclude is not None:
+                # Move the excluded row (at most one per query) to the end, keeping the order of the rest
+                keep = np.argsort(r == np.asarray(exclude)[sel][:, None], axis=1, kind="stable")[:, :k]
+                d, r = np.take_along_axis(d, keep, axis=1), np.take_along_axis(r, keep, axis=1)
+            dist[sel], rows[sel] = d[:, :k], r[:, :k]
+        return dist, rows
+
+    def within(self, x, y, is_header, is_penalty, radius, exclude=None):
+        """Indexed shots within radius of each query shot, in its stratum, as (offsets, rows).
+
+        Query j's neighbours are rows[offsets[j]:offsets[j + 1]]. scipy hands
+        back a Python list per query, so prefer count_within() when only the
+        numbers are needed.
+        """
+        xyz = points(x, y)
+        found = []
+        counts = np.zeros(len(xyz), dtype=np.int64)
+        for sel, (start, tree, _) in self._by_stratum(is_header, is_penalty):
+            lists = tree.query_ball_point(xyz[sel], radius)
+            lengths = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+            flat = np.fromiter(itertools.chain.from_iterable(lists), dtype=np.int64, count=int(lengths.sum()))
+            counts[sel] = lengths
+            found.append((np.repeat(sel, lengths), flat + start))
+        query = np.concatenate([q for q, _ in found]) if found else np.zeros(0, dtype=np.int64)
+        rows = np.concatenate([r for _, r in found]) if found else np.zeros(0, dtype=np.int64)
+        if exclude is not None:
+            keep = rows != np.asarray(exclude)[query]
+            query, rows = query[keep], rows[keep]
+            counts = np.bincount(query, minlength=len(xyz))
+        # Group by query, keeping each query's hits in tree order
+        order = np.argsort(query, kind="stable")
+        return np.r_[0, np.cumsum(counts)], rows[order]
+
+    def count_within(self, x, y, is_header, is_penalty, radius, exclude=None):
+        """(shots, goals): how many indexed shots, and goals, lie within radius of each query shot."""
+        xyz = points(x, y)
+        shots = np.zeros(len(xyz), dtype=np.int64)
+        goals = np.zeros(len(xyz), dtype=np.int64)
+        for sel, (_, tree, goal_tree) in self._by_stratum(is_header, is_penalty):
+            shots[sel] = tree.query_ball_point(xyz[sel], radius, return_length=True)
+            if goal_tree is not None:
+                goals[sel] = goal_tree.query_ball_point(xyz[sel], radius, return_length=True)
+        if exclude is not None:
+            # Take out each excluded row that was counted: same stratum and within radius
+            exclude = np.asarray(exclude, dtype=np.int64)
+            row = np.maximum(exclude, 0)
+            own = self.features(row)
+            counted = ((exclude >= 0) & (self.strata[row] == _strata(is_header, is_penalty))
+                       & (np.linalg.norm(points(own["x"], own["y"]) - xyz, axis=1) <= radius))
+            shots -= counted
+            goals -= counted & (self.is_goal[row] > 0)
+        return shots, goals
+
+    def similar(self, x, y, is_header, is_penalty, k=50, radius=None, exclude=None):
+        """Per-query neighbourhood summary as a DataFrame, in query order.
+
+        Neighbours are the k nearest shots, or every shot within radius when
+        radius is given. Columns: neighbours, goals and conversion (goals /
+        neighbours, NaN without any); for k-NN also mean_xg and reach (the
+        distance to the farthest neighbour).
+        """
+        if radius is None:
+            dist, rows = self.knn(x, y, is_header, is_penalty, k=k, exclude=exclude)
+            found = rows >= 0
+            take = np.where(found, rows, 0)
+            out = {
+                "neighbours": found.sum(axis=1),
+                "goals": (self.is_goal[take] * found).sum(axis=1),
+                "xg": (self.xg[take] * found).sum(axis=1),
+                "reach": np.where(found, dist, -np.inf).max(axis=1, initial=-np.inf),
+            }
+        else:
+            shots, goals = self.count_within(x, y, is_header, is_penalty, radius, exclude=exclude)
+            out = {"neighbours": shots, "goals": goals}
+        df = pd.DataFrame(out)
+        df["goals"] = df["goals"].astype(np.int64)
+        some = df["neighbours"].where(df["neighbours"] > 0)
+        df["conversion"] = df["goals"] / some
+        if radius is None:
+            df["mean_xg"] = df.pop("xg") / some
+            df["reach"] = df.pop("reach").where(df["neighbours"] > 0)
+        return df
+
+
+def index_version(root=SHOT_INDEX):
+    """Cache key for the saved index: (file, size, mtime_ns) of its file."""
+    f = Path(root) / SHOTS_FILE
+    return (f.name, f.stat().st_size, f.stat().st_mtime_ns) if f.exists() else ()
+
+
+def build_index(scored=None, scored_dir=GOLD_SCORED):
+    """ShotIndex over the given scored shots (table or DataFrame), or the scored dataset."""
+    if scored is None:
+        scored = datasets.read_table(scored_dir, columns=SCORED_COLS)
+    elif not isinstance(scored, pa.Table):
+        scored = pa.Table.from_pandas(scored[SCORED_COLS], preserve_index=False)
+    with instrument.span("build_index", rows_in=scored.num_rows) as span:
+        index = ShotIndex.build(scored)
+        span.add(rows_out=len(index))
+    return index
+
+
+def main():
+    options.parser("shot_index").parse_args()
+
+    with instrument.run("similar_shots"):
+        index = build_index()
+        index.save()
+
+    print(f"✅ Similar-shot index over {len(index)} shots saved to {SHOT_INDEX}")
+    rows = np.arange(min(len(index), 1000))
+    start = time.perf_counter()
+    stats = index.similar(**index.features(rows), k=50, exclude=rows)
+    print(f"k=50 neighbourhoods of {len(rows)} shots in {(time.perf_counter() - start) * 1e3:.1f} ms; "
+          f"median conversion {stats['conversion'].median():.3f}")
+
+
+if __name__ == "__main__":
+    main()
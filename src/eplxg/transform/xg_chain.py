@@ -0,0 +1,220 @@
+"""xG Chain and xG Buildup per player, from the silver on-ball events and the scored shots.
+
+xG Chain credits every player who touched the ball in a possession with the
+xG of the shots their side took in it. xG Buildup is the same without the
+last two touches. A player counts only for a touch that is neither the
+shot nor the key pass, so it rewards the work before the final ball.
+
+The engine handles the whole event stream at once, with no Python loop over
+possessions:
+
+- Events are sorted once by (match, possession, event index).
+- Each shot's xG is found by binary search on (match, event index) keys.
+- Possession xG is a segment sum (np.add.reduceat) over the sorted events.
+- Every (possession, player) pair is reduced once, with np.unique on a combined key.
+- Pairs are summed per (season, [team,] player) with np.bincount.
+
+Possessions never span matches, so seasons are read and computed one at a
+time. Output tables, next to player_metrics / player_team_metrics:
+
+    player_chain_metrics        per player
+    player_team_chain_metrics   per player and team
+
+with possessions (the player took part in), shot_possessions (of those,
+ones with a shot), xg_chain and xg_buildup.
+"""
+import sys
+from pathlib import Path
+
+if not __package__:
+    # Run as a script: make the `eplxg` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from eplxg import datasets, instrument, options
+from eplxg.config import GOLD_SCORED, PARTITION_COLS, PLAYER_CHAIN, PLAYER_TEAM_CHAIN, SILVER_EVENTS
+
+EVENT_COLS = PARTITION_COLS + ["match_id", "possession", "event_index", "team_id", "team", "player", "type",
+                               "possession_team_id", "key_pass"]
+SCORED_COLS = ["match_id", "event_index", "xg"]
+
+GROUPINGS = {
+    "player_chain_metrics": ["player"],
+    "player_team_chain_metrics": ["team", "player"],
+}
+OUT_PATHS = {"player_chain_metrics": PLAYER_CHAIN, "player_team_chain_metrics": PLAYER_TEAM_CHAIN}
+CHAIN_FIELDS = [
+    ("possessions", pa.int64()),
+    ("shot_possessions", pa.int64()),
+    ("xg_chain", pa.float64()),
+    ("xg_buildup", pa.float64()),
+]
+SCHEMAS = {
+    name: pa.schema([(c, pa.int64()) for c in PARTITION_COLS] + [(k, pa.string()) for k in keys] + CHAIN_FIELDS)
+    for name, keys in GROUPINGS.items()
+}
+
+
+def _codes(column):
+    """(int64 codes with -1 for null, values) of a string or dictionary column."""
+    arr = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+    if not pa.types.is_dictionary(arr.type):
+        arr = pc.dictionary_encode(arr)
+    return pc.fill_null(arr.indices, -1).to_numpy().astype(np.int64), arr.dictionary
+
+
+def _ints(column, null=-1):
+    return pc.fill_null(column, null).to_numpy().astype(np.int64)
+
+
+def _event_keys(match_id, event_index):
+    # Match ids and event indexes both fit 32 bits
+    return (match_id << 32) | event_index
+
+
+def shot_xg(match_id, event_index, shots):
+    """xG of the shot at each (match, event index), 0.0 where there is none."""
+    keys = _event_keys(_ints(shots["match_id"]), _ints(shots["event_index"]))
+    xg = pc.fill_null(shots["xg"], 0.0).to_numpy().astype(np.float64)
+    order = np.argsort(keys, kind="stable")
+    keys, xg = keys[order], xg[order]
+    wanted = _event_keys(match_id, event_index)
+    pos = np.minimum(np.searchsorted(keys, wanted), max(len(keys) - 1, 0))
+    hit = (keys[pos] == wanted) if len(keys) else np.zeros(len(wanted), dtype=bool)
+    return np.where(hit, xg[pos] if len(keys) else 0.0, 0.0)
+
+
+def _season_keys(events):
+    # (competition, season) packed into one int64; 0 for unknown seasons
+    comp, season = (_ints(events[c]) + 1 for c in PARTITION_COLS)
+    return (comp << 32) | season
+
+
+def chain_pairs(events, shots):
+    """Every (possession, player) pair of the events, as a dict of arrays.
+
+    Keys: season, team, player (codes, see `values`), xg (of the possession),
+    buildup (whether the player touched the ball other than for the shot or
+    key pass), plus `values`: {season: (comp, season) rows, team/player: names}.
+    """
+    match_id, possession = _ints(events["match_id"]), _ints(events["possession"])
+    event_index = _ints(events["event_index"])
+    # Silver events are written in match/index order, so the sort is usually a no-op
+    in_order = np.all((match_id[1:] > match_id[:-1]) | ((match_id[1:] == match_id[:-1]) & (
+        (possession[1:] > possession[:-1]) | ((possession[1:] == possession[:-1]) &
+                                              (event_index[1:] >= event_index[:-1])))))
+    order = slice(None) if in_order else np.lexsort((event_index, possession, match_id))
+    match_id, possession, event_index = match_id[order], possession[order], event_index[order]
+    team, team_names = _codes(events["team"])
+    player, player_names = _codes(events["player"])
+    kind, kinds = _codes(events["type"])
+    team, player, kind = team[order], player[order], kind[order]
+    attacking = (_ints(events["team_id"]) == _ints(events["possession_team_id"], null=-2))[order]
+    key_pass = pc.fill_null(events["key_pass"], False).to_numpy(zero_copy_only=False)[order]
+
+    # Possessions: runs of equal (match, possession) in sorted order
+    new = np.r_[True, (match_id[1:] != match_id[:-1]) | (possession[1:] != possession[:-1])][:len(match_id)]
+    starts = np.flatnonzero(new)
+    possession_id = np.cumsum(new) - 1
+    # Only the side in possession's shots count towards it
+    xg = shot_xg(match_id, event_index, shots) * attacking
+    possession_xg = np.add.reduceat(xg, starts) if len(starts) else np.zeros(0)
+
+    involved = attacking & (player >= 0)
+    kinds = kinds.to_pylist()
+    other_touch = ~((kind == (kinds.index("Shot") if "Shot" in kinds else -2)) | key_pass)
+    n_players = max(len(player_names), 1)
+    # Possessions are contiguous, so these keys are nearly sorted already
+    pair_keys, first, inverse = np.unique(possession_id[involved] * n_players + player[involved],
+                                          return_index=True, return_inverse=True)
+    rows = np.flatnonzero(involved)[first]
+    season_keys, season = np.unique(_season_keys(events)[order][rows], return_inverse=True)
+    seasons = np.stack([(season_keys >> 32) - 1, (season_keys & 0xFFFFFFFF) - 1], axis=1)
+    return {
+        "season": season.reshape(-1),
+        "team": team[rows],
+        "player": pair_keys % n_players,
+        "xg": possession_xg[pair_keys // n_players],
+        "buildup": np.bincount(inverse.reshape(-1), weights=other_touch[involved], minlength=len(pair_keys)) > 0,
+        "values": {"season": seasons, "team": team_names, "player": player_names},
+    }
+
+
+def chain_tables(events, shots):
+    """{table name: pyarrow table} of xG chain / buildup for the given events and scored shots."""
+    pairs = chain_pairs(events, shots)
+    values = pairs["values"]
+    tables = {}
+    for name, keys in GROUPINGS.items():
+        cols = ["season"] + keys
+        sizes = [len(values[c]) for c in cols]
+        key = np.zeros(len(pairs["xg"]), dtype=np.int64)
+        for c, size in zip(cols, sizes):
+            key = key * (size + 1) + pairs[c] + 1  # +1: null names (-1) get a code too
+        groups, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+        n = len(groups)
+        seasons = values["season"][pairs["season"][first]]
+        out = {c: pa.array(seasons[:, i], pa.int64(), mask=seasons[:, i] < 0) for i, c in enumerate(PARTITION_COLS)}
+        for k in keys:
+            codes = pairs[k][first]
+            out[k] = values[k].take(pa.array(codes, mask=codes < 0)).cast(pa.string())
+        xg = pairs["xg"]
+        out["possessions"] = np.bincount(inverse, minlength=n)
+        out["shot_possessions"] = np.bincount(inverse, weights=xg > 0, minlength=n).astype(np.int64)
+        out["xg_chain"] = np.bincount(inverse, weights=xg, minlength=n)
+        out["xg_buildup"] = np.bincount(inverse, weights=xg * pairs["buildup"], minlength=n)
+        table = pa.table(out).cast(SCHEMAS[name])
+        tables[name] = table.sort_by([(c, "ascending") for c in PARTITION_COLS + keys])
+    return tables
+
+
+def build_chain(events=None, scored=None, events_dir=SILVER_EVENTS, scored_dir=GOLD_SCORED):
+    """{table name: pyarrow table} of xG chain / buildup for every season.
+
+    Uses the given events table and scored shots (table or DataFrame) if
+    given, otherwise reads both datasets one season at a time.
+    """
+    if scored is not None and not isinstance(scored, pa.Table):
+        scored = pa.Table.from_pandas(scored[SCORED_COLS], preserve_index=False)
+    if events is not None:
+        with instrument.span("chain_tables", rows_in=events.num_rows):
+            return chain_tables(events.select(EVENT_COLS), scored if scored is not None else
+                                datasets.read_table(scored_dir, columns=SCORED_COLS))
+
+    if "event_index" not in datasets.dataset(scored_dir).schema.names:
+        raise ValueError("Scored shots have no event_index; re-run extract_shots.py and the stages after it")
+    parts = {name: [schema.empty_table()] for name, schema in SCHEMAS.items()}
+    for season in datasets.list_partitions(events_dir):
+        season_events = datasets.read_table(events_dir, columns=EVENT_COLS, seasons=[season])
+        with instrument.span("chain_tables", season=f"{season[0]}:{season[1]}",
+                             rows_in=season_events.num_rows) as span:
+            shots = (scored.filter(datasets.make_filter(seasons=[season])) if scored is not None
+                     else datasets.read_table(scored_dir, columns=SCORED_COLS, seasons=[season]))
+            for name, table in chain_tables(season_events, shots).items():
+                parts[name].append(table)
+            span.add(rows_out=sum(p[-1].num_rows for p in parts.values()))
+    return {name: pa.concat_tables(tables) for name, tables in parts.items()}
+
+
+def save_chain(tables):
+    for name, table in tables.items():
+        datasets.write_dataset(table, OUT_PATHS[name], SCHEMAS[name])
+
+
+def main():
+    options.parser("chain").parse_args()
+
+    with instrument.run("xg_chain"):
+        tables = build_chain()
+        save_chain(tables)
+
+    players = tables["player_chain_metrics"].to_pandas()
+    print(f"✅ xG chain / buildup for {len(players)} player-seasons saved.")
+    print(players.sort_values("xg_chain", ascending=False).head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
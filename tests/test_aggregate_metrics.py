@@ -0,0 +1,87 @@
+"""Incrementally maintained aggregate tables against a full recompute."""
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pytest
+
+from eplxg import datasets
+from eplxg.config import GOLD_SCORED
+from eplxg.transform import aggregate_metrics
+
+SEASONS = [1000, 1001, 1002]
+PLAY_PATTERNS = ["Regular Play", "From Corner", "From Free Kick", "From Counter"]
+SIMS = 200
+
+
+def scored_table(rng, n):
+    """Scored shots spread over 30 matches a season, 8 teams and a handful of players each."""
+    season_id = rng.choice(SEASONS, n)
+    team = rng.integers(0, 8, n)
+    xg = rng.beta(1.2, 9.0, n)
+    return pa.table({
+        "competition_id": np.full(n, 2),
+        "season_id": season_id,
+        "match_id": season_id * 1000 + rng.integers(0, 30, n),
+        "team": pa.array([f"Team {t}" for t in team]),
+        "player": pa.array([f"Player {t}-{p}" for t, p in zip(team, rng.integers(0, 6, n))]),
+        "minute": rng.integers(0, 96, n),
+        "play_pattern": pa.array(rng.choice(PLAY_PATTERNS, n)),
+        "xg": xg,
+        "is_goal": (rng.random(n) < xg).astype(np.int64),
+    })
+
+
+def in_matches(table, match_ids):
+    return pc.is_in(table["match_id"], pa.array(sorted(match_ids), table.schema.field("match_id").type))
+
+
+@pytest.fixture
+def aggregated(tmp_path, monkeypatch):
+    """Every gold path is relative to the working directory: aggregate all but two matches in a temp one."""
+    monkeypatch.chdir(tmp_path)
+    table = scored_table(np.random.default_rng(0), 3000)
+    held_back = {1000 * SEASONS[-1] + 28, 1000 * SEASONS[-1] + 29}
+    datasets.write_dataset(table.filter(pc.invert(in_matches(table, held_back))), GOLD_SCORED, table.schema)
+    aggregate_metrics.save_metrics(aggregate_metrics.aggregate_metrics(sims=SIMS, seed=1))
+    return table, held_back
+
+
+def test_new_matches(aggregated):
+    table, held_back = aggregated
+    datasets.replace_matches(GOLD_SCORED, table.filter(in_matches(table, held_back)), held_back)
+
+    _, summary = aggregate_metrics.update_metrics()
+    assert summary["added"] == 2 and summary["seasons"] == [(2, SEASONS[-1])]
+    assert aggregate_metrics.check_metrics() == {}
+
+
+def test_replaced_and_removed_matches(aggregated):
+    table, held_back = aggregated
+    replaced, removed = {SEASONS[0] * 1000 + 3}, {SEASONS[1] * 1000 + 5}
+    rescored = table.filter(in_matches(table, replaced))
+    rescored = rescored.set_column(rescored.schema.get_field_index("xg"), "xg", pc.multiply(rescored["xg"], 0.5))
+    datasets.replace_matches(GOLD_SCORED, rescored, replaced | removed)
+
+    _, summary = aggregate_metrics.update_metrics(replace=replaced)
+    assert (summary["added"], summary["replaced"], summary["removed"]) == (0, 1, 1)
+    assert summary["seasons"] == [(2, SEASONS[0]), (2, SEASONS[1])]
+    assert aggregate_metrics.check_metrics() == {}
+
+
+def test_nothing_changed(aggregated):
+    tables, summary = aggregate_metrics.update_metrics()
+    assert tables == {} and summary["seasons"] == []
+    assert aggregate_metrics.check_metrics() == {}
+
+
+def test_unscored_replace_ids(aggregated):
+    with pytest.raises(ValueError, match="not in the scored data"):
+        aggregate_metrics.update_metrics(replace=[1])
+    _, summary = aggregate_metrics.update_metrics(replace=[1], strict=False)
+    assert summary["seasons"] == []
+
+
+def test_can_update(aggregated):
+    assert aggregate_metrics.can_update(sims=SIMS, seed=1)
+    assert not aggregate_metrics.can_update(sims=SIMS, seed=2)
+    assert not aggregate_metrics.can_update(sims=SIMS, seed=1, model_version="v1")
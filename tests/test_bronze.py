@@ -0,0 +1,80 @@
+"""Season packs: every match reads back exactly as its loose JSON file."""
+import hashlib
+import json
+import os
+import shutil
+import stat
+
+import pytest
+
+from eplxg import bronze, datasets
+from eplxg.transform.extract_shots import load_match_seasons, write_shots
+
+
+@pytest.fixture(scope="module")
+def loose_dir(tmp_path_factory, synthetic):
+    """Synthetic bronze data as loose files; yields (path, season pairs). Tests pack a copy."""
+    out = tmp_path_factory.mktemp("bronze")
+    pairs = synthetic.generate_bronze(out, seasons=2, matches_per_season=5, events_per_match=400)
+    return out, pairs
+
+
+def packed_copy(loose_dir, dest):
+    src, pairs = loose_dir
+    shutil.copytree(src, dest)
+    for c, s in pairs:
+        bronze.pack_season(dest, c, s, remove_loose=True)
+    return dest
+
+
+def loose_bytes(bronze_dir):
+    return {int(p.stem): p.read_bytes() for p in (bronze_dir / "events").glob("*.json")}
+
+
+def test_packed_matches_read_back_identical(loose_dir, tmp_path):
+    originals = loose_bytes(loose_dir[0])
+    packed = packed_copy(loose_dir, tmp_path / "packed")
+    assert not list((packed / "events").glob("*.json"))
+
+    sources = bronze.event_sources(packed)
+    assert [m for _, m in sources] == sorted(originals)
+    for source in sources:
+        raw = originals[source[1]]
+        assert bronze.read_events(source) == raw
+        assert bronze.source_size(source) == len(raw)
+        assert bronze.open_pack(source[0]).entries[source[1]]["sha256"] == hashlib.sha256(raw).hexdigest()
+
+    umask = os.umask(0)
+    os.umask(umask)
+    for path in bronze.pack_files(packed):
+        assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~umask
+    assert not list(packed.rglob("*.tmp"))
+
+
+def test_repack_takes_the_updated_loose_file(loose_dir, tmp_path):
+    originals = loose_bytes(loose_dir[0])
+    packed = packed_copy(loose_dir, tmp_path / "packed")
+    c, s = loose_dir[1][0]
+    match_id = json.loads((packed / f"matches_{c}_{s}.json").read_text())[0]["match_id"]
+
+    # A corrected download lands as a loose file, which wins until the season is packed again
+    events = json.loads(originals[match_id])
+    updated = json.dumps(events[:-1]).encode()
+    (packed / "events" / f"{match_id}.json").write_bytes(updated)
+    assert bronze.event_sources(packed, [match_id]) == [packed / "events" / f"{match_id}.json"]
+
+    bronze.pack_season(packed, c, s, remove_loose=True)
+    sources = bronze.event_sources(packed)
+    assert all(isinstance(source, tuple) for source in sources)
+    for source in sources:
+        expected = updated if source[1] == match_id else originals[source[1]]
+        assert bronze.read_events(source) == expected
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_layouts_extract_the_same_shots(loose_dir, tmp_path, workers):
+    packed = packed_copy(loose_dir, tmp_path / "packed")
+    match_seasons, _ = load_match_seasons(loose_dir[0])
+    for name, bronze_dir in [("loose", loose_dir[0]), ("packed", packed)]:
+        write_shots(bronze.event_sources(bronze_dir), match_seasons, tmp_path / name, workers=workers)
+    assert datasets.read_table(tmp_path / "packed").equals(datasets.read_table(tmp_path / "loose"))
@@ -0,0 +1,77 @@
+"""`eplxg` start-up: the cheap commands must not import the heavy libraries.
+
+Runs each command in a fresh interpreter with `-X importtime` from a
+workspace the pipeline has populated, so `status` plans against real files
+and a real manifest. Timings are left to benchmarks/bench_startup.py.
+"""
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from eplxg import cli, options
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY = {"pandas", "numpy", "pyarrow", "sklearn", "scipy", "duckdb", "requests"}
+IMPORTED = re.compile(r"import time:\s+\d+ \|\s+\d+ \| *(\S+)")
+
+
+@pytest.fixture(scope="module")
+def workspace(tmp_path_factory, synthetic):
+    """A workspace with synthetic bronze data run through the pipeline; yields (path, seasons)."""
+    path = tmp_path_factory.mktemp("workspace")
+    pairs = synthetic.generate_bronze(path / "data" / "bronze" / "statsbomb", seasons=2, matches_per_season=10,
+                            events_per_match=400)
+    seasons = [a for c, s in pairs for a in ("--season", f"{c}:{s}")]
+    subprocess.run([sys.executable, str(ROOT / "run_pipeline.py"), "--skip", "ingest", "--profile_depth", "0",
+                    *seasons], cwd=path, check=True, capture_output=True)
+    (path / "competitions.json").write_text(json.dumps([{
+        "competition_id": 2, "season_id": 27, "competition_name": "Premier League", "season_name": "2015/2016",
+        "country_name": "England"}]))
+    return path, seasons
+
+
+def eplxg(workspace, *args):
+    """(exit code, stdout, modules imported) of `eplxg args` run in the workspace."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", str(ROOT / "eplxg"), *args], cwd=workspace,
+                          capture_output=True, text=True)
+    return proc.returncode, proc.stdout, {m.group(1).split(".")[0] for m in IMPORTED.finditer(proc.stderr)}
+
+
+def test_status_is_cheap(workspace):
+    path, seasons = workspace
+    code, out, imported = eplxg(path, "status", "--skip", "ingest", *seasons)
+    assert code == 0 and "up to date" in out
+    assert not imported & HEAVY
+
+
+def test_competitions_is_cheap(workspace):
+    path, _ = workspace
+    code, out, imported = eplxg(path, "competitions", "--url", (path / "competitions.json").as_uri(),
+                                "--filter", "premier")
+    assert code == 0 and "Premier League" in out
+    assert not imported & HEAVY
+
+
+@pytest.mark.parametrize("command", [[]] + [[name] for name in options.OPTIONS])
+def test_help_imports_nothing_heavy(workspace, command):
+    path, _ = workspace
+    code, out, imported = eplxg(path, *command, "--help")
+    assert code == 0 and out.startswith("usage: eplxg")
+    assert not imported & HEAVY
+
+
+def test_stage_usage_errors_import_nothing_heavy(workspace):
+    path, _ = workspace
+    code, _, imported = eplxg(path, "aggregate", "--no_such_option")
+    assert code == 2
+    assert not imported & HEAVY
+
+
+def test_every_stage_command_has_options():
+    assert set(cli.COMMANDS) - {"run", "status", "competitions"} == set(options.OPTIONS)
+    for name in options.OPTIONS:
+        options.parser(name).parse_args([])
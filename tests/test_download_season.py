@@ -0,0 +1,114 @@
+"""download_season against a local stand-in for the open-data repo."""
+import json
+import os
+import stat
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from eplxg.ingest.download_season import MANIFEST_NAME, download, is_complete
+
+SEASONS = {(2, 27): [101, 102, 103], (2, 28): [201, 202]}
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def open_data(tmp_path):
+    """Serves matches/<comp>/<season>.json and events/<match>.json from a temp dir; yields (root, base_url)."""
+    root = tmp_path / "open-data"
+    for (comp_id, season_id), match_ids in SEASONS.items():
+        matches = root / "matches" / str(comp_id) / f"{season_id}.json"
+        matches.parent.mkdir(parents=True, exist_ok=True)
+        matches.write_text(json.dumps([{"match_id": m} for m in match_ids]))
+        for m in match_ids:
+            events = root / "events" / f"{m}.json"
+            events.parent.mkdir(exist_ok=True)
+            events.write_text(json.dumps([{"id": f"{m}-{i}", "index": i} for i in range(50)]))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(root)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield root, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def manifest(bronze_dir):
+    return json.loads((bronze_dir / MANIFEST_NAME).read_text())
+
+
+def test_downloads_and_records_every_file(open_data, tmp_path):
+    root, base_url = open_data
+    bronze_dir = tmp_path / "bronze"
+    totals = download(list(SEASONS), base_url=base_url, bronze_dir=bronze_dir, workers=4, retries=0)
+
+    assert totals["downloaded"] == 5 and totals["failed"] == []
+    entries = manifest(bronze_dir)
+    for (comp_id, season_id), match_ids in SEASONS.items():
+        assert (bronze_dir / f"matches_{comp_id}_{season_id}.json").exists()
+        for m in match_ids:
+            path = bronze_dir / "events" / f"{m}.json"
+            assert path.read_bytes() == (root / "events" / f"{m}.json").read_bytes()
+            assert entries[f"events/{m}.json"]["size"] == path.stat().st_size
+    assert not list(bronze_dir.rglob("*.tmp"))
+
+
+def test_files_get_umask_modes(open_data, tmp_path):
+    _, base_url = open_data
+    bronze_dir = tmp_path / "bronze"
+    download([(2, 27)], base_url=base_url, bronze_dir=bronze_dir, workers=2, retries=0)
+
+    umask = os.umask(0)
+    os.umask(umask)
+    for path in [bronze_dir / MANIFEST_NAME, bronze_dir / "matches_2_27.json", bronze_dir / "events" / "101.json"]:
+        assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~umask
+
+
+def test_rerun_skips_complete_files_and_refetches_bad_ones(open_data, tmp_path):
+    root, base_url = open_data
+    bronze_dir = tmp_path / "bronze"
+    download([(2, 27)], base_url=base_url, bronze_dir=bronze_dir, workers=2, retries=0)
+
+    # Only the matches list is fetched again
+    assert download([(2, 27)], base_url=base_url, bronze_dir=bronze_dir, workers=2, retries=0)["downloaded"] == 0
+
+    # A truncated file no longer matches its manifest entry, so it is downloaded again
+    (bronze_dir / "events" / "102.json").write_text("[")
+    assert download([(2, 27)], base_url=base_url, bronze_dir=bronze_dir, workers=2, retries=0)["downloaded"] == 1
+    assert (bronze_dir / "events" / "102.json").read_bytes() == (root / "events" / "102.json").read_bytes()
+
+
+def test_missing_matches_list_fails_that_season_only(open_data, tmp_path, capsys):
+    root, base_url = open_data
+    bronze_dir = tmp_path / "bronze"
+    (root / "matches" / "2" / "27.json").unlink()
+
+    with pytest.raises(SystemExit, match="1 downloads failed"):
+        download(list(SEASONS), base_url=base_url, bronze_dir=bronze_dir, workers=2, retries=0)
+
+    assert "Failed matches_2_27.json" in capsys.readouterr().out
+    assert not (bronze_dir / "matches_2_27.json").exists()
+    # The other season still downloaded, and its progress was saved for the next run
+    assert sorted(p.name for p in (bronze_dir / "events").iterdir()) == ["201.json", "202.json"]
+    assert "events/201.json" in manifest(bronze_dir)
+
+
+def test_missing_event_file_is_retried_on_the_next_run(open_data, tmp_path):
+    root, base_url = open_data
+    bronze_dir = tmp_path / "bronze"
+    moved = root / "103.json"
+    (root / "events" / "103.json").rename(moved)
+    with pytest.raises(SystemExit):
+        download([(2, 27)], base_url=base_url, bronze_dir=bronze_dir, workers=2, retries=0)
+    assert "events/103.json" not in manifest(bronze_dir)
+
+    moved.rename(root / "events" / "103.json")
+    totals = download([(2, 27)], base_url=base_url, bronze_dir=bronze_dir, workers=2, retries=0)
+    assert totals["downloaded"] == 1
+    assert is_complete(bronze_dir / "events" / "103.json", manifest(bronze_dir)["events/103.json"])
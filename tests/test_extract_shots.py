@@ -0,0 +1,61 @@
+"""The pre-filtered shot extraction against a full parse of every event."""
+import json
+
+import pyarrow as pa
+import pytest
+
+from eplxg import datasets
+from eplxg.transform.extract_shots import extract_file, extract_file_full, is_shot, load_match_seasons, write_shots
+
+
+@pytest.fixture(scope="module")
+def bronze_dir(tmp_path_factory, synthetic):
+    out = tmp_path_factory.mktemp("bronze")
+    synthetic.generate_bronze(out, seasons=1, matches_per_season=6, events_per_match=600)
+    return out
+
+
+def test_matches_full_parse(bronze_dir):
+    files = sorted((bronze_dir / "events").glob("*.json"))
+    assert files
+    for path in files:
+        rows = extract_file(path)
+        assert rows and rows == extract_file_full(path)
+
+
+def test_other_key_orders_and_ids(bronze_dir, tmp_path):
+    # Shots whose "id" is not first, or not a UUID, are invisible to the pre-filter's event starts
+    events = json.loads(next((bronze_dir / "events").glob("*.json")).read_text())
+    shots = [i for i, e in enumerate(events) if is_shot(e)]
+    for n, i in enumerate(shots):
+        if n % 3 == 1:
+            events[i] = dict(reversed(list(events[i].items())))
+        elif n % 3 == 2:
+            events[i] = {**events[i], "id": str(100_000 + i)}
+    path = tmp_path / "reordered.json"
+    path.write_text(json.dumps(events, indent=2))
+
+    rows = extract_file(path)
+    assert len(rows) == len(shots)
+    assert rows == extract_file_full(path)
+
+
+def test_compact_layout(bronze_dir, tmp_path):
+    source = next((bronze_dir / "events").glob("*.json"))
+    path = tmp_path / "compact.json"
+    path.write_text(json.dumps(json.loads(source.read_text()), separators=(",", ":")))
+    assert extract_file(path) == extract_file_full(source)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_written_dataset(bronze_dir, tmp_path, workers):
+    # The partitioned dataset groups rows by season, adds the partition keys and narrows the types
+    files = sorted((bronze_dir / "events").glob("*.json"))
+    match_seasons, _ = load_match_seasons(bronze_dir)
+    expected = pa.Table.from_pylist([r for f in files for r in extract_file_full(f)])
+    assert write_shots(files, match_seasons, tmp_path / "shots", workers=workers) == expected.num_rows
+
+    cols = expected.column_names
+    keys = [(c, "ascending") for c in cols if c != "freeze_frame"]
+    got = datasets.decode_dictionaries(datasets.read_table(tmp_path / "shots", columns=cols)).sort_by(keys)
+    assert expected.sort_by(keys).cast(got.schema).equals(got)
@@ -0,0 +1,39 @@
+"""Vectorized shot geometry against the scalar helpers it replaced."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from eplxg.transform import geometry
+
+
+def random_locations(rng, n):
+    x = rng.uniform(0.0, 120.0, n)
+    y = rng.uniform(0.0, 80.0, n)
+    # Edge cases: missing coordinates, shots on the posts and on the goal line
+    k = max(n // 50, 1)
+    x[rng.integers(0, n, k)] = np.nan
+    y[rng.integers(0, n, k)] = np.nan
+    idx = rng.integers(0, n, k)
+    x[idx] = geometry.GOAL_X
+    y[idx] = rng.choice([geometry.LEFT_POST_Y, geometry.RIGHT_POST_Y, geometry.GOAL_Y, 0.0, 80.0], k)
+    return x, y
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("vectorized, scalar", [
+    (geometry.distance_to_goal, geometry.shot_distance),
+    (geometry.goal_angle, geometry.shot_angle),
+])
+def test_matches_scalar(seed, vectorized, scalar):
+    x, y = random_locations(np.random.default_rng(seed), 20_000)
+    expected = np.array([scalar(a, b) for a, b in zip(x.tolist(), y.tolist())])
+    got = vectorized(x, y)
+    np.testing.assert_array_equal(np.isnan(got), np.isnan(expected))
+    np.testing.assert_allclose(got, expected, rtol=0, atol=1e-9)
+
+
+def test_geometry_features():
+    x, y = random_locations(np.random.default_rng(0), 1000)
+    features = geometry.geometry_features(pd.Series(x), pd.Series(y))
+    np.testing.assert_array_equal(features["distance"], geometry.distance_to_goal(x, y))
+    np.testing.assert_array_equal(features["angle"], geometry.goal_angle(x, y))
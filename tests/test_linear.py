@@ -0,0 +1,48 @@
+"""The exported NumPy scorer against sklearn's predict_proba."""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from eplxg.model.linear import INTERACTIONS, add_interactions, export_model, load_model
+from eplxg.model.train_xg import FEATURE_COLS, train_model
+
+
+def shots(rng, n):
+    distance = rng.uniform(1.0, 40.0, n)
+    angle = rng.uniform(0.02, 1.6, n)
+    is_header = rng.random(n) < 0.15
+    is_penalty = rng.random(n) < 0.02
+    p = 1.0 / (1.0 + np.exp(-(0.5 - 0.15 * distance + 0.8 * angle - 0.7 * is_header + 2.5 * is_penalty)))
+    return pd.DataFrame({"distance": distance, "angle": angle, "is_header": is_header.astype(np.int64),
+                         "is_penalty": is_penalty.astype(np.int64), "is_goal": (rng.random(n) < p).astype(np.int64)})
+
+
+def test_trained_model(tmp_path):
+    rng = np.random.default_rng(0)
+    model, _ = train_model(shots(rng, 5000))
+    export_model(model, FEATURE_COLS, tmp_path / "model.json")
+    linear = load_model(tmp_path / "model.json")
+
+    X = shots(rng, 20_000)[FEATURE_COLS].astype(float)
+    np.testing.assert_allclose(linear.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-9)
+    np.testing.assert_allclose(linear.score({c: X[c].to_numpy() for c in FEATURE_COLS}),
+                               model.predict_proba(X)[:, 1], rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("interactions", [["distance_x_angle"], list(INTERACTIONS)])
+def test_interaction_features(tmp_path, interactions):
+    # sklearn sees the products as columns; the export computes them from the gold columns
+    rng = np.random.default_rng(1)
+    df = shots(rng, 5000)
+    features = FEATURE_COLS + interactions
+    columns = add_interactions({c: df[c].to_numpy() for c in FEATURE_COLS}, interactions)
+    model = LogisticRegression(max_iter=2000).fit(np.column_stack([columns[f] for f in features]), df["is_goal"])
+    export_model(model, features, tmp_path / "model.json")
+    linear = load_model(tmp_path / "model.json")
+
+    test = shots(rng, 20_000)
+    columns = add_interactions({c: test[c].to_numpy() for c in FEATURE_COLS}, interactions)
+    expected = model.predict_proba(np.column_stack([columns[f] for f in features]))[:, 1]
+    got = linear.score({c: test[c].to_numpy() for c in FEATURE_COLS})
+    np.testing.assert_allclose(got, expected, rtol=0, atol=1e-9)
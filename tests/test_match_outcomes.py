@@ -0,0 +1,64 @@
+"""Batched match outcome probabilities against brute-force enumeration."""
+import itertools
+
+import numpy as np
+import pytest
+
+from eplxg.transform.match_outcomes import goal_pmfs, outcome_probs
+
+
+def small_matches(rng, n_matches, max_shots=8):
+    """(xg, side) for n_matches of at most max_shots a side; side 2i is match i's home team, 2i + 1 its away."""
+    counts = rng.integers(0, max_shots + 1, 2 * n_matches)
+    side = np.repeat(np.arange(2 * n_matches), counts)
+    rng.shuffle(side)
+    return rng.beta(1.2, 9.0, len(side)), side
+
+
+def enumerate_outcomes(p):
+    """{goals: probability} by summing over all 2^n goal/no-goal combinations."""
+    out = {}
+    for bits in itertools.product((0, 1), repeat=len(p)):
+        hit = np.array(bits, dtype=bool)
+        out[int(hit.sum())] = out.get(int(hit.sum()), 0.0) + float(np.prod(np.where(hit, p, 1 - p)))
+    return out
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_goal_pmfs_match_enumeration(seed):
+    rng = np.random.default_rng(seed)
+    xg, side = small_matches(rng, 40)
+    pmf = goal_pmfs(xg, side, 80)
+
+    assert pmf.shape == (80, np.bincount(side, minlength=80).max() + 1)
+    for s in range(80):
+        expected = np.zeros(pmf.shape[1])
+        for goals, prob in enumerate_outcomes(xg[side == s]).items():
+            expected[goals] = prob
+        np.testing.assert_allclose(pmf[s], expected, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_outcome_probs_match_enumeration(seed):
+    rng = np.random.default_rng(seed)
+    xg, side = small_matches(rng, 40, max_shots=6)
+    pmf = goal_pmfs(xg, side, 80)
+    got = np.stack(outcome_probs(pmf[0::2], pmf[1::2]), axis=1)
+
+    for match in range(40):
+        home = enumerate_outcomes(xg[side == 2 * match])
+        away = enumerate_outcomes(xg[side == 2 * match + 1])
+        expected = np.zeros(3)
+        for (h, ph), (a, pa) in itertools.product(home.items(), away.items()):
+            expected[0 if h > a else 1 if h == a else 2] += ph * pa
+        np.testing.assert_allclose(got[match], expected, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(got.sum(axis=1), 1.0, rtol=0, atol=1e-12)
+
+
+def test_sides_without_shots():
+    pmf = goal_pmfs(np.array([0.5, np.nan]), np.array([1, 1]), 3)
+    np.testing.assert_array_equal(pmf, [[1.0, 0.0, 0.0], [0.5, 0.5, 0.0], [1.0, 0.0, 0.0]])
+    home, draw, away = outcome_probs(pmf[[0, 2]], pmf[[1, 1]])
+    np.testing.assert_allclose(home, 0.0)
+    np.testing.assert_allclose(draw, [0.5, 0.5])
+    np.testing.assert_allclose(away, [0.5, 0.5])
@@ -0,0 +1,42 @@
+"""Model search with held-out folds that have only one class."""
+import numpy as np
+import pandas as pd
+
+from eplxg.model.search_xg import FAMILIES, search_model
+
+BASE_FEATURES = ["distance", "angle", "is_header"]
+LOGREG = {"logreg": {**FAMILIES["logreg"], "feature_sets": ["base"], "grid": [{"C": 1.0}]}}
+
+
+def shots(rng, n, goal_rate):
+    return pd.DataFrame({
+        "distance": rng.uniform(2.0, 35.0, n),
+        "angle": rng.uniform(0.05, 1.5, n),
+        "is_header": (rng.random(n) < 0.15).astype(np.int64),
+        "is_goal": (rng.random(n) < goal_rate).astype(np.int64),
+    })
+
+
+def test_season_without_goals_is_left_out_of_roc_auc():
+    rng = np.random.default_rng(0)
+    seasons = {"2:1": 0.0, "2:2": 0.2, "2:3": 0.2}
+    df = pd.concat([shots(rng, 200, rate).assign(season=s) for s, rate in seasons.items()], ignore_index=True)
+
+    _, _, metrics = search_model(df, BASE_FEATURES, groups=df["season"], workers=1, families=LOGREG)
+
+    folds = {f["fold"]: f for f in metrics["search"]["candidates"][0]["folds"]}
+    assert folds["2:1"]["roc_auc"] is None
+    assert np.isclose(metrics["roc_auc"], np.mean([folds["2:2"]["roc_auc"], folds["2:3"]["roc_auc"]]))
+
+
+def test_every_fold_single_class():
+    # Each held-out season is all goals or all misses, so ROC-AUC is undefined everywhere
+    rng = np.random.default_rng(0)
+    seasons = {"2:1": 0.0, "2:2": 1.0, "2:3": 0.0, "2:4": 1.0}
+    df = pd.concat([shots(rng, 100, rate).assign(season=s) for s, rate in seasons.items()], ignore_index=True)
+
+    _, _, metrics = search_model(df, BASE_FEATURES, groups=df["season"], workers=1, families=LOGREG)
+
+    assert metrics["roc_auc"] is None
+    assert metrics["search"]["candidates"][0]["cv"]["roc_auc"] is None
+    assert metrics["log_loss"] is not None
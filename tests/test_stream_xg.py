@@ -0,0 +1,45 @@
+"""Streaming trainer updates."""
+import numpy as np
+import pyarrow as pa
+
+from eplxg import datasets
+from eplxg.model import stream_xg
+from eplxg.model.train_xg import FEATURE_COLS
+
+
+def features_table(rng, match_ids, shots_per_match=30):
+    match_id = np.repeat(match_ids, shots_per_match)
+    n = len(match_id)
+    distance = rng.uniform(2.0, 35.0, n)
+    goal = rng.random(n) < 1.0 / (1.0 + np.exp(0.15 * distance - 0.5))
+    return pa.table({
+        "competition_id": np.full(n, 2),
+        "season_id": np.full(n, 27),
+        "match_id": match_id,
+        "distance": distance,
+        "angle": rng.uniform(0.05, 1.5, n),
+        "is_header": (rng.random(n) < 0.15).astype(np.int64),
+        "is_penalty": (rng.random(n) < 0.02).astype(np.int64),
+        "is_goal": goal.astype(np.int64),
+    })
+
+
+def test_update_without_new_matches_keeps_the_state(tmp_path):
+    rng = np.random.default_rng(0)
+    root = tmp_path / "features"
+    table = features_table(rng, np.arange(1, 41))
+    datasets.write_dataset(table, root, table.schema)
+    _, _, state = stream_xg.fit(root, FEATURE_COLS)
+
+    assert stream_xg.update(root, FEATURE_COLS, state) is None
+
+    # New held-out matches alone (match_id % VAL_EVERY == 0) have nothing to train on either
+    held_out = features_table(rng, [100])
+    datasets.replace_matches(root, held_out, [100])
+    assert stream_xg.update(root, FEATURE_COLS, state) is None
+
+    new = features_table(rng, [101, 102])
+    datasets.replace_matches(root, new, [101, 102])
+    _, metrics, updated = stream_xg.update(root, FEATURE_COLS, state)
+    assert metrics["training"]["new_matches"] == 3
+    assert set(updated["matches"]) - set(state["matches"]) == {100, 101, 102}